@@ -1,12 +1,17 @@
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Callable, Iterable
+from typing import Optional, Callable, Iterable, List, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from .db import get_db
 from . import models
@@ -16,16 +21,157 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-password_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Hashes below the configured cost are rehashed on the next successful login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# 0 workers hashes inline in the calling thread (handy for local runs)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", "64"))
+
+password_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    return password_context.hash(password), time.perf_counter() - started
+
+
+def _timed_hash_many(passwords: List[str]) -> Tuple[List[str], float]:
+    started = time.perf_counter()
+    return [password_context.hash(p) for p in passwords], time.perf_counter() - started
+
+
+def _timed_verify_and_update(password: str, password_hash: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    return password_context.verify_and_update(password, password_hash), time.perf_counter() - started
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool, off the request threadpool.
+
+    At most ``max_pending`` jobs may be queued or running; further requests are
+    rejected with ``HashPoolBusy`` instead of piling up. ``stats()`` reports the
+    queue depth and cumulative wait/run times.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "max_pending_seen": 0,
+            "queue_wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise HashPoolBusy()
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._stats["max_pending_seen"] = max(self._stats["max_pending_seen"], self._pending)
+            if self.workers > 0 and self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        submitted_at = time.perf_counter()
+        outer: Future = Future()
+
+        def _done(inner: Future) -> None:
+            total = time.perf_counter() - submitted_at
+            with self._lock:
+                self._pending -= 1
+                self._stats["completed"] += 1
+            try:
+                result, run = inner.result()
+            except BaseException as exc:  # propagate to the caller
+                outer.set_exception(exc)
+                return
+            with self._lock:
+                self._stats["run_seconds"] += run
+                self._stats["queue_wait_seconds"] += max(0.0, total - run)
+            outer.set_result(result)
+
+        if self._executor is None:
+            inner: Future = Future()
+            try:
+                inner.set_result(fn(*args))
+            except BaseException as exc:
+                inner.set_exception(exc)
+            _done(inner)
+        else:
+            self._executor.submit(fn, *args).add_done_callback(_done)
+        return outer
+
+    def hash(self, password: str) -> str:
+        return self._submit(_timed_hash, password).result()
+
+    def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        return self._submit(_timed_verify_and_update, password, password_hash).result()
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch in parallel, one pool job per worker-sized chunk."""
+        if not passwords:
+            return []
+        chunks = max(1, self.workers)
+        size = -(-len(passwords) // chunks)
+        futures = [
+            self._submit(_timed_hash_many, passwords[i : i + size]) for i in range(0, len(passwords), size)
+        ]
+        hashes: List[str] = []
+        for future in futures:
+            hashes.extend(future.result())
+        return hashes
+
+    async def ahash(self, password: str) -> str:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.hash, password)
+        return await asyncio.wrap_future(self._submit(_timed_hash, password))
+
+    async def averify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.verify_and_update, password, password_hash)
+        return await asyncio.wrap_future(self._submit(_timed_verify_and_update, password, password_hash))
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["pending"] = self._pending
+        data["workers"] = self.workers
+        data["max_pending"] = self.max_pending
+        return data
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
+
+
 def get_password_hash(password: str) -> str:
-    return password_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return password_context.verify(password, password_hash)
+    ok, _ = password_hasher.verify_and_update(password, password_hash)
+    return ok
 
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -37,20 +183,25 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     return encoded_jwt
 
 
+def get_user_from_token(db: Session, token: str) -> Optional[models.User]:
+    """Resolve a bearer token to a user; returns None when the token is invalid."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    email: str | None = payload.get("sub")
+    if email is None:
+        return None
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = get_user_from_token(db, token)
     if user is None:
         raise credentials_exception
     return user
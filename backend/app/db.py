@@ -1,7 +1,7 @@
 import os
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 
@@ -24,6 +24,18 @@ def init_db() -> None:
     # Import models before create_all to ensure metadata is populated
     from . import models  # noqa: F401
 
+    _rebuild_legacy_activity_log()
+    if engine.dialect.name == "postgresql":
+        from .services.activity_retention import create_partitioned_activity_log
+
+        # activity_log is created separately as a monthly-partitioned table
+        Base.metadata.create_all(
+            bind=engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "activity_log"]
+        )
+        try:
+            create_partitioned_activity_log(engine)
+        except Exception:
+            pass
     Base.metadata.create_all(bind=engine)
 
     # Lightweight init-migration for existing databases (adds new user profile columns)
@@ -34,6 +46,18 @@ def init_db() -> None:
                 conn.exec_driver_sql("ALTER TABLE users ADD COLUMN IF NOT EXISTS nickname VARCHAR(100)")
                 conn.exec_driver_sql("ALTER TABLE users ADD COLUMN IF NOT EXISTS phone VARCHAR(50)")
                 conn.exec_driver_sql("ALTER TABLE users ADD COLUMN IF NOT EXISTS telegram VARCHAR(100)")
+                conn.exec_driver_sql("ALTER TABLE projects ADD COLUMN IF NOT EXISTS start_date DATE")
+                conn.exec_driver_sql(
+                    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS open_predecessors INTEGER NOT NULL DEFAULT 0"
+                )
+                conn.exec_driver_sql("ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP")
+                conn.exec_driver_sql(
+                    "ALTER TABLE projects ADD COLUMN IF NOT EXISTS is_template BOOLEAN NOT NULL DEFAULT false"
+                )
+                conn.exec_driver_sql("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS source_task_id INTEGER")
+                conn.exec_driver_sql(
+                    "ALTER TABLE projects ADD COLUMN IF NOT EXISTS reachability_pending BOOLEAN NOT NULL DEFAULT false"
+                )
             else:
                 # Best-effort for SQLite and others; ignore if columns already exist
                 try:
@@ -48,8 +72,106 @@ def init_db() -> None:
                     conn.exec_driver_sql("ALTER TABLE users ADD COLUMN telegram VARCHAR(100)")
                 except Exception:
                     pass
+                try:
+                    conn.exec_driver_sql("ALTER TABLE projects ADD COLUMN start_date DATE")
+                except Exception:
+                    pass
+                try:
+                    conn.exec_driver_sql("ALTER TABLE tasks ADD COLUMN open_predecessors INTEGER NOT NULL DEFAULT 0")
+                except Exception:
+                    pass
+                try:
+                    conn.exec_driver_sql("ALTER TABLE projects ADD COLUMN deleted_at DATETIME")
+                except Exception:
+                    pass
+                try:
+                    conn.exec_driver_sql("ALTER TABLE projects ADD COLUMN is_template BOOLEAN NOT NULL DEFAULT 0")
+                except Exception:
+                    pass
+                try:
+                    conn.exec_driver_sql("ALTER TABLE tasks ADD COLUMN source_task_id INTEGER")
+                except Exception:
+                    pass
+                try:
+                    conn.exec_driver_sql(
+                        "ALTER TABLE projects ADD COLUMN reachability_pending BOOLEAN NOT NULL DEFAULT 0"
+                    )
+                except Exception:
+                    pass
     except Exception:
         # Do not block app startup if optional migration fails
         pass
 
+    if engine.dialect.name == "postgresql":
+        _fix_foreign_key_actions()
+
+    # create_all skips indexes on tables that already exist; add any that are missing
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    index.create(conn, checkfirst=True)
+            except Exception:
+                pass
+
+
+# Foreign keys created before their ON DELETE action was declared: (table, column, referenced table, action)
+_FK_ACTIONS = [
+    ("tasks", "project_id", "projects", "CASCADE"),
+    ("project_members", "project_id", "projects", "CASCADE"),
+    ("task_dependencies", "task_id", "tasks", "CASCADE"),
+    ("task_dependencies", "depends_on_task_id", "tasks", "CASCADE"),
+    ("task_messages", "task_id", "tasks", "CASCADE"),
+    # History is detached from a deleted task, not deleted with it
+    ("activity_log", "task_id", "tasks", "SET NULL"),
+]
+
+# pg_constraint.confdeltype codes
+_DELETE_ACTION_CODES = {"CASCADE": "c", "SET NULL": "n"}
+
 
+def _fix_foreign_key_actions() -> None:
+    for table, column, target, action in _FK_ACTIONS:
+        try:
+            with engine.begin() as conn:
+                row = conn.exec_driver_sql(
+                    """
+                    SELECT con.conname, con.confdeltype FROM pg_constraint con
+                    JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+                    WHERE con.contype = 'f' AND con.conparentid = 0
+                      AND con.conrelid = %(table)s::regclass AND att.attname = %(column)s
+                    """,
+                    {"table": table, "column": column},
+                ).first()
+                if row is None or row[1] == _DELETE_ACTION_CODES[action]:
+                    continue
+                # Skip rather than stall startup behind a long-running transaction
+                conn.exec_driver_sql("SET LOCAL lock_timeout = '5s'")
+                conn.exec_driver_sql(f'ALTER TABLE {table} DROP CONSTRAINT "{row[0]}"')
+                conn.exec_driver_sql(
+                    f'ALTER TABLE {table} ADD CONSTRAINT "{row[0]}" '
+                    f"FOREIGN KEY ({column}) REFERENCES {target}(id) ON DELETE {action}"
+                )
+        except Exception:
+            pass
+
+
+def _rebuild_legacy_activity_log() -> None:
+    # activity_log predates project_id/nullable task_id (and partitioning on
+    # PostgreSQL); an empty legacy table is simply dropped and recreated
+    try:
+        insp = inspect(engine)
+        if not insp.has_table("activity_log"):
+            return
+        with engine.begin() as conn:
+            current = any(col["name"] == "project_id" for col in insp.get_columns("activity_log"))
+            if current and engine.dialect.name == "postgresql":
+                from .services.activity_retention import is_partitioned
+
+                current = is_partitioned(conn)
+            if current:
+                return
+            if conn.exec_driver_sql("SELECT COUNT(*) FROM activity_log").scalar() == 0:
+                conn.exec_driver_sql("DROP TABLE activity_log")
+    except Exception:
+        pass
@@ -1,6 +1,6 @@
 import asyncio
 from collections import defaultdict
-from typing import AsyncGenerator, Dict, Set
+from typing import AsyncGenerator, Dict, Iterable, List, Optional, Set, Tuple
 
 
 class ProjectEventBus:
@@ -8,8 +8,9 @@ class ProjectEventBus:
         self._subscribers: Dict[int, Set[asyncio.Queue[str]]] = defaultdict(set)
         self._lock = asyncio.Lock()
 
-    async def subscribe(self, project_id: int) -> asyncio.Queue[str]:
-        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=100)
+    async def subscribe(self, project_id: int, queue: Optional[asyncio.Queue[str]] = None) -> asyncio.Queue[str]:
+        if queue is None:
+            queue = asyncio.Queue(maxsize=100)
         async with self._lock:
             self._subscribers[project_id].add(queue)
         return queue
@@ -52,3 +53,102 @@ async def notify_project(project_id: int, kind: str = "updated") -> None:
     await bus.publish(project_id, kind)
 
 
+# Same fan-out structure as the project bus, keyed by recipient user id
+user_bus = ProjectEventBus()
+
+
+async def user_sse_stream(user_id: int) -> AsyncGenerator[bytes, None]:
+    queue = await user_bus.subscribe(user_id)
+    try:
+        yield b":ok\n\n"
+        while True:
+            msg = await queue.get()
+            yield f"data: {msg}\n\n".encode("utf-8")
+    finally:
+        await user_bus.unsubscribe(user_id, queue)
+
+
+async def notify_users(messages: Dict[int, str]) -> None:
+    """Deliver pre-rendered feed messages, one lookup per recipient."""
+    for user_id, message in messages.items():
+        await user_bus.publish(user_id, message)
+
+
+class _ProjectChannel:
+    """Bus subscriber that tags messages with their project and forwards them to a shared queue."""
+
+    __slots__ = ("project_id", "queue")
+
+    def __init__(self, project_id: int, queue: "asyncio.Queue[Tuple[int, str]]") -> None:
+        self.project_id = project_id
+        self.queue = queue
+
+    def put_nowait(self, message: str) -> None:
+        self.queue.put_nowait((self.project_id, message))
+
+
+class MultiplexSubscription:
+    """Many project subscriptions on the shared bus, drained through one queue.
+
+    Used by the WebSocket endpoint so a single connection can follow any number
+    of projects. Each project costs one lightweight channel object on the bus.
+    """
+
+    def __init__(self, event_bus: ProjectEventBus = bus, maxsize: int = 1000) -> None:
+        self._bus = event_bus
+        self._channels: Dict[int, _ProjectChannel] = {}
+        self.queue: asyncio.Queue[Tuple[int, str]] = asyncio.Queue(maxsize=maxsize)
+
+    @property
+    def project_ids(self) -> Set[int]:
+        return set(self._channels)
+
+    async def add(self, project_ids: Iterable[int]) -> List[int]:
+        added: List[int] = []
+        for pid in project_ids:
+            if pid in self._channels:
+                continue
+            channel = _ProjectChannel(pid, self.queue)
+            await self._bus.subscribe(pid, channel)  # type: ignore[arg-type]
+            self._channels[pid] = channel
+            added.append(pid)
+        return added
+
+    async def remove(self, project_ids: Iterable[int]) -> List[int]:
+        removed: List[int] = []
+        for pid in project_ids:
+            channel = self._channels.pop(pid, None)
+            if channel is None:
+                continue
+            await self._bus.unsubscribe(pid, channel)  # type: ignore[arg-type]
+            removed.append(pid)
+        return removed
+
+    async def close(self) -> None:
+        await self.remove(list(self._channels))
+
+    async def next_batch(self, max_items: int = 100, window: float = 0.05) -> List[Tuple[int, str]]:
+        """Wait for one event, then collect more for up to ``window`` seconds.
+
+        Identical (project, kind) pairs within a batch are collapsed so that a
+        burst of updates to one project reaches the client as a single entry.
+        """
+
+        first = await self.queue.get()
+        batch: List[Tuple[int, str]] = [first]
+        seen = {first}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+        while len(batch) < max_items:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item in seen:
+                continue
+            seen.add(item)
+            batch.append(item)
+        return batch
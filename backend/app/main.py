@@ -1,12 +1,21 @@
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 
-from .db import init_db, SessionLocal
-from .routers import projects, tasks, analysis, auth as auth_router, users as users_router, events as events_router
+from .compression import CompressionMiddleware
+from .db import engine, init_db, SessionLocal
+from .metrics import METRICS_TOKEN, RequestMetricsMiddleware, instrument_engine
+from . import metrics
+from .routers import projects, tasks, analysis, activity, auth as auth_router, users as users_router, events as events_router, notifications as notifications_router, exports as exports_router
 from . import models
-from .auth import get_password_hash
+from .auth import HashPoolBusy, get_password_hash, password_hasher
+from .services import dashboard, project_purge, reachability, readiness
+from .services.activity import activity_writer
 from .services.demo import ensure_demo_data
+from .services.user_index import user_index
 
 
 app = FastAPI(title="Корпоративный планировщик задач")
@@ -18,6 +27,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+# Added last so it is outermost: timings and sizes are what the client sees
+app.add_middleware(RequestMetricsMiddleware)
+instrument_engine(engine)
 
 
 @app.on_event("startup")
@@ -27,16 +40,41 @@ def on_startup() -> None:
     try:
         _ensure_default_users(db)
         ensure_demo_data(db)
+        dashboard.ensure_counters(db)
+        reachability.ensure_index(db)
+        reachability.resume_pending(db)
+        readiness.ensure_counts(db)
+        project_purge.resume_pending(db)
+        user_index.load(db)
     finally:
         db.close()
+    activity_writer.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    activity_writer.stop()
+    password_hasher.shutdown()
+
+
+@app.exception_handler(HashPoolBusy)
+def hash_pool_busy_handler(request: Request, exc: HashPoolBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервер перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"},
+    )
 
 
 app.include_router(auth_router.router, prefix="/auth", tags=["auth"])
 app.include_router(users_router.router, prefix="/users", tags=["users"])
 app.include_router(events_router.router, prefix="/events", tags=["events"])
+app.include_router(notifications_router.router, prefix="/notifications", tags=["notifications"])
 app.include_router(projects.router, prefix="/projects", tags=["projects"])
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 app.include_router(analysis.router, prefix="/analysis", tags=["analysis"])
+app.include_router(activity.router, prefix="/activity", tags=["activity"])
+app.include_router(exports_router.router, prefix="/exports", tags=["exports"])
 
 
 @app.get("/")
@@ -44,6 +82,15 @@ def root() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request) -> Response:
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Неверный токен доступа к метрикам")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 
 def _ensure_default_users(db: Session) -> None:
     has_users = db.query(models.User).first() is not None
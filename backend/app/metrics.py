@@ -0,0 +1,325 @@
+"""Per-route request metrics in Prometheus text format.
+
+``RequestMetricsMiddleware`` times every HTTP request and, through engine
+events installed by ``instrument_engine``, counts the SQL statements it runs
+and the time spent in them. Per route template it keeps histograms of latency,
+statement count, SQL time and response size; ``render`` writes them out
+together with the password hash pool and activity writer counters.
+
+Requests slower than ``SLOW_REQUEST_MS`` are logged with a breakdown of their
+statements. With ``REQUEST_STATS_HEADER=1`` every response also carries a
+``Server-Timing`` header with the statement count and SQL time, so they show
+up in the browser's network panel.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth import password_hasher
+from .services.activity import activity_writer
+
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+REQUEST_STATS_HEADER = os.getenv("REQUEST_STATS_HEADER", "0").lower() in ("1", "true", "yes")
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+SLOW_LOG_STATEMENTS = 5
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Long-lived server-sent event streams are counted but not timed
+UNTIMED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class RequestStats:
+    """Statements executed on behalf of one request."""
+
+    __slots__ = ("queries", "sql_seconds", "statements", "closed")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sql_seconds = 0.0
+        # raw statement -> [executions, seconds]
+        self.statements: Dict[str, List] = {}
+        self.closed = False
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.sql_seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def breakdown(self) -> List[Tuple[str, int, float]]:
+        """(normalized statement, executions, seconds), slowest first."""
+
+        merged: Dict[str, List] = {}
+        for statement, (count, seconds) in self.statements.items():
+            entry = merged.setdefault(_normalize(statement), [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        return sorted(((sql, c, s) for sql, (c, s) in merged.items()), key=lambda item: -item[2])
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists and multi-row VALUES differ only in their parameter count
+_PARAM_LIST = re.compile(r"\((?:\?|%\(\w+\)s)(?:, (?:\?|%\(\w+\)s))+\)")
+
+
+def _normalize(statement: str) -> str:
+    return _PARAM_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info["request_stats_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    started = conn.info.pop("request_stats_started", None)
+    if stats is None or stats.closed or started is None:
+        return
+    stats.add(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute the engine's statements to the request being served, if any."""
+
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6g}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class _RouteMetrics:
+    __slots__ = ("responses", "latency", "queries", "sql", "size")
+
+    def __init__(self) -> None:
+        self.responses: Dict[str, int] = {}
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.sql = _Histogram(LATENCY_BUCKETS)
+        self.size = _Histogram(SIZE_BUCKETS)
+
+
+# (metric name, help, _RouteMetrics attribute)
+_HISTOGRAMS = [
+    ("http_request_duration_seconds", "Time until the response was fully sent.", "latency"),
+    ("http_request_db_queries", "SQL statements executed per request.", "queries"),
+    ("http_request_db_seconds", "Time spent in SQL statements per request.", "sql"),
+    ("http_response_size_bytes", "Response body size as sent, after compression.", "size"),
+]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status: int, stats: RequestStats, seconds: Optional[float], size: int) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = _RouteMetrics()
+            key = str(status)
+            metrics.responses[key] = metrics.responses.get(key, 0) + 1
+            if seconds is None:
+                return
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(stats.queries)
+            metrics.sql.observe(stats.sql_seconds)
+            metrics.size.observe(size)
+
+    def lines(self) -> Iterable[str]:
+        with self._lock:
+            routes = sorted(self._routes.items())
+            yield "# HELP http_requests_total Requests served, by route template and status."
+            yield "# TYPE http_requests_total counter"
+            for (method, route), metrics in routes:
+                for status, count in sorted(metrics.responses.items()):
+                    yield f'http_requests_total{{{_labels(method, route)},status="{status}"}} {count}'
+            for name, help_text, attr in _HISTOGRAMS:
+                yield f"# HELP {name} {help_text}"
+                yield f"# TYPE {name} histogram"
+                for (method, route), metrics in routes:
+                    yield from getattr(metrics, attr).lines(name, _labels(method, route))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+request_metrics = MetricsRegistry()
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+# (source key, metric suffix, type, help, scale)
+_HASH_POOL_METRICS = [
+    ("submitted", "submitted_total", "counter", "Hashing jobs accepted by the pool.", 1),
+    ("completed", "completed_total", "counter", "Hashing jobs finished.", 1),
+    ("rejected", "rejected_total", "counter", "Hashing jobs refused because the queue was full.", 1),
+    ("queue_wait_seconds", "queue_wait_seconds_total", "counter", "Time jobs spent waiting for a worker.", 1),
+    ("run_seconds", "run_seconds_total", "counter", "Time spent hashing.", 1),
+    ("pending", "pending", "gauge", "Jobs queued or running now.", 1),
+    ("max_pending_seen", "max_pending_seen", "gauge", "Highest number of jobs queued or running at once.", 1),
+    ("max_pending", "max_pending", "gauge", "Queue limit before jobs are refused.", 1),
+    ("workers", "workers", "gauge", "Worker processes.", 1),
+]
+
+_ACTIVITY_WRITER_METRICS = [
+    ("enqueued", "enqueued_total", "counter", "Activity rows queued for writing.", 1),
+    ("written", "written_total", "counter", "Activity rows written.", 1),
+    ("dropped", "dropped_total", "counter", "Activity rows dropped (queue full or orphaned).", 1),
+    ("failed", "failed_total", "counter", "Activity rows lost to failed flushes.", 1),
+    ("flushes", "flushes_total", "counter", "Batches written.", 1),
+    ("flush_seconds", "flush_seconds_total", "counter", "Time spent writing batches.", 1),
+    ("pending", "pending", "gauge", "Activity rows waiting to be written.", 1),
+    ("last_lag_ms", "last_lag_seconds", "gauge", "Queue-to-commit delay of the last batch.", 0.001),
+    ("max_lag_ms", "max_lag_seconds", "gauge", "Highest queue-to-commit delay seen.", 0.001),
+    ("running", "running", "gauge", "Whether the writer thread is running.", 1),
+]
+
+
+def _stats_lines(prefix: str, stats: dict, spec: list) -> Iterable[str]:
+    for key, suffix, kind, help_text, scale in spec:
+        if key not in stats:
+            continue
+        name = f"{prefix}_{suffix}"
+        yield f"# HELP {name} {help_text}"
+        yield f"# TYPE {name} {kind}"
+        yield f"{name} {float(stats[key]) * scale:.6g}"
+
+
+def render() -> str:
+    lines = list(request_metrics.lines())
+    lines.extend(_stats_lines("password_hash_pool", password_hasher.stats(), _HASH_POOL_METRICS))
+    lines.extend(_stats_lines("activity_writer", activity_writer.stats(), _ACTIVITY_WRITER_METRICS))
+    return "\n".join(lines) + "\n"
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _log_slow(method: str, route: str, path: str, status: int, seconds: float, stats: RequestStats) -> None:
+    top = stats.breakdown()[:SLOW_LOG_STATEMENTS]
+    detail = "".join(f"\n  {count}x {sec * 1000:.1f} ms  {sql[:300]}" for sql, count, sec in top)
+    logger.warning(
+        "Slow request %s %s (%s) -> %s: %.0f ms, %d statements, %.0f ms in SQL%s",
+        method,
+        path,
+        route,
+        status,
+        seconds * 1000,
+        stats.queries,
+        stats.sql_seconds * 1000,
+        detail,
+    )
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp, slow_request_ms: float = SLOW_REQUEST_MS, stats_header: bool = REQUEST_STATS_HEADER) -> None:
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.stats_header = stats_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        timed = True
+        finished: Optional[float] = None
+
+        async def on_message(message: Message) -> None:
+            nonlocal status, size, timed, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = Headers(raw=message["headers"])
+                timed = not headers.get("content-type", "").startswith(UNTIMED_CONTENT_TYPES)
+                if self.stats_header:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    MutableHeaders(raw=message["headers"]).append(
+                        "Server-Timing",
+                        f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries", app;dur={elapsed:.1f}',
+                    )
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    # Background tasks run after this; their statements are not the response's
+                    stats.closed = True
+                    finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, on_message)
+        finally:
+            _current.reset(token)
+            stats.closed = True
+            if finished is None:
+                finished = time.perf_counter()
+            seconds = finished - started
+            method, route = scope["method"], _route_template(scope)
+            request_metrics.observe(method, route, status, stats, seconds if timed else None, size)
+            if timed and 0 < self.slow_request_ms <= seconds * 1000:
+                _log_slow(method, route, scope["path"], status, seconds, stats)
@@ -2,6 +2,7 @@ from datetime import datetime, date
 from enum import Enum
 
 from sqlalchemy import (
+    Boolean,
     Column,
     Integer,
     String,
@@ -11,7 +12,10 @@ from sqlalchemy import (
     Enum as SAEnum,
     ForeignKey,
     DECIMAL,
+    Index,
+    LargeBinary,
     UniqueConstraint,
+    false,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -64,10 +68,18 @@ class Project(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Day zero of the schedule; the creation date is used when unset
+    start_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     deadline: Mapped[date | None] = mapped_column(Date, nullable=True)
     customer: Mapped[str | None] = mapped_column(String(255), nullable=True)
     manager_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     budget_plan = Column(DECIMAL(10, 2), nullable=True)
+    # Set when deletion is requested; the project is hidden from then on and purged in the background
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Offered as a starting point for new projects (services.project_clone)
+    is_template: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
+    # task_reachability is still being built in the background (fresh clones); see services.reachability
+    reachability_pending: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -78,16 +90,35 @@ class Project(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # "What can be started now" per project and per assignee (services.readiness)
+        Index("ix_tasks_ready_project", "project_id", "open_predecessors", "status"),
+        Index("ix_tasks_ready_assignee", "assignee_id", "open_predecessors", "status"),
+        # Cross-project "my work", keyset-paged on id within each status
+        Index("ix_tasks_assignee_status", "assignee_id", "status", "id"),
+        # Filtered and sorted project task lists (services.task_query)
+        Index("ix_tasks_project_status", "project_id", "status", "id"),
+        Index("ix_tasks_project_assignee", "project_id", "assignee_id", "id"),
+        Index("ix_tasks_project_deadline", "project_id", "deadline", "id"),
+        Index("ix_tasks_project_updated", "project_id", "updated_at", "id"),
+        Index("ix_tasks_project_name", "project_id", "name", "id"),
+        # Old-to-new id remapping while cloning a project
+        Index("ix_tasks_project_source", "project_id", "source_task_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
-    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     assignee_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     status: Mapped[TaskStatus] = mapped_column(SAEnum(TaskStatus), default=TaskStatus.backlog, nullable=False)
     priority: Mapped[TaskPriority] = mapped_column(SAEnum(TaskPriority), default=TaskPriority.medium, nullable=False)
     duration_plan: Mapped[int] = mapped_column(Integer, nullable=False)
     deadline: Mapped[date | None] = mapped_column(Date, nullable=True)
+    # Direct predecessors that are not done yet, maintained by services.readiness
+    open_predecessors: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Task this one was copied from when its project was cloned; no FK so templates can be purged freely
+    source_task_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -95,7 +126,8 @@ class Task(Base):
     assignee = relationship("User", back_populates="tasks_assigned")
     dependencies = relationship("TaskDependency", back_populates="task", foreign_keys="TaskDependency.task_id", cascade="all, delete-orphan")
     dependents = relationship("TaskDependency", back_populates="depends_on_task", foreign_keys="TaskDependency.depends_on_task_id", cascade="all, delete-orphan")
-    activities = relationship("ActivityLog", back_populates="task", cascade="all, delete-orphan")
+    # History outlives the task: deleting it only detaches the entries (task_id -> NULL)
+    activities = relationship("ActivityLog", back_populates="task", passive_deletes=True)
     messages = relationship("TaskMessage", back_populates="task", cascade="all, delete-orphan")
 
 
@@ -106,8 +138,8 @@ class TaskDependency(Base):
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False, index=True)
-    depends_on_task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False, index=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    depends_on_task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
     dependency_type: Mapped[DependencyType] = mapped_column(SAEnum(DependencyType), default=DependencyType.blocks, nullable=False)
 
     task = relationship("Task", back_populates="dependencies", foreign_keys=[task_id])
@@ -116,10 +148,20 @@ class TaskDependency(Base):
 
 class ActivityLog(Base):
     __tablename__ = "activity_log"
+    __table_args__ = (
+        # History is always read as a time range within one scope
+        Index("ix_activity_log_task_created", "task_id", "created_at"),
+        Index("ix_activity_log_project_created", "project_id", "created_at"),
+        Index("ix_activity_log_user_created", "user_id", "created_at"),
+        Index("ix_activity_log_created", "created_at"),
+    )
 
+    # On PostgreSQL the table is range-partitioned by month (see services.activity_retention)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # Null for project-level entries such as membership changes, and once the task is deleted
+    task_id: Mapped[int | None] = mapped_column(ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     action: Mapped[str] = mapped_column(String(100), nullable=False)
     old_value: Mapped[str | None] = mapped_column(Text, nullable=True)
     new_value: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -136,7 +178,7 @@ class ProjectMember(Base):
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
 
     project = relationship("Project", back_populates="members")
@@ -145,9 +187,13 @@ class ProjectMember(Base):
 
 class TaskMessage(Base):
     __tablename__ = "task_messages"
+    __table_args__ = (
+        # Keyset pagination over a task's chat, newest first
+        Index("ix_task_messages_task_created_id", "task_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), nullable=False, index=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -155,3 +201,173 @@ class TaskMessage(Base):
     task = relationship("Task", back_populates="messages")
     author = relationship("User")
 
+
+class UserNotification(Base):
+    __tablename__ = "user_notifications"
+    __table_args__ = (
+        Index("ix_user_notifications_user_read", "user_id", "read_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    task_id: Mapped[int | None] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True)
+    actor_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    read_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class ActivityDailySummary(Base):
+    """Per-day action counts that replace activity_log rows past the retention window."""
+
+    __tablename__ = "activity_daily_summary"
+    __table_args__ = (
+        Index("ix_activity_summary_task_day", "task_id", "day"),
+        Index("ix_activity_summary_project_day", "project_id", "day"),
+        Index("ix_activity_summary_user_day", "user_id", "day"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # Plain ids: summaries outlive the tasks and users they mention
+    task_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    action: Mapped[str] = mapped_column(String(100), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class TaskChatRead(Base):
+    """Per-user read marker and materialized unread counter for a task chat."""
+
+    __tablename__ = "task_chat_reads"
+    __table_args__ = (
+        UniqueConstraint("user_id", "task_id", name="uq_task_chat_read"),
+        Index("ix_task_chat_reads_user_unread", "user_id", "unread_count"),
+        Index("ix_task_chat_reads_task", "task_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    last_read_message_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_read_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    unread_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ProjectTaskCounter(Base):
+    """Incrementally maintained task counts per project, read by the dashboard summary.
+
+    ``dimension`` is one of status, priority, assignee (key ``none`` when
+    unassigned) or open_deadline (not-done tasks per deadline date).
+    """
+
+    __tablename__ = "project_task_counters"
+    __table_args__ = (
+        UniqueConstraint("project_id", "dimension", "key", name="uq_project_task_counter"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    dimension: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[str] = mapped_column(String(50), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ScheduleSnapshot(Base):
+    """A stored CPM result; per-task ES/EF/slack are packed in ``data`` (see services.snapshots)."""
+
+    __tablename__ = "schedule_snapshots"
+    __table_args__ = (
+        Index("ix_schedule_snapshots_project_created", "project_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # "manual" or "scheduled"
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    label: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_by: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    task_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    duration: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ProjectGraphLayout(Base):
+    """Last computed GraphView layout of a project and the graph version it belongs to."""
+
+    __tablename__ = "project_graph_layouts"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    # Hash of task ids and dependency pairs (see services.layout.graph_version)
+    version: Mapped[str] = mapped_column(String(64), nullable=False)
+    # JSON {task_id: [layer, x, y]}
+    positions: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class TaskReachability(Base):
+    """Transitive closure of task dependencies (see services.reachability)."""
+
+    __tablename__ = "task_reachability"
+    __table_args__ = (
+        # Cone queries: everything below/above a task up to a depth
+        Index("ix_task_reachability_ancestor_depth", "ancestor_id", "depth"),
+        Index("ix_task_reachability_descendant_depth", "descendant_id", "depth"),
+        Index("ix_task_reachability_project", "project_id"),
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    # Length of the shortest dependency chain from ancestor to descendant
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ProjectChange(Base):
+    """Append-only change log for delta sync (see services.change_log)."""
+
+    __tablename__ = "project_changes"
+    __table_args__ = (
+        UniqueConstraint("project_id", "seq", name="uq_project_changes_seq"),
+        Index("ix_project_changes_entity", "project_id", "entity", "entity_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    # task | dependency | member (entity_id is the user id) | project
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # upsert | delete
+    op: Mapped[str] = mapped_column(String(10), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ProjectChangeHead(Base):
+    __tablename__ = "project_change_heads"
+
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Changes at or below this sequence may have been compacted away
+    floor_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ProjectPurge(Base):
+    """Progress of a project deletion (see services.project_purge); outlives the project."""
+
+    __tablename__ = "project_purges"
+
+    project_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    requested_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # pending | running | done | failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    total_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    deleted_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,87 @@
+"""Content negotiation for the columnar encodings of large list responses.
+
+Clients opt in with ``Accept: application/vnd.columnar+json`` or
+``Accept: application/x-msgpack`` (or ``?format=columnar|msgpack``). Lists of
+objects are then sent as parallel arrays, one per field, so keys are written
+once instead of once per row. Plain JSON stays the default.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+import msgpack
+from fastapi import Request, Response
+
+from . import schemas
+
+
+COLUMNAR_JSON = "application/vnd.columnar+json"
+MSGPACK = "application/x-msgpack"
+
+_FORMATS = {"columnar": COLUMNAR_JSON, "msgpack": MSGPACK}
+
+
+def negotiated_format(request: Request) -> Optional[str]:
+    """The columnar media type the client asked for, or None for plain JSON."""
+
+    fmt = request.query_params.get("format")
+    if fmt in _FORMATS:
+        return _FORMATS[fmt]
+    accept = request.headers.get("accept", "")
+    for media_type in (MSGPACK, COLUMNAR_JSON):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+_NATIVE = {int, float, str, bool, type(None)}
+
+
+def _column(items: Sequence[Any], field: str) -> list:
+    values = [getattr(item, field) for item in items]
+    # Most columns are plain numbers or strings; only convert the ones that are not
+    if {type(v) for v in values} <= _NATIVE:
+        return values
+    return [_plain(v) for v in values]
+
+
+def to_columns(items: Sequence[Any], fields: Iterable[str]) -> Dict[str, list]:
+    return {field: _column(items, field) for field in fields}
+
+
+def graph_columns(analysis: schemas.GraphAnalysis) -> dict:
+    layout = analysis.layout
+    return {
+        "project_id": analysis.project_id,
+        "duration": analysis.duration,
+        "critical_path": analysis.critical_path,
+        "nodes": to_columns(analysis.nodes, schemas.GraphNode.model_fields),
+        "edges": to_columns(analysis.edges, schemas.GraphEdge.model_fields),
+        "layout": None
+        if layout is None
+        else {"version": layout.version, "nodes": to_columns(layout.nodes, schemas.GraphNodePosition.model_fields)},
+    }
+
+
+def columnar_response(media_type: str, build: Callable[[], dict]) -> Response:
+    payload = build()
+    if media_type == MSGPACK:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
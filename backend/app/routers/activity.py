@@ -0,0 +1,118 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..auth import get_current_user, require_roles
+from ..db import get_db
+from ..services.access import accessible_project_ids
+from ..services.activity import activity_writer
+from ..services.activity_retention import day_expr
+from ..services.pagination import decode_cursor, encode_cursor, parse_datetime, split_page
+
+
+router = APIRouter()
+
+
+@router.get("/writer")
+def activity_writer_stats(_: models.User = Depends(require_roles(models.UserRole.admin))):
+    """Counters of the batched activity writer: rows written, flushes, pending rows and lag."""
+    return activity_writer.stats()
+
+
+def _scope(db: Session, current_user: models.User, task_id, project_id, user_id):
+    """Validate that exactly one scope is given and the caller may read it; returns (column, value)."""
+
+    if sum(x is not None for x in (task_id, project_id, user_id)) != 1:
+        raise HTTPException(status_code=400, detail="Укажите ровно один из task_id, project_id, user_id")
+    if user_id is not None:
+        if current_user.role != models.UserRole.admin and current_user.id != user_id:
+            raise HTTPException(status_code=403, detail="Недостаточно прав")
+        return "user_id", user_id
+    if task_id is not None:
+        task_project = db.execute(select(models.Task.project_id).where(models.Task.id == task_id)).scalar_one_or_none()
+        if task_project is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        scope_project = task_project
+    else:
+        scope_project = project_id
+    if not accessible_project_ids(db, current_user, [scope_project]):
+        raise HTTPException(status_code=403, detail="Нет доступа к проекту")
+    return ("task_id", task_id) if task_id is not None else ("project_id", project_id)
+
+
+@router.get("/history", response_model=schemas.ActivityPage)
+def activity_history(
+    task_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Newest-first activity for one task, project or user, keyset-paged on (created_at, id)."""
+
+    column, value = _scope(db, current_user, task_id, project_id, user_id)
+    log = models.ActivityLog
+    q = select(log).where(getattr(log, column) == value)
+    if since is not None:
+        q = q.where(log.created_at >= since)
+    if until is not None:
+        q = q.where(log.created_at < until)
+    if cursor:
+        try:
+            last_at, last_id = decode_cursor(cursor, parse_datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(tuple_(log.created_at, log.id) < tuple_(last_at, last_id))
+    rows = db.execute(q.order_by(log.created_at.desc(), log.id.desc()).limit(limit + 1)).scalars().all()
+    items, has_more = split_page(rows, limit)
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if has_more else None
+    return schemas.ActivityPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/history/daily", response_model=List[schemas.ActivityDailyOut])
+def activity_daily(
+    task_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Per-day action counts, merging rolled-up summaries with not-yet-rolled rows."""
+
+    column, value = _scope(db, current_user, task_id, project_id, user_id)
+    counts: dict = {}
+
+    summary = models.ActivityDailySummary
+    q = select(summary.day, summary.action, func.sum(summary.count)).where(getattr(summary, column) == value)
+    if since is not None:
+        q = q.where(summary.day >= since)
+    if until is not None:
+        q = q.where(summary.day < until)
+    for day, action, count in db.execute(q.group_by(summary.day, summary.action)):
+        counts[(day, action)] = counts.get((day, action), 0) + int(count)
+
+    log = models.ActivityLog
+    day_col = day_expr(db.get_bind().dialect.name)
+    q = select(day_col, log.action, func.count()).where(getattr(log, column) == value)
+    if since is not None:
+        q = q.where(log.created_at >= datetime.combine(since, datetime.min.time()))
+    if until is not None:
+        q = q.where(log.created_at < datetime.combine(until, datetime.min.time()))
+    for day, action, count in db.execute(q.group_by(day_col, log.action)):
+        day = day if isinstance(day, date) else date.fromisoformat(day)
+        counts[(day, action)] = counts.get((day, action), 0) + int(count)
+
+    return [
+        schemas.ActivityDailyOut(day=day, action=action, count=count)
+        for (day, action), count in sorted(counts.items())
+    ]
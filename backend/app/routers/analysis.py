@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, defer
 
 from ..db import get_db
 from .. import models, schemas
+from ..auth import get_current_user, require_roles
+from ..responses import columnar_response, graph_columns, negotiated_format
+from ..services import snapshots
+from ..services.access import accessible_project_ids, live_project
+from ..services.gantt import build_chart
+from ..services.layout import layout_for
 from ..services.scheduling import build_graph_and_cpm
 
 
@@ -10,8 +19,15 @@ router = APIRouter()
 
 
 @router.get("/projects/{project_id}/graph", response_model=schemas.GraphAnalysis)
-def project_graph(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).get(project_id)
+def project_graph(
+    project_id: int,
+    request: Request,
+    layout: bool = Query(True, description="Include cached node coordinates for GraphView"),
+    db: Session = Depends(get_db),
+):
+    """CPM analysis of the project graph; see ``app.responses`` for the columnar encodings."""
+
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -24,7 +40,128 @@ def project_graph(project_id: int, db: Session = Depends(get_db)):
     )
 
     analysis = build_graph_and_cpm(project_id=project_id, tasks=tasks, dependencies=deps)
+    if layout:
+        analysis.layout = layout_for(db, analysis)
+    media_type = negotiated_format(request)
+    if media_type:
+        return columnar_response(media_type, lambda: graph_columns(analysis))
     return analysis
 
 
+def _readable_project(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    project = live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not accessible_project_ids(db, current_user, [project_id]):
+        raise HTTPException(status_code=403, detail="Нет доступа к проекту")
+    return project
+
+
+@router.get("/projects/{project_id}/gantt", response_model=schemas.GanttChart)
+def project_gantt(
+    project_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=2000),
+    window_start: Optional[date] = Query(None, alias="from"),
+    window_end: Optional[date] = Query(None, alias="to"),
+    group_by: Literal["none", "assignee"] = "none",
+    working_days: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Gantt bars with calendar dates, windowed by rows (``offset``/``limit``) and days (``from``/``to``)."""
+
+    project = _readable_project(db, project_id, current_user)
+    tasks = db.query(models.Task).filter(models.Task.project_id == project_id).all()
+    deps = (
+        db.query(models.TaskDependency)
+        .join(models.Task, models.Task.id == models.TaskDependency.task_id)
+        .filter(models.Task.project_id == project_id)
+        .all()
+    )
+    names: dict = {}
+    if group_by == "assignee":
+        assignee_ids = {t.assignee_id for t in tasks if t.assignee_id is not None}
+        if assignee_ids:
+            names = dict(
+                db.query(models.User.id, models.User.full_name).filter(models.User.id.in_(assignee_ids)).all()
+            )
+    try:
+        return build_chart(
+            project,
+            tasks,
+            deps,
+            names,
+            group_by_assignee=group_by == "assignee",
+            offset=offset,
+            limit=limit,
+            window_start=window_start,
+            window_end=window_end,
+            working_days=working_days,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/projects/{project_id}/snapshots", response_model=List[schemas.SnapshotOut])
+def list_snapshots(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    _readable_project(db, project_id, current_user)
+    return (
+        db.query(models.ScheduleSnapshot)
+        .options(defer(models.ScheduleSnapshot.data))
+        .filter(models.ScheduleSnapshot.project_id == project_id)
+        .order_by(models.ScheduleSnapshot.created_at.desc(), models.ScheduleSnapshot.id.desc())
+        .all()
+    )
+
+
+@router.post("/projects/{project_id}/snapshots", response_model=schemas.SnapshotOut)
+def create_snapshot(
+    project_id: int,
+    payload: schemas.SnapshotCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+):
+    _readable_project(db, project_id, current_user)
+    try:
+        snapshot = snapshots.take_snapshot(db, project_id, label=payload.label, created_by=current_user.id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    db.commit()
+    db.refresh(snapshot)
+    return snapshot
+
+
+@router.get("/projects/{project_id}/snapshots/diff", response_model=schemas.SnapshotDiff)
+def diff_snapshots(
+    project_id: int,
+    base: int = Query(..., description="Baseline snapshot id"),
+    target: Optional[int] = Query(None, description="Snapshot id to compare; the live schedule if omitted"),
+    limit: int = Query(500, ge=1, le=50000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Changes from ``base`` to ``target`` (or the live schedule); ``changed`` lists the largest slips first."""
 
+    _readable_project(db, project_id, current_user)
+    wanted = [base] + ([target] if target is not None else [])
+    found = {
+        s.id: s
+        for s in db.query(models.ScheduleSnapshot).filter(
+            models.ScheduleSnapshot.project_id == project_id, models.ScheduleSnapshot.id.in_(wanted)
+        )
+    }
+    if any(sid not in found for sid in wanted):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    try:
+        target_schedule = (
+            snapshots.load(found[target]) if target is not None else snapshots.live_schedule(db, project_id)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    result = snapshots.diff(snapshots.load(found[base]), target_schedule, limit=limit)
+    return schemas.SnapshotDiff(base_id=base, target_id=target, **result)
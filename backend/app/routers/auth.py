@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from .. import models, schemas
-from ..auth import verify_password, create_access_token, get_current_user, get_password_hash
+from ..auth import create_access_token, get_current_user, get_password_hash, password_hasher, require_roles
 from ..db import get_db
 from ..services.demo import ensure_user_in_demo_project
+from ..services.user_index import user_index
 
 
 router = APIRouter()
@@ -22,15 +24,38 @@ class TokenOut(BaseModel):
     user: schemas.UserOut
 
 
+def _find_user(db: Session, email: str) -> models.User | None:
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+def _store_password_hash(db: Session, user: models.User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
 @router.post("/login", response_model=TokenOut)
-def login(payload: LoginPayload, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginPayload, db: Session = Depends(get_db)):
+    # Async so that waiting on the hash pool does not hold a request thread
+    user = await run_in_threadpool(_find_user, db, payload.email)
+    if not user:
+        raise HTTPException(status_code=400, detail="Неверный email или пароль")
+    ok, new_hash = await password_hasher.averify_and_update(payload.password, user.password_hash)
+    if not ok:
         raise HTTPException(status_code=400, detail="Неверный email или пароль")
+    if new_hash is not None:
+        # Stored hash is below the configured cost; upgrade it transparently
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
     token = create_access_token(subject=user.email)
     return TokenOut(access_token=token, user=user)  # type: ignore[arg-type]
 
 
+@router.get("/hash-pool")
+def hash_pool_stats(_: models.User = Depends(require_roles(models.UserRole.admin))):
+    return password_hasher.stats()
+
+
 @router.get("/me", response_model=schemas.UserOut)
 def me(current_user: models.User = Depends(get_current_user)):
     return current_user
@@ -53,6 +78,7 @@ def register(payload: schemas.UserRegister, db: Session = Depends(get_db)):
     db.add(user)
     db.commit()
     db.refresh(user)
+    user_index.upsert(user)
     ensure_user_in_demo_project(db, user)
     return user
 
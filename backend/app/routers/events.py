@@ -1,14 +1,99 @@
-from fastapi import APIRouter
+import asyncio
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from ..events import project_sse_stream
+from ..auth import get_user_from_token
+from ..db import SessionLocal
+from ..events import MultiplexSubscription, project_sse_stream
+from ..services.access import accessible_project_ids
 
 
 router = APIRouter()
 
+# Upper bound of projects a single socket may follow
+MAX_WS_SUBSCRIPTIONS = 5000
+
 
 @router.get("/projects/{project_id}/stream")
 async def project_events(project_id: int):
     return StreamingResponse(project_sse_stream(project_id), media_type="text/event-stream")
 
 
+def _authorize(token: str, project_ids: Optional[List[int]]) -> Tuple[Optional[int], List[int]]:
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, token)
+        if user is None:
+            return None, []
+        if project_ids is None:
+            return user.id, []
+        return user.id, sorted(accessible_project_ids(db, user, project_ids))
+    finally:
+        db.close()
+
+
+def _parse_ids(raw) -> List[int]:
+    if not isinstance(raw, list):
+        return []
+    ids: List[int] = []
+    for value in raw:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+@router.websocket("/ws")
+async def events_ws(websocket: WebSocket, token: str = ""):
+    """Multiplexed event stream for many projects over one WebSocket.
+
+    Client frames: ``{"action": "subscribe" | "unsubscribe", "project_ids": [...]}``.
+    Server frames: ``{"type": "subscribed", "project_ids": [...], "denied": [...]}``,
+    ``{"type": "unsubscribed", "project_ids": [...]}`` and batched
+    ``{"type": "events", "events": [{"project_id": 1, "kind": "task_updated"}, ...]}``.
+    """
+
+    user_id, _ = await run_in_threadpool(_authorize, token, None)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    subscription = MultiplexSubscription()
+
+    async def pump() -> None:
+        while True:
+            batch = await subscription.next_batch()
+            await websocket.send_json(
+                {"type": "events", "events": [{"project_id": pid, "kind": kind} for pid, kind in batch]}
+            )
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            frame = await websocket.receive_json()
+            if not isinstance(frame, dict):
+                continue
+            action = frame.get("action")
+            requested = _parse_ids(frame.get("project_ids"))
+            if action == "subscribe":
+                new_ids = [pid for pid in dict.fromkeys(requested) if pid not in subscription.project_ids]
+                room = MAX_WS_SUBSCRIPTIONS - len(subscription.project_ids)
+                _, allowed = await run_in_threadpool(_authorize, token, new_ids[: max(room, 0)])
+                added = await subscription.add(allowed)
+                denied = sorted(set(new_ids) - set(allowed))
+                await websocket.send_json({"type": "subscribed", "project_ids": added, "denied": denied})
+            elif action == "unsubscribe":
+                removed = await subscription.remove(requested)
+                await websocket.send_json({"type": "unsubscribed", "project_ids": removed})
+            else:
+                await websocket.send_json({"type": "error", "detail": "Unknown action"})
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        sender.cancel()
+        await subscription.close()
@@ -0,0 +1,90 @@
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from .. import models
+from ..auth import get_current_user, require_roles
+from ..services import exports
+from ..services.access import accessible_project_ids, live_project
+
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xml": "application/xml",
+}
+
+
+def _project(db: Session, project_id: int, current_user: models.User) -> models.Project:
+    project = live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not accessible_project_ids(db, current_user, [project_id]):
+        raise HTTPException(status_code=403, detail="Нет доступа к проекту")
+    # Detached copy for the generator, which outlives this session
+    db.expunge(project)
+    return project
+
+
+def _download(body: Iterator[str], fmt: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/projects/{project_id}/tasks")
+def export_tasks(
+    project_id: int,
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Tasks with assignee and CPM fields; CPM columns are empty if the graph has a cycle."""
+
+    project = _project(db, project_id, current_user)
+    schedule = exports.schedule_fields(db, project_id)
+    return _download(exports.tasks_rows(format, project, schedule), format, f"project_{project_id}_tasks")
+
+
+@router.get("/projects/{project_id}/dependencies")
+def export_dependencies(
+    project_id: int,
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    _project(db, project_id, current_user)
+    return _download(exports.dependencies_rows(format, project_id), format, f"project_{project_id}_dependencies")
+
+
+@router.get("/projects/{project_id}/messages")
+def export_messages(
+    project_id: int,
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+):
+    """All task chats of the project; limited to admins and managers, like chat access."""
+
+    _project(db, project_id, current_user)
+    return _download(exports.messages_rows(format, project_id), format, f"project_{project_id}_messages")
+
+
+@router.get("/projects/{project_id}/msproject")
+def export_msproject(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """MS Project XML (File > Open in MS Project, or import in ProjectLibre)."""
+
+    project = _project(db, project_id, current_user)
+    schedule = exports.schedule_fields(db, project_id)
+    return _download(exports.msproject_xml(project, schedule), "xml", f"project_{project_id}")
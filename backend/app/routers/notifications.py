@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..auth import get_current_user, get_user_from_token
+from ..db import get_db
+from ..events import user_sse_stream
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[schemas.NotificationOut])
+def list_notifications(
+    unread_only: bool = True,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    q = db.query(models.UserNotification).filter(models.UserNotification.user_id == current_user.id)
+    if unread_only:
+        q = q.filter(models.UserNotification.read_at.is_(None))
+    return q.order_by(models.UserNotification.id.desc()).limit(limit).all()
+
+
+@router.post("/read")
+def mark_notifications_read(
+    payload: schemas.NotificationsRead,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    stmt = (
+        update(models.UserNotification)
+        .where(models.UserNotification.user_id == current_user.id, models.UserNotification.read_at.is_(None))
+        .values(read_at=datetime.utcnow())
+    )
+    if payload.ids is not None:
+        stmt = stmt.where(models.UserNotification.id.in_(payload.ids))
+    updated = db.execute(stmt).rowcount
+    db.commit()
+    return {"status": "ok", "updated": updated}
+
+
+@router.get("/stream")
+def notifications_stream(token: str, db: Session = Depends(get_db)):
+    # EventSource cannot send headers, so the token comes as a query parameter
+    user = get_user_from_token(db, token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return StreamingResponse(user_sse_stream(user.id), media_type="text/event-stream")
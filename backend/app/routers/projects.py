@@ -1,12 +1,16 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from starlette.background import BackgroundTasks
 from sqlalchemy.orm import Session
 
 from ..db import get_db
 from .. import models, schemas
 from ..auth import require_roles, get_current_user
+from ..services import change_log, dashboard, project_clone, project_purge, reachability
+from ..services.access import accessible_project_ids, live_project
+from ..services.activity import entry, record_activity
+from ..services.feed import project_recipients, record_feed_event
 
 
 router = APIRouter()
@@ -17,7 +21,7 @@ def list_projects(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    q = db.query(models.Project)
+    q = db.query(models.Project).filter(models.Project.deleted_at.is_(None))
     if current_user.role == models.UserRole.admin:
         return q.order_by(models.Project.id).all()
     # Managers: see managed or where member
@@ -49,6 +53,8 @@ def create_project(
         data["manager_id"] = current_user.id
     project = models.Project(**data)
     db.add(project)
+    db.flush()
+    change_log.record(db, project.id, [(change_log.PROJECT, project.id, change_log.UPSERT)])
     db.commit()
     db.refresh(project)
     if background_tasks is not None:
@@ -57,13 +63,91 @@ def create_project(
     return project
 
 
+@router.get("/templates", response_model=List[schemas.ProjectOut])
+def list_templates(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+):
+    # Templates are shared: any manager may start a project from one
+    return (
+        db.query(models.Project)
+        .filter(models.Project.is_template.is_(True), models.Project.deleted_at.is_(None))
+        .order_by(models.Project.id)
+        .all()
+    )
+
+
+@router.post("/{project_id}/clone", response_model=schemas.ProjectOut)
+def clone_project(
+    project_id: int,
+    payload: schemas.ProjectClone,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+    background_tasks: BackgroundTasks = None,
+):
+    source = live_project(db, project_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not source.is_template and not accessible_project_ids(db, current_user, [project_id]):
+        raise HTTPException(status_code=403, detail="Нет доступа к проекту")
+    user_ids = {uid for uid in payload.assignee_map.values() if uid is not None}
+    if payload.manager_id is not None:
+        user_ids.add(payload.manager_id)
+    if user_ids:
+        found = db.query(models.User.id).filter(models.User.id.in_(user_ids)).count()
+        if found != len(user_ids):
+            raise HTTPException(status_code=400, detail="Пользователь не найден")
+    manager_id = payload.manager_id
+    if current_user.role == models.UserRole.manager and manager_id is None:
+        manager_id = current_user.id
+    project = project_clone.clone_project(
+        db,
+        source,
+        payload.name,
+        description=payload.description,
+        customer=payload.customer,
+        manager_id=manager_id,
+        start_date=payload.start_date,
+        assignee_map=payload.assignee_map,
+        keep_unmapped_assignees=payload.keep_unmapped_assignees,
+        copy_members=payload.copy_members,
+        reset_status=payload.reset_status,
+        is_template=payload.is_template,
+    )
+    db.commit()
+    db.refresh(project)
+    if background_tasks is not None:
+        from ..events import notify_project
+        background_tasks.add_task(reachability.rebuild_pending, project.id)
+        background_tasks.add_task(notify_project, project.id, "project_created")
+    else:
+        reachability.rebuild_pending(project.id)
+    return project
+
+
+@router.get("/summary", response_model=List[schemas.ProjectSummary])
+def list_project_summaries(
+    ids: Optional[str] = Query(None, description="Comma-separated project ids; all accessible projects if omitted"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    wanted = None
+    if ids:
+        try:
+            wanted = [int(pid) for pid in ids.split(",") if pid.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid project ids")
+    project_ids = accessible_project_ids(db, current_user, wanted)
+    return list(dashboard.summaries(db, project_ids).values())
+
+
 @router.get("/{project_id}", response_model=schemas.ProjectOut)
 def get_project(
     project_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if current_user.role == models.UserRole.admin:
@@ -81,6 +165,41 @@ def get_project(
     return project
 
 
+@router.get("/{project_id}/summary", response_model=schemas.ProjectSummary)
+def get_project_summary(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if not db.query(models.Project.id).filter(models.Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not accessible_project_ids(db, current_user, [project_id]):
+        raise HTTPException(status_code=403, detail="Нет доступа к проекту")
+    return dashboard.summaries(db, [project_id])[project_id]
+
+
+@router.get("/{project_id}/changes", response_model=schemas.ProjectChanges)
+def get_project_changes(
+    project_id: int,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Rows changed after sequence ``since``, with tombstones for deletes.
+
+    Without ``since`` only the current sequence is returned: read it before a
+    full load and pass it on the next call to receive what changed meanwhile.
+    """
+    if not accessible_project_ids(db, current_user, [project_id]):
+        if live_project(db, project_id) is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        raise HTTPException(status_code=403, detail="Нет доступа")
+    if since is None:
+        return schemas.ProjectChanges(project_id=project_id, seq=change_log.head(db, project_id)[0])
+    return change_log.changes_since(db, project_id, since, limit)
+
+
 @router.patch("/{project_id}", response_model=schemas.ProjectOut)
 def update_project(
     project_id: int,
@@ -89,7 +208,7 @@ def update_project(
     current_user: models.User = Depends(get_current_user),
     background_tasks: BackgroundTasks = None,
 ):
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     # Permissions: admin or manager of this project
@@ -102,11 +221,20 @@ def update_project(
     for k, v in data.items():
         setattr(project, k, v)
     db.add(project)
+    feed = record_feed_event(
+        db,
+        kind="project_updated",
+        project_id=project.id,
+        actor_id=current_user.id,
+        recipients=project_recipients(db, project.id),
+    )
+    change_log.record(db, project.id, [(change_log.PROJECT, project.id, change_log.UPSERT)])
     db.commit()
     db.refresh(project)
     if background_tasks is not None:
-        from ..events import notify_project
+        from ..events import notify_project, notify_users
         background_tasks.add_task(notify_project, project.id, "project_updated")
+        background_tasks.add_task(notify_users, feed)
     return project
 
 
@@ -117,7 +245,7 @@ def list_members(
     current_user: models.User = Depends(get_current_user),
 ):
     # Access if admin, manager of project, or project member
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if current_user.role != models.UserRole.admin and project.manager_id != current_user.id:
@@ -146,7 +274,7 @@ def add_member(
     current_user: models.User = Depends(get_current_user),
     background_tasks: BackgroundTasks = None,
 ):
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if not (
@@ -168,11 +296,23 @@ def add_member(
         return exists
     member = models.ProjectMember(project_id=project_id, user_id=payload.user_id)
     db.add(member)
+    feed = record_feed_event(
+        db,
+        kind="member_added",
+        project_id=project_id,
+        actor_id=current_user.id,
+        recipients=[payload.user_id],
+    )
+    change_log.record(db, project_id, [(change_log.MEMBER, payload.user_id, change_log.UPSERT)])
     db.commit()
     db.refresh(member)
+    record_activity(
+        [entry(user_id=current_user.id, project_id=project_id, action="member_added", new_value=payload.user_id)]
+    )
     if background_tasks is not None:
-        from ..events import notify_project
+        from ..events import notify_project, notify_users
         background_tasks.add_task(notify_project, project_id, "member_added")
+        background_tasks.add_task(notify_users, feed)
     return member
 
 
@@ -184,7 +324,7 @@ def remove_member(
     current_user: models.User = Depends(get_current_user),
     background_tasks: BackgroundTasks = None,
 ):
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if not (
@@ -198,7 +338,11 @@ def remove_member(
         .delete()
     )
     if deleted:
+        change_log.record(db, project_id, [(change_log.MEMBER, user_id, change_log.DELETE)])
         db.commit()
+        record_activity(
+            [entry(user_id=current_user.id, project_id=project_id, action="member_removed", old_value=user_id)]
+        )
         if background_tasks is not None:
             from ..events import notify_project
             background_tasks.add_task(notify_project, project_id, "member_removed")
@@ -209,21 +353,35 @@ def remove_member(
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
-    _: models.User = Depends(require_roles(models.UserRole.admin)),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin)),
     background_tasks: BackgroundTasks = None,
 ):
-    project = db.query(models.Project).get(project_id)
+    """Hide the project now and purge its data in the background (see GET /{project_id}/deletion)."""
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    db.delete(project)
+    project_purge.request_deletion(db, project, current_user.id)
     db.commit()
 
     if background_tasks is not None:
         from ..events import notify_project
+        background_tasks.add_task(project_purge.purge, project_id)
         background_tasks.add_task(notify_project, project_id, "project_deleted")
 
     return {"status": "deleted"}
 
 
+@router.get("/{project_id}/deletion", response_model=schemas.ProjectPurgeOut)
+def get_project_deletion(
+    project_id: int,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_roles(models.UserRole.admin)),
+):
+    purge_row = db.get(models.ProjectPurge, project_id)
+    if purge_row is None:
+        raise HTTPException(status_code=404, detail="Удаление проекта не запрашивалось")
+    return purge_row
+
+
 
@@ -1,13 +1,21 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from starlette.background import BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, joinedload
 
 from ..db import get_db
 from .. import models, schemas
 from ..auth import get_current_user, require_roles
-from ..events import notify_project
+from ..events import notify_project, notify_users
+from ..responses import columnar_response, negotiated_format, to_columns
+from ..services import change_log, chat_unread, dashboard, reachability, readiness, task_query
+from ..services.access import accessible_project_ids, project_access_filter, live_project, live_task
+from ..services.activity import entry, record_activity, task_field_changes
+from ..services.feed import record_feed_event, task_recipients
+from ..services.pagination import decode_cursor, encode_cursor, parse_datetime, split_page
 from pydantic import BaseModel
 from typing import List
 
@@ -17,12 +25,13 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.TaskOut])
 def list_tasks(
+    request: Request,
     project_id: int = Query(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     # Verify access to project
-    project = db.query(models.Project).get(project_id)
+    project = live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if current_user.role != models.UserRole.admin:
@@ -37,23 +46,136 @@ def list_tasks(
             )
             if not is_member:
                 raise HTTPException(status_code=403, detail="Нет доступа к задачам проекта")
-    return (
+    tasks = (
         db.query(models.Task)
         .filter(models.Task.project_id == project_id)
         .order_by(models.Task.id)
         .all()
     )
+    media_type = negotiated_format(request)
+    if media_type:
+        return columnar_response(media_type, lambda: {"tasks": to_columns(tasks, schemas.TaskOut.model_fields)})
+    return tasks
+
+
+@router.get("/search", response_model=schemas.TaskPage)
+def search_tasks(
+    project_id: int = Query(...),
+    status: Optional[List[models.TaskStatus]] = Query(None),
+    priority: Optional[List[models.TaskPriority]] = Query(None),
+    assignee_id: Optional[List[int]] = Query(None),
+    unassigned: bool = False,
+    deadline_from: Optional[date] = None,
+    deadline_to: Optional[date] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: str = Query("id", description="id, deadline, updated_at or name; prefix with - for descending"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Filtered, sorted and keyset-paged tasks of one project."""
+    if not accessible_project_ids(db, current_user, [project_id]):
+        raise HTTPException(status_code=403, detail="Нет доступа к задачам проекта")
+    try:
+        task_query.parse_sort(sort)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Неизвестное поле сортировки")
+    task_filter = task_query.TaskFilter(
+        project_id=project_id,
+        status=status or [],
+        priority=priority or [],
+        assignee_ids=assignee_id or [],
+        unassigned=unassigned,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+        text=q.strip() if q else None,
+    )
+    try:
+        items, next_cursor = task_query.search(db, task_filter, sort=sort, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return schemas.TaskPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/ready", response_model=List[schemas.TaskOut])
+def list_ready_tasks(
+    project_id: Optional[int] = Query(None),
+    assignee_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Tasks that can be started now: in backlog with every predecessor done.
+
+    With ``project_id`` lists the project (optionally one assignee's tasks);
+    without it lists the tasks of ``assignee_id`` (default: the caller) across
+    all projects the caller can read.
+    """
+    if project_id is not None:
+        project_ids = accessible_project_ids(db, current_user, [project_id])
+        if not project_ids:
+            raise HTTPException(status_code=403, detail="Нет доступа к задачам проекта")
+    else:
+        project_ids = accessible_project_ids(db, current_user)
+        if assignee_id is None:
+            assignee_id = current_user.id
+    return readiness.ready_tasks(db, project_ids, assignee_id=assignee_id, limit=limit)
+
+
+@router.get("/mine", response_model=schemas.MyTaskPage)
+def list_my_tasks(
+    status: Optional[List[models.TaskStatus]] = Query(None),
+    priority: Optional[List[models.TaskPriority]] = Query(None),
+    deadline_from: Optional[date] = None,
+    deadline_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Tasks assigned to the caller across every project they can read, keyset-paged on id.
+
+    One query: project access is checked inside it rather than per project.
+    """
+    q = (
+        db.query(models.Task, models.Project.name)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .filter(models.Task.assignee_id == current_user.id)
+    )
+    q = q.filter(project_access_filter(current_user))
+    if status:
+        q = q.filter(models.Task.status.in_(status))
+    if priority:
+        q = q.filter(models.Task.priority.in_(priority))
+    if deadline_from is not None:
+        q = q.filter(models.Task.deadline >= deadline_from)
+    if deadline_to is not None:
+        q = q.filter(models.Task.deadline <= deadline_to)
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(models.Task.id > after_id)
+    rows, has_more = split_page(q.order_by(models.Task.id).limit(limit + 1).all(), limit)
+    items = [
+        schemas.MyTaskOut(**schemas.TaskOut.model_validate(task).model_dump(), project_name=name)
+        for task, name in rows
+    ]
+    next_cursor = encode_cursor(items[-1].id) if has_more else None
+    return schemas.MyTaskPage(items=items, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=schemas.TaskOut)
 def create_task(
     payload: schemas.TaskCreate,
     db: Session = Depends(get_db),
-    _: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
     background_tasks: BackgroundTasks = None,
 ):
     # Ensure project exists
-    project = db.query(models.Project).get(payload.project_id)
+    project = live_project(db, payload.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     # Ensure assignee is project member if provided
@@ -71,10 +193,25 @@ def create_task(
 
     task = models.Task(**payload.model_dump())
     db.add(task)
+    db.flush()
+    dashboard.on_task_created(db, task)
+    change_log.record(db, task.project_id, change_log.tasks([task.id]))
+    feed = record_feed_event(
+        db,
+        kind="task_created",
+        project_id=task.project_id,
+        task_id=task.id,
+        actor_id=current_user.id,
+        recipients=task_recipients(db, task),
+    )
     db.commit()
     db.refresh(task)
+    record_activity(
+        [entry(user_id=current_user.id, project_id=task.project_id, task_id=task.id, action="task_created", new_value=task.name)]
+    )
     if background_tasks is not None:
         background_tasks.add_task(notify_project, task.project_id, "task_created")
+        background_tasks.add_task(notify_users, feed)
     return task
 
 
@@ -82,27 +219,44 @@ def create_task(
 def add_dependency(
     payload: schemas.DependencyCreate,
     db: Session = Depends(get_db),
-    _: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
 ):
     if payload.task_id == payload.depends_on_task_id:
         raise HTTPException(status_code=400, detail="Task cannot depend on itself")
 
-    # Ensure tasks exist and within same project
-    t = db.query(models.Task).get(payload.task_id)
-    d = db.query(models.Task).get(payload.depends_on_task_id)
+    # Ensure tasks exist and within same project; the project lock serializes the cycle check
+    t = live_task(db, payload.task_id, for_graph=True)
+    d = live_task(db, payload.depends_on_task_id)
     if not t or not d:
         raise HTTPException(status_code=404, detail="Task not found")
     if t.project_id != d.project_id:
         raise HTTPException(status_code=400, detail="Tasks must belong to the same project")
+    if reachability.reaches(db, t.id, d.id):
+        raise HTTPException(status_code=400, detail="Зависимость создаёт цикл")
 
     dep = models.TaskDependency(**payload.model_dump())
     db.add(dep)
     try:
+        db.flush()
+        reachability.on_edge_added(db, t.project_id, d.id, t.id)
+        readiness.on_edge_added(db, d.id, t.id)
+        change_log.record(db, t.project_id, change_log.dependencies([dep.id]) + change_log.tasks([t.id]))
         db.commit()
     except Exception:
         db.rollback()
         raise
     db.refresh(dep)
+    record_activity(
+        [
+            entry(
+                user_id=current_user.id,
+                project_id=t.project_id,
+                task_id=t.id,
+                action="dependency_added",
+                new_value=dep.depends_on_task_id,
+            )
+        ]
+    )
     return dep
 
 
@@ -124,7 +278,7 @@ def update_task(
     current_user: models.User = Depends(get_current_user),
     background_tasks: BackgroundTasks = None,
 ):
-    task = db.query(models.Task).get(task_id)
+    task = live_task(db, task_id, for_write=True)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     data = payload.model_dump(exclude_unset=True)
@@ -141,7 +295,7 @@ def update_task(
 
     # Managers must manage the project or be a member
     if not is_admin and current_user.role == models.UserRole.manager:
-        project = db.query(models.Project).get(task.project_id)
+        project = live_project(db, task.project_id)
         if not project or project.manager_id != current_user.id:
             is_member = (
                 db.query(models.ProjectMember)
@@ -169,15 +323,7 @@ def update_task(
     # unless all its predecessors are done (skip for admin)
     new_status = data.get("status")
     if not is_admin and new_status in {models.TaskStatus.in_progress, models.TaskStatus.review, models.TaskStatus.done}:
-        # Find predecessors
-        preds = (
-            db.query(models.Task)
-            .join(models.TaskDependency, models.TaskDependency.depends_on_task_id == models.Task.id)
-            .filter(models.TaskDependency.task_id == task_id)
-            .all()
-        )
-        not_done = [t.id for t in preds if t.status != models.TaskStatus.done]
-        if not_done:
+        if task.open_predecessors > 0:
             raise HTTPException(
                 status_code=400,
                 detail="Нельзя начать/завершить задачу, пока предшественники не выполнены",
@@ -190,22 +336,90 @@ def update_task(
             detail="Нельзя завершить задачу, которая не находится в статусе 'in_progress'",
         )
 
+    previous_assignee_id = task.assignee_id
+    changes = task_field_changes(task, data, current_user.id)
+    # Read from the row live_task locked, so a concurrent update of this task cannot apply the same delta
+    counted_before = dashboard.keys_for(task)
+    status_before = task.status
     for k, v in data.items():
         setattr(task, k, v)
     db.add(task)
+    dashboard.on_task_changed(db, task, counted_before)
+    released = readiness.on_status_changed(db, task.id, status_before, task.status)
+    change_log.record(db, task.project_id, change_log.tasks([task.id, *released]))
+    feed = record_feed_event(
+        db,
+        kind="task_updated",
+        project_id=task.project_id,
+        task_id=task.id,
+        actor_id=current_user.id,
+        recipients=task_recipients(db, task, extra=[previous_assignee_id]),
+    )
     db.commit()
     db.refresh(task)
+    record_activity(changes)
     if background_tasks is not None:
         background_tasks.add_task(notify_project, task.project_id, "task_updated")
+        background_tasks.add_task(notify_users, feed)
     return task
 
 
+@router.delete("/{task_id}")
+def delete_task(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+    background_tasks: BackgroundTasks = None,
+):
+    task = live_task(db, task_id, for_write=True)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if current_user.role != models.UserRole.admin:
+        project = live_project(db, task.project_id)
+        if not project or project.manager_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+    project_id, name = task.project_id, task.name
+    below = [tid for tid, _ in reachability.descendants(db, task.id)]
+    dep = models.TaskDependency
+    dependency_ids = [
+        did for (did,) in db.query(dep.id).filter((dep.task_id == task_id) | (dep.depends_on_task_id == task_id))
+    ]
+    dashboard.on_task_deleted(db, task)
+    released = readiness.on_task_deleted(db, task)
+    change_log.record(
+        db,
+        project_id,
+        change_log.tasks(released)
+        + change_log.dependencies(dependency_ids, change_log.DELETE)
+        + change_log.tasks([task_id], change_log.DELETE),
+    )
+    # Keep the task's history; the FK does the same on PostgreSQL, SQLite does not enforce it
+    db.query(models.ActivityLog).filter(models.ActivityLog.task_id == task_id).update(
+        {"task_id": None}, synchronize_session=False
+    )
+    db.delete(task)
+    db.flush()
+    reach = models.TaskReachability
+    db.query(reach).filter((reach.ancestor_id == task_id) | (reach.descendant_id == task_id)).delete(
+        synchronize_session=False
+    )
+    reachability.rebuild_below(db, project_id, below)
+    db.commit()
+    record_activity([entry(user_id=current_user.id, project_id=project_id, action="task_deleted", old_value=name)])
+    if background_tasks is not None:
+        background_tasks.add_task(notify_project, project_id, "task_deleted")
+    return {"status": "deleted"}
+
+
 @router.get("/{task_id}/dependencies", response_model=List[schemas.DependencyOut])
 def list_task_dependencies(
     task_id: int,
     db: Session = Depends(get_db),
     _: models.User = Depends(get_current_user),
 ):
+    if live_task(db, task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
     return (
         db.query(models.TaskDependency)
         .filter(models.TaskDependency.task_id == task_id)
@@ -214,6 +428,40 @@ def list_task_dependencies(
     )
 
 
+def _cone(db: Session, task_id: int, current_user: models.User, upstream: bool, max_depth: Optional[int]):
+    task = live_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not accessible_project_ids(db, current_user, [task.project_id]):
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return [
+        schemas.TaskConeItem(task_id=tid, depth=depth, name=name, status=status)
+        for tid, depth, name, status in reachability.cone(db, task_id, upstream, max_depth)
+    ]
+
+
+@router.get("/{task_id}/ancestors", response_model=List[schemas.TaskConeItem])
+def list_task_ancestors(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Everything the task transitively depends on, nearest first."""
+    return _cone(db, task_id, current_user, True, max_depth)
+
+
+@router.get("/{task_id}/descendants", response_model=List[schemas.TaskConeItem])
+def list_task_descendants(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Everything that transitively waits on the task, nearest first."""
+    return _cone(db, task_id, current_user, False, max_depth)
+
+
 class TaskDependenciesPayload(BaseModel):
     depends_on_task_ids: List[int]
 
@@ -223,10 +471,10 @@ def replace_task_dependencies(
     task_id: int,
     payload: TaskDependenciesPayload,
     db: Session = Depends(get_db),
-    _: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+    current_user: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
     background_tasks: BackgroundTasks = None,
 ):
-    task = db.query(models.Task).get(task_id)
+    task = live_task(db, task_id, for_graph=True)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     # Ensure all tasks exist and belong to same project
@@ -239,7 +487,17 @@ def replace_task_dependencies(
         )
         if count != len(set(payload.depends_on_task_ids)):
             raise HTTPException(status_code=400, detail="Invalid dependency tasks")
+        if reachability.reaches_any(db, task_id, payload.depends_on_task_ids):
+            raise HTTPException(status_code=400, detail="Зависимость создаёт цикл")
 
+    previous = db.query(models.TaskDependency.id, models.TaskDependency.depends_on_task_id).filter(
+        models.TaskDependency.task_id == task_id
+    )
+    previous_dependency_ids, previous_ids = [], []
+    for did, pid in previous:
+        previous_dependency_ids.append(did)
+        previous_ids.append(pid)
+    previous_ids.sort()
     # Remove previous deps
     db.query(models.TaskDependency).filter(models.TaskDependency.task_id == task_id).delete()
     db.flush()
@@ -251,49 +509,118 @@ def replace_task_dependencies(
         dep = models.TaskDependency(task_id=task_id, depends_on_task_id=pid)
         db.add(dep)
         new_deps.append(dep)
+    db.flush()
+    reachability.rebuild_below(db, task.project_id, [task_id])
+    readiness.on_edges_replaced(db, task_id, [d.depends_on_task_id for d in new_deps])
+    change_log.record(
+        db,
+        task.project_id,
+        change_log.dependencies(previous_dependency_ids, change_log.DELETE)
+        + change_log.dependencies([d.id for d in new_deps])
+        + change_log.tasks([task_id]),
+    )
     db.commit()
     for d in new_deps:
         db.refresh(d)
+    new_ids = sorted(d.depends_on_task_id for d in new_deps)
+    if new_ids != previous_ids:
+        record_activity(
+            [
+                entry(
+                    user_id=current_user.id,
+                    project_id=task.project_id,
+                    task_id=task.id,
+                    action="dependencies_replaced",
+                    old_value=",".join(map(str, previous_ids)),
+                    new_value=",".join(map(str, new_ids)),
+                )
+            ]
+        )
     if background_tasks is not None:
         background_tasks.add_task(notify_project, task.project_id, "deps_updated")
     return new_deps
 
 
-@router.get("/{task_id}/messages", response_model=List[schemas.TaskMessageOut])
+def _chat_task(
+    db: Session, task_id: int, current_user: models.User, for_write: bool = False
+) -> tuple[models.Task, int | None]:
+    """Load a task of a live project and check chat access in one query; returns (task, project manager_id).
+
+    ``for_write`` share-locks the project row like ``live_task`` does.
+    """
+
+    is_member = (
+        select(models.ProjectMember.id)
+        .where(models.ProjectMember.project_id == models.Task.project_id, models.ProjectMember.user_id == current_user.id)
+        .exists()
+    )
+    q = (
+        db.query(models.Task, models.Project.manager_id, is_member)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .filter(models.Task.id == task_id, models.Project.deleted_at.is_(None))
+    )
+    if for_write:
+        q = q.with_for_update(read=True, of=models.Project)
+    row = q.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task, manager_id, member = row
+    if current_user.role != models.UserRole.admin:
+        allowed = (
+            manager_id == current_user.id
+            # allow project managers who are members even if not manager_id
+            or (current_user.role == models.UserRole.manager and member)
+            or task.assignee_id == current_user.id
+        )
+        if not allowed:
+            raise HTTPException(status_code=403, detail="Нет доступа к чату задачи")
+    return task, manager_id
+
+
+@router.get("/{task_id}/messages", response_model=schemas.TaskMessagePage)
 def list_task_messages(
     task_id: int,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    task = db.query(models.Task).get(task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if current_user.role != models.UserRole.admin:
-        project = db.query(models.Project).get(task.project_id)
-        allowed = False
-        if project and project.manager_id == current_user.id:
-            allowed = True
-        # allow project managers who are members even if not manager_id
-        if current_user.role == models.UserRole.manager and not allowed:
-            is_member = (
-                db.query(models.ProjectMember)
-                .filter(models.ProjectMember.project_id == task.project_id, models.ProjectMember.user_id == current_user.id)
-                .first()
-                is not None
-            )
-            if is_member:
-                allowed = True
-        if task.assignee_id == current_user.id:
-            allowed = True
-        if not allowed:
-            raise HTTPException(status_code=403, detail="Нет доступа к чату задачи")
-    msgs = (
+    """Chat history newest-first, keyset-paged on (created_at, id).
+
+    ``cursor`` pages back through older messages; ``since`` returns only
+    messages newer than a previous ``latest_cursor``. If more than ``limit``
+    are new, the page holds the oldest of them and ``has_more`` is set, so
+    repeating with the new ``latest_cursor`` catches up.
+    """
+
+    _chat_task(db, task_id, current_user)
+    key = tuple_(models.TaskMessage.created_at, models.TaskMessage.id)
+    q = (
         db.query(models.TaskMessage)
+        .options(joinedload(models.TaskMessage.author))
         .filter(models.TaskMessage.task_id == task_id)
-        .order_by(models.TaskMessage.created_at.asc())
-        .all()
     )
-    return msgs
+    try:
+        if since:
+            q = q.filter(key > tuple_(*decode_cursor(since, parse_datetime, int)))
+            rows = q.order_by(models.TaskMessage.created_at.asc(), models.TaskMessage.id.asc()).limit(limit + 1).all()
+            items, has_more = split_page(rows, limit)
+            items.reverse()
+        else:
+            if cursor:
+                q = q.filter(key < tuple_(*decode_cursor(cursor, parse_datetime, int)))
+            rows = q.order_by(models.TaskMessage.created_at.desc(), models.TaskMessage.id.desc()).limit(limit + 1).all()
+            items, has_more = split_page(rows, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if items:
+        latest = encode_cursor(items[0].created_at, items[0].id)
+    else:
+        latest = since
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if has_more and not since else None
+    return schemas.TaskMessagePage(items=items, next_cursor=next_cursor, latest_cursor=latest, has_more=has_more)
 
 
 @router.post("/{task_id}/messages", response_model=schemas.TaskMessageOut)
@@ -304,35 +631,55 @@ def send_task_message(
     current_user: models.User = Depends(get_current_user),
     background_tasks: BackgroundTasks = None,
 ):
-    task = db.query(models.Task).get(task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if current_user.role != models.UserRole.admin:
-        project = db.query(models.Project).get(task.project_id)
-        allowed = False
-        if project and project.manager_id == current_user.id:
-            allowed = True
-        # allow project managers who are members even if not manager_id
-        if current_user.role == models.UserRole.manager and not allowed:
-            is_member = (
-                db.query(models.ProjectMember)
-                .filter(models.ProjectMember.project_id == task.project_id, models.ProjectMember.user_id == current_user.id)
-                .first()
-                is not None
-            )
-            if is_member:
-                allowed = True
-        if task.assignee_id == current_user.id:
-            allowed = True
-        if not allowed:
-            raise HTTPException(status_code=403, detail="Нет доступа к чату задачи")
+    task, manager_id = _chat_task(db, task_id, current_user, for_write=True)
     msg = models.TaskMessage(task_id=task_id, author_id=current_user.id, content=payload.content)
     db.add(msg)
+    db.flush()
+    participants = task_recipients(db, task, manager_id=manager_id)
+    chat_unread.on_message(db, msg, participants)
+    feed = record_feed_event(
+        db,
+        kind="message",
+        project_id=task.project_id,
+        task_id=task.id,
+        actor_id=current_user.id,
+        recipients=participants,
+    )
     db.commit()
     db.refresh(msg)
     if background_tasks is not None:
         background_tasks.add_task(notify_project, task.project_id, "message")
+        background_tasks.add_task(notify_users, feed)
     return msg
 
 
+@router.post("/{task_id}/messages/read")
+def mark_task_messages_read(
+    task_id: int,
+    payload: schemas.TaskChatReadCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    _chat_task(db, task_id, current_user, for_write=True)
+    message = db.get(models.TaskMessage, payload.last_message_id)
+    if message is None or message.task_id != task_id:
+        raise HTTPException(status_code=400, detail="Message not found in this chat")
+    marker = chat_unread.read_up_to(db, current_user.id, message)
+    db.commit()
+    return {
+        "status": "ok",
+        "last_read_message_id": marker.last_read_message_id,
+        "unread_count": marker.unread_count,
+    }
+
 
+@router.get("/chats/unread", response_model=List[schemas.ChatUnreadOut])
+def list_unread_chats(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Unread message counts for every task chat of the caller that has any."""
+    return [
+        schemas.ChatUnreadOut(task_id=task_id, project_id=project_id, unread_count=count, last_read_at=read_at)
+        for task_id, project_id, count, read_at in chat_unread.unread_for_user(db, current_user.id)
+    ]
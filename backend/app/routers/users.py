@@ -1,12 +1,16 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from .. import models, schemas
 from ..auth import require_roles, get_password_hash, get_current_user
 from ..db import get_db
 from ..services.demo import ensure_user_in_demo_project
+from ..services.provisioning import BATCH_SIZE, iter_lines, parse_rows, provision_batch
+from ..services.user_index import user_index
 
 
 router = APIRouter()
@@ -38,10 +42,49 @@ def create_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    user_index.upsert(user)
     ensure_user_in_demo_project(db, user)
     return user
 
 
+@router.post("/bulk")
+async def bulk_provision_users(
+    request: Request,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_roles(models.UserRole.admin)),
+):
+    """Create users and memberships from a streamed CSV (``text/csv``) or NDJSON body.
+
+    Rows are processed in batches of ``BATCH_SIZE``; each batch is hashed in
+    parallel and inserted with a couple of statements. Rejected rows are
+    reported individually and do not abort the import.
+    """
+
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    created: List[dict] = []
+    errors: List[dict] = []
+    batch: List[tuple] = []
+
+    async def flush() -> None:
+        done, failed = await run_in_threadpool(provision_batch, db, batch)
+        created.extend(done)
+        errors.extend(failed)
+        batch.clear()
+
+    async for row_no, row, error in parse_rows(iter_lines(request.stream()), fmt):
+        if error is not None:
+            errors.append({"row": row_no, "email": None, "error": error})
+            continue
+        batch.append((row_no, row))
+        if len(batch) >= BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    errors.sort(key=lambda e: e["row"])
+    return {"created": created, "errors": errors}
+
+
 @router.patch("/{user_id}", response_model=schemas.UserOut)
 def update_user(
     user_id: int,
@@ -60,6 +103,7 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    user_index.upsert(user)
     return user
 
 
@@ -74,6 +118,7 @@ def delete_user(
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     db.delete(user)
     db.commit()
+    user_index.remove(user_id)
     return {"status": "ok"}
 
 
@@ -93,23 +138,24 @@ def update_me(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    user_index.upsert(current_user)
     return current_user
 
 
 @router.get("/search")
-def search_users(q: str, db: Session = Depends(get_db), _: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager))):
-    ql = f"%{q.lower()}%"
-    users = (
-        db.query(models.User)
-        .filter((models.User.email.ilike(ql)) | (models.User.full_name.ilike(ql)) | (models.User.nickname.ilike(ql)))
-        .order_by(models.User.id)
-        .limit(20)
-        .all()
+def search_users(
+    q: str,
+    project_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_roles(models.UserRole.admin, models.UserRole.manager)),
+):
+    if user_index.is_stale():
+        user_index.load(db)
+    # Members of the given project are listed first
+    preferred = (
+        set(db.execute(select(models.ProjectMember.user_id).where(models.ProjectMember.project_id == project_id)).scalars())
+        if project_id is not None
+        else None
     )
     # return minimal public fields
-    return [
-        {"id": u.id, "email": u.email, "full_name": u.full_name, "nickname": u.nickname, "role": u.role}
-        for u in users
-    ]
-
-
+    return user_index.search(q, limit=20, preferred=preferred)
@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 from pydantic import BaseModel
 
@@ -47,10 +47,12 @@ class UserRegister(BaseModel):
 class ProjectCreate(BaseModel):
     name: str
     description: Optional[str] = None
+    start_date: Optional[date] = None
     deadline: Optional[date] = None
     customer: Optional[str] = None
     manager_id: Optional[int] = None
     budget_plan: Optional[float] = None
+    is_template: bool = False
 
 
 class ProjectOut(ProjectCreate):
@@ -65,10 +67,28 @@ class ProjectOut(ProjectCreate):
 class ProjectUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    start_date: Optional[date] = None
     deadline: Optional[date] = None
     customer: Optional[str] = None
     manager_id: Optional[int] = None
     budget_plan: Optional[float] = None
+    is_template: Optional[bool] = None
+
+
+class ProjectClone(BaseModel):
+    name: str
+    # Unset fields are copied from the source project
+    description: Optional[str] = None
+    customer: Optional[str] = None
+    manager_id: Optional[int] = None
+    # Deadlines move by the distance between this date and the source's start
+    start_date: Optional[date] = None
+    # Source user id -> new user id (null unassigns); applied to assignees and members
+    assignee_map: Dict[int, Optional[int]] = {}
+    keep_unmapped_assignees: bool = True
+    copy_members: bool = True
+    reset_status: bool = True
+    is_template: bool = False
 
 
 class TaskCreate(BaseModel):
@@ -84,6 +104,8 @@ class TaskCreate(BaseModel):
 
 class TaskOut(TaskCreate):
     id: int
+    # Direct predecessors that are not done yet; 0 means the task can be started
+    open_predecessors: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -91,6 +113,20 @@ class TaskOut(TaskCreate):
         from_attributes = True
 
 
+class MyTaskOut(TaskOut):
+    project_name: str
+
+
+class MyTaskPage(BaseModel):
+    items: List[MyTaskOut]
+    next_cursor: Optional[str] = None
+
+
+class TaskPage(BaseModel):
+    items: List[TaskOut]
+    next_cursor: Optional[str] = None
+
+
 class DependencyCreate(BaseModel):
     task_id: int
     depends_on_task_id: int
@@ -104,6 +140,14 @@ class DependencyOut(DependencyCreate):
         from_attributes = True
 
 
+class TaskConeItem(BaseModel):
+    task_id: int
+    # 1 for direct predecessors/successors
+    depth: int
+    name: str
+    status: TaskStatus
+
+
 class ProjectMemberOut(BaseModel):
     id: int
     project_id: int
@@ -128,10 +172,197 @@ class TaskMessageOut(BaseModel):
         from_attributes = True
 
 
+class TaskMessagePage(BaseModel):
+    items: List[TaskMessageOut]
+    # Pass as ``cursor`` to fetch older messages
+    next_cursor: Optional[str] = None
+    # Pass as ``since`` to fetch only messages newer than this page
+    latest_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class ChatUnreadOut(BaseModel):
+    task_id: int
+    project_id: int
+    unread_count: int
+    last_read_at: Optional[datetime] = None
+
+
 class TaskMessageCreate(BaseModel):
     content: str
 
 
+class TaskChatReadCreate(BaseModel):
+    # Newest message the client has shown; later ones stay unread
+    last_message_id: int
+
+
+class NotificationOut(BaseModel):
+    id: int
+    project_id: int
+    task_id: Optional[int] = None
+    actor_id: Optional[int] = None
+    kind: str
+    created_at: datetime
+    read_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationsRead(BaseModel):
+    ids: Optional[List[int]] = None
+
+
+class ActivityOut(BaseModel):
+    id: int
+    project_id: int
+    task_id: Optional[int] = None
+    user_id: int
+    action: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ActivityPage(BaseModel):
+    items: List[ActivityOut]
+    next_cursor: Optional[str] = None
+
+
+class ActivityDailyOut(BaseModel):
+    day: date
+    action: str
+    count: int
+
+
+class ProjectSummary(BaseModel):
+    project_id: int
+    total: int
+    overdue: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    # Keyed by user id, "none" for unassigned tasks
+    by_assignee: Dict[str, int]
+
+
+class ProjectChanges(BaseModel):
+    project_id: int
+    # Pass as ``since`` next time
+    seq: int
+    # The client is too far behind (or ahead); reload everything and continue from ``seq``
+    reset: bool = False
+    # More changes follow; call again with the new ``seq``
+    has_more: bool = False
+    project: Optional[ProjectOut] = None
+    tasks: List[TaskOut] = []
+    dependencies: List[DependencyOut] = []
+    members: List[ProjectMemberOut] = []
+    deleted_task_ids: List[int] = []
+    deleted_dependency_ids: List[int] = []
+    removed_member_user_ids: List[int] = []
+
+
+class ProjectPurgeOut(BaseModel):
+    project_id: int
+    project_name: str
+    # pending | running | done | failed
+    status: str
+    total_tasks: int
+    deleted_tasks: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GanttBar(BaseModel):
+    row: int
+    id: int
+    name: str
+    assignee_id: Optional[int] = None
+    status: TaskStatus
+    duration: int
+    slack: int
+    is_critical: bool
+    # ``end`` and ``late_end`` are exclusive: a one-day task ends the day after it starts
+    start: date
+    end: date
+    late_start: date
+    late_end: date
+    deadline: Optional[date] = None
+
+
+class GanttLane(BaseModel):
+    assignee_id: Optional[int] = None
+    name: str
+    # Position of the lane in the full (unwindowed) row order
+    first_row: int
+    row_count: int
+
+
+class GanttChart(BaseModel):
+    project_id: int
+    start_date: date
+    finish_date: date
+    duration: int
+    working_days: bool
+    total_rows: int
+    offset: int
+    lanes: List[GanttLane]
+    rows: List[GanttBar]
+    # Dependencies between rows of this page, as (predecessor, successor)
+    edges: List[Tuple[int, int]]
+
+
+class SnapshotCreate(BaseModel):
+    label: Optional[str] = None
+
+
+class SnapshotOut(BaseModel):
+    id: int
+    project_id: int
+    kind: str
+    label: Optional[str] = None
+    created_by: Optional[int] = None
+    task_count: int
+    duration: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SnapshotTaskChange(BaseModel):
+    task_id: int
+    es_delta: int
+    ef_delta: int
+    slack_delta: int
+    was_critical: bool
+    is_critical: bool
+
+
+class SnapshotDiff(BaseModel):
+    base_id: int
+    # None when compared against the live schedule
+    target_id: Optional[int] = None
+    base_duration: int
+    target_duration: int
+    duration_delta: int
+    base_critical_path: List[int]
+    target_critical_path: List[int]
+    added: List[int]
+    removed: List[int]
+    changed_count: int
+    changed: List[SnapshotTaskChange]
+
+
 class GraphNode(BaseModel):
     id: int
     name: str
@@ -152,12 +383,26 @@ class GraphEdge(BaseModel):
     redundant: bool = False
 
 
+class GraphNodePosition(BaseModel):
+    id: int
+    layer: int
+    # Node centre
+    x: float
+    y: float
+
+
+class GraphLayout(BaseModel):
+    version: str
+    nodes: List[GraphNodePosition]
+
+
 class GraphAnalysis(BaseModel):
     project_id: int
     duration: int
     critical_path: List[int]
     nodes: List[GraphNode]
     edges: List[GraphEdge]
+    layout: Optional[GraphLayout] = None
 
 
 
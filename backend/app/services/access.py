@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def live_project(db: Session, project_id: int) -> Optional[models.Project]:
+    """The project unless it does not exist or its deletion has been requested."""
+
+    project = db.get(models.Project, project_id)
+    if project is None or project.deleted_at is not None:
+        return None
+    return project
+
+
+def live_task(
+    db: Session, task_id: int, *, for_write: bool = False, for_graph: bool = False
+) -> Optional[models.Task]:
+    """The task unless it does not exist or its project's deletion has been requested.
+
+    With ``for_write`` the project row is share-locked until commit (PostgreSQL):
+    a deletion request updates that row, so it waits for the write to finish and
+    the background purge never runs concurrently with it. The task row itself
+    is then locked ``FOR UPDATE`` and re-read, so checks and deltas computed
+    from its current values (status transitions, dashboard counters) cannot
+    interleave with another write to the same task.
+
+    ``for_graph`` (implies ``for_write``) takes the project row exclusively
+    instead, for routes that add dependency edges: their cycle check reads the
+    whole project's graph, so two of them must not check and insert in
+    parallel (A→B and B→A would each pass). Other writes to the project wait
+    for the short edge transaction too. The lock is taken in the first
+    statement; upgrading a share lock held by two transactions would deadlock.
+    """
+
+    for_write = for_write or for_graph
+    q = (
+        db.query(models.Task, models.Project.deleted_at)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .filter(models.Task.id == task_id)
+    )
+    if for_graph:
+        q = q.with_for_update(key_share=True, of=models.Project)
+    elif for_write:
+        q = q.with_for_update(read=True, of=models.Project)
+    row = q.first()
+    if row is None or row[1] is not None:
+        return None
+    if for_write:
+        return (
+            db.query(models.Task)
+            .filter(models.Task.id == task_id)
+            .with_for_update(of=models.Task)
+            .populate_existing()
+            .one()
+        )
+    return row[0]
+
+
+def accessible_project_ids(
+    db: Session,
+    user: models.User,
+    project_ids: Optional[Iterable[int]] = None,
+) -> Set[int]:
+    """Return ids of projects the user may read, optionally restricted to ``project_ids``.
+
+    Mirrors the per-route rules: admins see everything, managers see projects they
+    manage or belong to, executors see projects they belong to. Runs as one query
+    regardless of how many ids are checked.
+    """
+
+    wanted = None if project_ids is None else {int(pid) for pid in project_ids}
+    if wanted is not None and not wanted:
+        return set()
+
+    q = db.query(models.Project.id).filter(models.Project.deleted_at.is_(None))
+    if wanted is not None:
+        q = q.filter(models.Project.id.in_(wanted))
+
+    if user.role == models.UserRole.admin:
+        return {pid for (pid,) in q}
+
+    member_q = db.query(models.ProjectMember.project_id).filter(models.ProjectMember.user_id == user.id)
+    if user.role == models.UserRole.manager:
+        q = q.filter((models.Project.manager_id == user.id) | models.Project.id.in_(member_q))
+    else:
+        q = q.filter(models.Project.id.in_(member_q))
+    return {pid for (pid,) in q}
+
+
+def project_access_filter(user: models.User):
+    """SQL condition on ``models.Project`` with the same rules, for use inside a larger query."""
+
+    live = models.Project.deleted_at.is_(None)
+    if user.role == models.UserRole.admin:
+        return live
+    is_member = (
+        select(models.ProjectMember.id)
+        .where(models.ProjectMember.project_id == models.Project.id, models.ProjectMember.user_id == user.id)
+        .exists()
+    )
+    if user.role == models.UserRole.manager:
+        return and_(live, or_(models.Project.manager_id == user.id, is_member))
+    return and_(live, is_member)
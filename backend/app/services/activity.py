@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..db import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS = int(os.getenv("ACTIVITY_FLUSH_ROWS", "200"))
+FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_FLUSH_INTERVAL_MS", "500"))
+MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "50000"))
+
+TRACKED_TASK_FIELDS = ("name", "description", "assignee_id", "status", "priority", "duration_plan", "deadline")
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def entry(
+    *,
+    user_id: int,
+    project_id: int,
+    action: str,
+    task_id: Optional[int] = None,
+    old_value: Any = None,
+    new_value: Any = None,
+) -> dict:
+    return {
+        "user_id": user_id,
+        "project_id": project_id,
+        "task_id": task_id,
+        "action": action,
+        "old_value": _text(old_value),
+        "new_value": _text(new_value),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def task_field_changes(task: models.Task, data: Dict[str, Any], user_id: int) -> List[dict]:
+    """One ``field:<name>`` entry per tracked field whose value actually changes."""
+
+    changes = []
+    for field in TRACKED_TASK_FIELDS:
+        if field not in data:
+            continue
+        old, new = getattr(task, field), data[field]
+        if _text(old) == _text(new):
+            continue
+        changes.append(
+            entry(user_id=user_id, project_id=task.project_id, task_id=task.id, action=f"field:{field}", old_value=old, new_value=new)
+        )
+    return changes
+
+
+class ActivityWriter:
+    """Buffers activity rows in memory and writes them in bulk from a background thread.
+
+    Routes call ``enqueue`` after their own commit, which only appends to a
+    deque. The writer flushes when ``max_rows`` rows are pending or every
+    ``interval_ms``, whichever comes first, with a single executemany INSERT.
+    ``stop`` drains the buffer, so shutdown does not lose entries.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_rows: int = FLUSH_ROWS,
+        interval_ms: int = FLUSH_INTERVAL_MS,
+        max_pending: int = MAX_PENDING,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_rows = max_rows
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+        self._buffer: Deque[Tuple[float, dict]] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "flush_seconds": 0.0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def enqueue(self, rows: Iterable[dict]) -> None:
+        now = time.monotonic()
+        with self._cond:
+            for row in rows:
+                if len(self._buffer) >= self.max_pending:
+                    self._stats["dropped"] += 1
+                    continue
+                self._buffer.append((now, row))
+                self._stats["enqueued"] += 1
+            if len(self._buffer) >= self.max_rows:
+                self._cond.notify()
+
+    def _take(self) -> List[Tuple[float, dict]]:
+        batch = list(self._buffer)
+        self._buffer.clear()
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or len(self._buffer) >= self.max_rows, timeout=self.interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written."""
+
+        with self._flush_lock:
+            with self._cond:
+                batch = self._take()
+            if not batch:
+                return 0
+            started = time.monotonic()
+            db = self._session_factory()
+            rows = [row for _, row in batch]
+            try:
+                try:
+                    db.execute(insert(models.ActivityLog), rows)
+                    db.commit()
+                except IntegrityError:
+                    # A task or project was deleted while its entries were queued
+                    db.rollback()
+                    rows = _without_orphans(db, rows)
+                    if rows:
+                        db.execute(insert(models.ActivityLog), rows)
+                        db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to write %d activity rows", len(batch))
+                with self._cond:
+                    self._stats["failed"] += len(batch)
+                return 0
+            finally:
+                db.close()
+            finished = time.monotonic()
+            lag_ms = (finished - batch[0][0]) * 1000
+            with self._cond:
+                self._stats["written"] += len(rows)
+                self._stats["dropped"] += len(batch) - len(rows)
+                self._stats["flushes"] += 1
+                self._stats["flush_seconds"] += finished - started
+                self._stats["last_lag_ms"] = lag_ms
+                self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], lag_ms)
+            return len(rows)
+
+    def stats(self) -> dict:
+        with self._cond:
+            data = dict(self._stats)
+            data["pending"] = len(self._buffer)
+        data["running"] = self._thread is not None
+        return data
+
+
+def _without_orphans(db: Session, rows: List[dict]) -> List[dict]:
+    """Drop rows of deleted projects and detach rows from deleted tasks."""
+
+    project_ids = {row["project_id"] for row in rows}
+    task_ids = {row["task_id"] for row in rows if row.get("task_id") is not None}
+    live_projects = set(
+        db.execute(select(models.Project.id).where(models.Project.id.in_(project_ids))).scalars()
+    )
+    live_tasks = set(db.execute(select(models.Task.id).where(models.Task.id.in_(task_ids))).scalars()) if task_ids else set()
+    kept = []
+    for row in rows:
+        if row["project_id"] not in live_projects:
+            continue
+        if row.get("task_id") is not None and row["task_id"] not in live_tasks:
+            row = {**row, "task_id": None}
+        kept.append(row)
+    return kept
+
+
+activity_writer = ActivityWriter()
+
+
+def record_activity(rows: Iterable[dict]) -> None:
+    activity_writer.enqueue(rows)
@@ -0,0 +1,217 @@
+"""Activity log storage: monthly partitions on PostgreSQL and the retention roll-up.
+
+Run the retention job from cron, e.g. nightly::
+
+    python -m app.services.activity_retention --keep-days 180
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+logger = logging.getLogger(__name__)
+
+KEEP_DAYS = int(os.getenv("ACTIVITY_KEEP_DAYS", "180"))
+MONTHS_AHEAD = 3
+
+_PARTITIONED_DDL = """
+CREATE TABLE IF NOT EXISTS activity_log (
+    id SERIAL,
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    task_id INTEGER REFERENCES tasks(id) ON DELETE SET NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    action VARCHAR(100) NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_name(month: date) -> str:
+    return f"activity_log_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(
+        conn.exec_driver_sql(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'activity_log'"
+        ).first()
+    )
+
+
+def _create_partition(conn: Connection, month: date) -> None:
+    name = _partition_name(month)
+    if conn.exec_driver_sql("SELECT to_regclass(%(name)s)", {"name": name}).scalar() is not None:
+        return
+    nxt = _next_month(month)
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+    has_default = conn.exec_driver_sql("SELECT to_regclass('activity_log_default')").scalar() is not None
+    if has_default:
+        # Hold off writers to the default partition until the month has moved out of it
+        conn.exec_driver_sql("LOCK TABLE activity_log_default IN EXCLUSIVE MODE")
+        period = {"start": month, "end": nxt}
+        stray = conn.exec_driver_sql(
+            "SELECT 1 FROM activity_log_default WHERE created_at >= %(start)s AND created_at < %(end)s LIMIT 1",
+            period,
+        ).first()
+        if stray:
+            # The month was written before its partition existed; CREATE ... PARTITION OF
+            # would fail on those rows, so build the table, move them in, then attach it
+            conn.exec_driver_sql(f"CREATE TABLE {name} (LIKE activity_log INCLUDING DEFAULTS)")
+            moved = conn.exec_driver_sql(
+                f"WITH moved AS (DELETE FROM activity_log_default "
+                f"WHERE created_at >= %(start)s AND created_at < %(end)s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                period,
+            ).rowcount
+            conn.exec_driver_sql(f"ALTER TABLE activity_log ATTACH PARTITION {name} {bounds}")
+            logger.warning("Moved %d activity rows from activity_log_default into %s", moved, name)
+            return
+    conn.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF activity_log {bounds}")
+
+
+def ensure_partitions(conn: Connection, today: Optional[date] = None, months_ahead: int = MONTHS_AHEAD) -> None:
+    """Create monthly partitions from the current month up to ``months_ahead`` ahead.
+
+    Rows that reached the default partition because their month had no
+    partition yet are moved into the new one.
+    """
+
+    month = _month_start(today or date.today())
+    for _ in range(months_ahead + 1):
+        _create_partition(conn, month)
+        month = _next_month(month)
+    # Catches rows outside the prepared range instead of failing the insert
+    conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS activity_log_default PARTITION OF activity_log DEFAULT")
+
+
+def ensure_indexes(conn: Connection) -> None:
+    for index in models.ActivityLog.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def create_partitioned_activity_log(engine: Engine) -> None:
+    """Create activity_log as a partitioned table; called by init_db on PostgreSQL."""
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(_PARTITIONED_DDL)
+        if is_partitioned(conn):
+            ensure_partitions(conn)
+        ensure_indexes(conn)
+
+
+def day_expr(dialect: str):
+    if dialect == "sqlite":
+        return func.date(models.ActivityLog.created_at)
+    return cast(models.ActivityLog.created_at, Date)
+
+
+def _summarize(db: Session, day, condition) -> None:
+    log = models.ActivityLog
+    summary = (
+        select(log.project_id, log.task_id, log.user_id, day, log.action, func.count())
+        .where(condition)
+        .group_by(log.project_id, log.task_id, log.user_id, day, log.action)
+    )
+    db.execute(
+        insert(models.ActivityDailySummary).from_select(
+            ["project_id", "task_id", "user_id", "day", "action", "count"], summary
+        )
+    )
+
+
+def _old_partitions(conn: Connection, cutoff: date) -> List[tuple]:
+    """(name, month) of monthly partitions that end on or before ``cutoff``."""
+
+    rows = conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'activity_log'"
+    )
+    out = []
+    for (name,) in rows:
+        if not name.startswith("activity_log_y"):
+            continue
+        month = date(int(name[14:18]), int(name[19:21]), 1)
+        if _next_month(month) <= cutoff:
+            out.append((name, month))
+    return sorted(out, key=lambda item: item[1])
+
+
+def roll_up(db: Session, keep_days: int = KEEP_DAYS, now: Optional[datetime] = None) -> dict:
+    """Replace activity rows older than ``keep_days`` with per-day summaries.
+
+    On partitioned PostgreSQL, each whole month past the cutoff is summarized
+    and its partition dropped in one transaction. Remaining old rows are
+    handled one day at a time (summary insert plus delete per transaction), so
+    the job can be interrupted and rerun without double counting.
+    """
+
+    dialect = db.get_bind().dialect.name
+    cutoff = datetime.combine((now or datetime.utcnow()).date() - timedelta(days=keep_days), time.min)
+    log = models.ActivityLog
+    day = day_expr(dialect)
+
+    dropped: List[str] = []
+    if dialect == "postgresql" and is_partitioned(db.connection()):
+        for name, month in _old_partitions(db.connection(), cutoff.date()):
+            start, end = datetime.combine(month, time.min), datetime.combine(_next_month(month), time.min)
+            _summarize(db, day, (log.created_at >= start) & (log.created_at < end))
+            db.connection().exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+            db.commit()
+            dropped.append(name)
+        ensure_partitions(db.connection())
+        db.commit()
+
+    days = [d for (d,) in db.execute(select(day).where(log.created_at < cutoff).group_by(day).order_by(day))]
+    rolled_rows = 0
+    for d in days:
+        start = datetime.combine(d if isinstance(d, date) else date.fromisoformat(d), time.min)
+        in_day = (log.created_at >= start) & (log.created_at < start + timedelta(days=1))
+        _summarize(db, day, in_day)
+        rolled_rows += db.execute(delete(log).where(in_day)).rowcount or 0
+        db.commit()
+
+    result = {"cutoff": cutoff.isoformat(), "days": len(days), "rows": rolled_rows, "dropped_partitions": dropped}
+    logger.info("Activity retention: %s", result)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Roll old activity_log rows into daily summaries")
+    parser.add_argument("--keep-days", type=int, default=KEEP_DAYS)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(roll_up(db, keep_days=args.keep_days))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Per-project change log for delta sync ("what changed since sequence N").
+
+Every mutation in the tasks and projects routers appends (entity, id, op)
+rows to ``project_changes`` in its own transaction. Sequence numbers come
+from ``project_change_heads``, whose row per project is bumped with an
+upsert; the row lock it takes on PostgreSQL orders concurrent writers of one
+project, so sequences become visible in commit order. Readers ask for
+everything after the last sequence they saw and get the current state of
+the changed rows plus tombstones for deleted ones.
+
+Compaction keeps only the newest row per entity (older rows carry no extra
+information for a delta) and drops tombstones past the retention period,
+raising the project's floor: clients behind the floor must reload. Run it
+from cron::
+
+    python -m app.services.change_log --retention-days 30
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload
+
+from .. import models, schemas
+
+
+TASK = "task"
+DEPENDENCY = "dependency"
+MEMBER = "member"
+PROJECT = "project"
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+Change = Tuple[str, int, str]
+
+
+def _insert_head(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(models.ProjectChangeHead)
+    return sqlite.insert(models.ProjectChangeHead)
+
+
+def _reserve(db: Session, project_id: int, count: int) -> int:
+    """Reserve ``count`` sequence numbers; returns the last one."""
+
+    head = models.ProjectChangeHead
+    stmt = _insert_head(db).values(project_id=project_id, last_seq=count, floor_seq=0)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id"], set_={"last_seq": head.last_seq + count}
+    ).returning(head.last_seq)
+    return db.execute(stmt).scalar_one()
+
+
+def record(db: Session, project_id: int, changes: Iterable[Change]) -> int:
+    """Append changes in the caller's transaction; returns the project's new sequence.
+
+    Repeated (entity, id) pairs collapse to their last operation.
+    """
+
+    latest: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+    for entity, entity_id, op in changes:
+        latest.pop((entity, entity_id), None)
+        latest[(entity, entity_id)] = op
+    if not latest:
+        return 0
+    last = _reserve(db, project_id, len(latest))
+    first = last - len(latest) + 1
+    now = datetime.utcnow()
+    db.execute(
+        models.ProjectChange.__table__.insert(),
+        [
+            {"project_id": project_id, "seq": first + i, "entity": entity, "entity_id": entity_id, "op": op, "created_at": now}
+            for i, ((entity, entity_id), op) in enumerate(latest.items())
+        ],
+    )
+    return last
+
+
+def tasks(task_ids: Iterable[int], op: str = UPSERT) -> List[Change]:
+    return [(TASK, tid, op) for tid in task_ids]
+
+
+def dependencies(dependency_ids: Iterable[int], op: str = UPSERT) -> List[Change]:
+    return [(DEPENDENCY, did, op) for did in dependency_ids]
+
+
+def head(db: Session, project_id: int) -> Tuple[int, int]:
+    """(last_seq, floor_seq) of the project; (0, 0) before its first change."""
+
+    row = db.execute(
+        select(models.ProjectChangeHead.last_seq, models.ProjectChangeHead.floor_seq).where(
+            models.ProjectChangeHead.project_id == project_id
+        )
+    ).first()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def changes_since(db: Session, project_id: int, since: int, limit: int) -> schemas.ProjectChanges:
+    last_seq, floor_seq = head(db, project_id)
+    if since < floor_seq or since > last_seq:
+        # Behind the compacted floor, or ahead of a log that was reset: reload from scratch
+        return schemas.ProjectChanges(project_id=project_id, seq=last_seq, reset=True)
+
+    change = models.ProjectChange
+    rows = db.execute(
+        select(change.seq, change.entity, change.entity_id, change.op)
+        .where(change.project_id == project_id, change.seq > since)
+        .order_by(change.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    seq = rows[-1].seq if has_more else max(last_seq, since)
+
+    latest: Dict[Tuple[str, int], str] = {}
+    for row in rows:
+        latest[(row.entity, row.entity_id)] = row.op
+    changed: Dict[str, List[int]] = {TASK: [], DEPENDENCY: [], MEMBER: [], PROJECT: []}
+    deleted: Dict[str, List[int]] = {TASK: [], DEPENDENCY: [], MEMBER: []}
+    for (entity, entity_id), op in latest.items():
+        (deleted if op == DELETE else changed)[entity].append(entity_id)
+
+    out = schemas.ProjectChanges(
+        project_id=project_id,
+        seq=seq,
+        has_more=has_more,
+        deleted_task_ids=sorted(deleted[TASK]),
+        deleted_dependency_ids=sorted(deleted[DEPENDENCY]),
+        removed_member_user_ids=sorted(deleted[MEMBER]),
+    )
+    if changed[PROJECT]:
+        project = db.query(models.Project).get(project_id)
+        out.project = schemas.ProjectOut.model_validate(project) if project else None
+    if changed[TASK]:
+        rows = db.query(models.Task).filter(models.Task.id.in_(changed[TASK])).order_by(models.Task.id)
+        out.tasks = [schemas.TaskOut.model_validate(t) for t in rows]
+    if changed[DEPENDENCY]:
+        rows = (
+            db.query(models.TaskDependency)
+            .filter(models.TaskDependency.id.in_(changed[DEPENDENCY]))
+            .order_by(models.TaskDependency.id)
+        )
+        out.dependencies = [schemas.DependencyOut.model_validate(d) for d in rows]
+    if changed[MEMBER]:
+        rows = (
+            db.query(models.ProjectMember)
+            .options(joinedload(models.ProjectMember.user))
+            .filter(models.ProjectMember.project_id == project_id, models.ProjectMember.user_id.in_(changed[MEMBER]))
+            .order_by(models.ProjectMember.id)
+        )
+        out.members = [schemas.ProjectMemberOut.model_validate(m) for m in rows]
+    return out
+
+
+def compact(db: Session, retention: timedelta, project_id: Optional[int] = None) -> int:
+    """Drop superseded rows and expired tombstones; returns the number of rows removed."""
+
+    change, head_ = models.ProjectChange, models.ProjectChangeHead
+    newest = select(func.max(change.id)).group_by(change.project_id, change.entity, change.entity_id)
+    if project_id is not None:
+        newest = newest.where(change.project_id == project_id)
+    superseded = delete(change).where(change.id.not_in(newest))
+    if project_id is not None:
+        superseded = superseded.where(change.project_id == project_id)
+    removed = db.execute(superseded).rowcount or 0
+
+    cutoff = datetime.utcnow() - retention
+    expired = select(change.project_id, func.max(change.seq)).where(change.op == DELETE, change.created_at < cutoff)
+    if project_id is not None:
+        expired = expired.where(change.project_id == project_id)
+    for pid, max_seq in db.execute(expired.group_by(change.project_id)).all():
+        db.execute(
+            update(head_).where(head_.project_id == pid, head_.floor_seq < max_seq).values(floor_seq=max_seq)
+        )
+        removed += (
+            db.execute(
+                delete(change).where(change.project_id == pid, change.op == DELETE, change.seq <= max_seq)
+            ).rowcount
+            or 0
+        )
+    db.commit()
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact the per-project change log")
+    parser.add_argument("--retention-days", type=int, default=30)
+    parser.add_argument("--project-id", type=int, default=None)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        removed = compact(db, timedelta(days=args.retention_days), args.project_id)
+        print({"removed": removed})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
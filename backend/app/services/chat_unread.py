@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(models.TaskChatRead)
+    return sqlite.insert(models.TaskChatRead)
+
+
+def on_message(db: Session, message: models.TaskMessage, participants: Iterable[int]) -> None:
+    """Bump unread counters for everyone following the chat except the author.
+
+    Existing markers get one UPDATE; ``participants`` (assignee, manager) who
+    have no marker yet get one with a count of 1. The author's own marker is
+    moved to this message. Runs in the caller's transaction.
+    """
+
+    reads = models.TaskChatRead
+    db.execute(
+        update(reads)
+        .where(reads.task_id == message.task_id, reads.user_id != message.author_id)
+        .values(unread_count=reads.unread_count + 1)
+    )
+    others = {uid for uid in participants if uid != message.author_id}
+    if others:
+        db.execute(
+            _insert(db)
+            .values([{"user_id": uid, "task_id": message.task_id, "unread_count": 1} for uid in sorted(others)])
+            .on_conflict_do_nothing(index_elements=["user_id", "task_id"])
+        )
+    mark_read(db, message.author_id, message.task_id, message.id, message.created_at)
+
+
+def mark_read(
+    db: Session,
+    user_id: int,
+    task_id: int,
+    message_id: Optional[int],
+    read_at: Optional[datetime] = None,
+) -> None:
+    stmt = _insert(db).values(
+        user_id=user_id,
+        task_id=task_id,
+        last_read_message_id=message_id,
+        last_read_at=read_at or datetime.utcnow(),
+        unread_count=0,
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "task_id"],
+            set_={
+                "last_read_message_id": stmt.excluded.last_read_message_id,
+                "last_read_at": stmt.excluded.last_read_at,
+                "unread_count": 0,
+            },
+        )
+    )
+
+
+def read_up_to(db: Session, user_id: int, message: models.TaskMessage) -> models.TaskChatRead:
+    """Move a user's marker to ``message`` (the newest one their client has shown).
+
+    The marker never moves back, and ``unread_count`` becomes the number of
+    later messages by other authors, so messages that arrived after the
+    client's last fetch stay unread. The marker row is locked before counting:
+    a message committed earlier is counted, and one still being sent bumps the
+    counter only after this transaction commits.
+    """
+
+    reads, msgs = models.TaskChatRead, models.TaskMessage
+    db.execute(
+        _insert(db)
+        .values(user_id=user_id, task_id=message.task_id, unread_count=0)
+        .on_conflict_do_nothing(index_elements=["user_id", "task_id"])
+    )
+    marker = db.execute(
+        select(reads)
+        .where(reads.user_id == user_id, reads.task_id == message.task_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+    seen = message
+    if marker.last_read_message_id is not None and marker.last_read_message_id != message.id:
+        previous = db.get(msgs, marker.last_read_message_id)
+        if previous is not None and (previous.created_at, previous.id) > (message.created_at, message.id):
+            seen = previous
+    marker.last_read_message_id = seen.id
+    marker.last_read_at = datetime.utcnow()
+    marker.unread_count = db.execute(
+        select(func.count())
+        .select_from(msgs)
+        .where(
+            msgs.task_id == message.task_id,
+            msgs.author_id != user_id,
+            tuple_(msgs.created_at, msgs.id) > tuple_(seen.created_at, seen.id),
+        )
+    ).scalar_one()
+    db.flush()
+    return marker
+
+
+def unread_for_user(db: Session, user_id: int):
+    """All chats with unread messages for a user: one scan of the (user_id, unread_count) index."""
+
+    reads = models.TaskChatRead
+    return db.execute(
+        select(reads.task_id, models.Task.project_id, reads.unread_count, reads.last_read_at)
+        .join(models.Task, models.Task.id == reads.task_id)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .where(reads.user_id == user_id, reads.unread_count > 0, models.Project.deleted_at.is_(None))
+        .order_by(reads.task_id)
+    ).all()
@@ -0,0 +1,199 @@
+"""Per-project task counters behind the dashboard summary.
+
+Task writes adjust the counters in their own transaction; rebuild them from
+the tasks table if they ever drift::
+
+    python -m app.services.dashboard [--project-id 42]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+logger = logging.getLogger(__name__)
+
+# (dimension, key) pairs a task contributes to; see ProjectTaskCounter
+Keys = List[Tuple[str, str]]
+
+NO_ASSIGNEE = "none"
+
+
+def _value(value) -> str:
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(getattr(value, "value", value))
+
+
+def task_keys(status, priority, assignee_id, deadline) -> Keys:
+    keys = [
+        ("status", _value(status)),
+        ("priority", _value(priority)),
+        ("assignee", NO_ASSIGNEE if assignee_id is None else str(assignee_id)),
+    ]
+    # Overdue depends on today's date, so open tasks are counted per deadline
+    # and summed up to yesterday at read time
+    if deadline is not None and _value(status) != models.TaskStatus.done.value:
+        keys.append(("open_deadline", _value(deadline)))
+    return keys
+
+
+def keys_for(task: models.Task) -> Keys:
+    return task_keys(task.status, task.priority, task.assignee_id, task.deadline)
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(models.ProjectTaskCounter)
+    return sqlite.insert(models.ProjectTaskCounter)
+
+
+def apply(db: Session, project_id: int, removed: Keys = (), added: Keys = ()) -> None:
+    """Move one task's contribution from ``removed`` to ``added`` keys.
+
+    Net deltas are written with a single upsert; counters that reach zero are
+    deleted. Runs in the caller's transaction.
+    """
+
+    delta: Counter = Counter(added)
+    delta.subtract(removed)
+    rows = [
+        {"project_id": project_id, "dimension": dim, "key": key, "count": n}
+        for (dim, key), n in sorted(delta.items())
+        if n
+    ]
+    if not rows:
+        return
+    stmt = _insert(db).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["project_id", "dimension", "key"],
+            set_={"count": models.ProjectTaskCounter.count + stmt.excluded.count},
+        )
+    )
+    if any(row["count"] < 0 for row in rows):
+        counter = models.ProjectTaskCounter
+        db.execute(delete(counter).where(counter.project_id == project_id, counter.count <= 0))
+
+
+def on_task_created(db: Session, task: models.Task) -> None:
+    apply(db, task.project_id, added=keys_for(task))
+
+
+def on_task_changed(db: Session, task: models.Task, before: Keys) -> None:
+    apply(db, task.project_id, removed=before, added=keys_for(task))
+
+
+def on_task_deleted(db: Session, task: models.Task) -> None:
+    apply(db, task.project_id, removed=keys_for(task))
+
+
+def summaries(db: Session, project_ids: Iterable[int], today: Optional[date] = None) -> Dict[int, dict]:
+    """Dashboard figures for each project, read from its counters only."""
+
+    ids = sorted(set(project_ids))
+    today_key = (today or date.today()).isoformat()
+    out: Dict[int, dict] = {
+        pid: {
+            "project_id": pid,
+            "total": 0,
+            "overdue": 0,
+            "by_status": {status.value: 0 for status in models.TaskStatus},
+            "by_priority": {priority.value: 0 for priority in models.TaskPriority},
+            "by_assignee": {},
+        }
+        for pid in ids
+    }
+    if not ids:
+        return out
+    counter = models.ProjectTaskCounter
+    rows = db.execute(
+        select(counter.project_id, counter.dimension, counter.key, counter.count).where(counter.project_id.in_(ids))
+    )
+    for project_id, dimension, key, count in rows:
+        summary = out[project_id]
+        if dimension == "status":
+            summary["by_status"][key] = count
+            summary["total"] += count
+        elif dimension == "priority":
+            summary["by_priority"][key] = count
+        elif dimension == "assignee":
+            summary["by_assignee"][key] = count
+        elif dimension == "open_deadline" and key < today_key:
+            summary["overdue"] += count
+    return out
+
+
+def rebuild(db: Session, project_id: Optional[int] = None) -> int:
+    """Recompute counters from the tasks table; returns the number of counter rows."""
+
+    count = recompute(db, project_id)
+    db.commit()
+    logger.info("Rebuilt %d dashboard counters", count)
+    return count
+
+
+def recompute(db: Session, project_id: Optional[int] = None) -> int:
+    """``rebuild`` in the caller's transaction, for bulk task writes."""
+
+    task, counter = models.Task, models.ProjectTaskCounter
+    scope = [] if project_id is None else [task.project_id == project_id]
+    grouped = (
+        select(task.project_id, task.status, task.priority, task.assignee_id, task.deadline, func.count())
+        .where(*scope)
+        .group_by(task.project_id, task.status, task.priority, task.assignee_id, task.deadline)
+    )
+    totals: Dict[int, Counter] = defaultdict(Counter)
+    for pid, status, priority, assignee_id, deadline, n in db.execute(grouped):
+        for key in task_keys(status, priority, assignee_id, deadline):
+            totals[pid][key] += n
+
+    clear = delete(counter)
+    if project_id is not None:
+        clear = clear.where(counter.project_id == project_id)
+    db.execute(clear)
+    rows = [
+        {"project_id": pid, "dimension": dim, "key": key, "count": n}
+        for pid, counts in totals.items()
+        for (dim, key), n in counts.items()
+    ]
+    if rows:
+        db.execute(_insert(db), rows)
+    return len(rows)
+
+
+def ensure_counters(db: Session) -> None:
+    """Backfill counters once for databases created before they existed."""
+
+    has_counters = db.execute(select(models.ProjectTaskCounter.id).limit(1)).first()
+    if not has_counters and db.execute(select(models.Task.id).limit(1)).first():
+        rebuild(db)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild project dashboard counters from tasks")
+    parser.add_argument("--project-id", type=int, default=None)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print({"counters": rebuild(db, project_id=args.project_id)})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
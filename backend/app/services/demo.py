@@ -5,6 +5,7 @@ from datetime import date, timedelta
 from sqlalchemy.orm import Session
 
 from .. import models
+from . import dashboard, reachability, readiness
 
 
 DEMO_PROJECT_NAME = "Демонстрационный проект"
@@ -40,7 +41,11 @@ def ensure_user_in_demo_project(db: Session, user: models.User) -> None:
 
 
 def _ensure_demo_project(db: Session) -> tuple[models.Project, bool]:
-    project = db.query(models.Project).filter(models.Project.name == DEMO_PROJECT_NAME).first()
+    project = (
+        db.query(models.Project)
+        .filter(models.Project.name == DEMO_PROJECT_NAME, models.Project.deleted_at.is_(None))
+        .first()
+    )
     if project:
         return project, False
 
@@ -328,12 +333,9 @@ def _ensure_demo_tasks(db: Session, project: models.Project) -> None:
         for item in tasks_data
     ]
 
+    # The flush assigns ids; everything below stays in one transaction
     db.add_all(task_entities)
-    db.commit()
-
-    # Refresh instances to access IDs
-    for task in task_entities:
-        db.refresh(task)
+    db.flush()
 
     tasks_map = {data["key"]: entity for data, entity in zip(tasks_data, task_entities)}
 
@@ -382,9 +384,12 @@ def _ensure_demo_tasks(db: Session, project: models.Project) -> None:
             )
         )
 
-    if dependency_entities:
-        db.add_all(dependency_entities)
-        db.commit()
+    db.add_all(dependency_entities)
+    db.flush()
+    readiness.recount(db, project_id=project.id)
+    reachability.rebuild_project(db, project.id)
+    dashboard.recompute(db, project.id)
+    db.commit()
 
 
 def _ensure_memberships(db: Session, project: models.Project) -> None:
@@ -0,0 +1,275 @@
+"""Row generators behind the export endpoints.
+
+Every export reads with ``yield_per`` (a server-side cursor on PostgreSQL)
+and renders one chunk per fetched batch, so the rows themselves are never held
+in memory. The exception is the schedule columns of the task and MS Project
+exports: ``schedule_fields`` runs the CPM up front, which keeps the whole
+dependency graph and one tuple per task in memory for the duration of the
+export. Generators open their own session because they keep running after the
+route has returned its ``StreamingResponse``.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..db import SessionLocal
+from .gantt import project_start, to_date
+from .scheduling import build_graph_and_cpm
+
+
+BATCH_ROWS = 1000
+# Excel only detects UTF-8 in CSV files that start with a BOM
+CSV_BOM = "\ufeff"
+
+# task id -> (es, ef, ls, lf, slack)
+ScheduleFields = Dict[int, Tuple[int, int, int, int, int]]
+
+_CpmTask = namedtuple("_CpmTask", "id name status duration_plan")
+
+
+def schedule_fields(db: Session, project_id: int) -> Optional[ScheduleFields]:
+    """CPM values per task, or None when the dependency graph has a cycle.
+
+    Only ids, durations and statuses are loaded, but the CPM needs the whole
+    graph at once, so memory here grows with the project (the analysis graph
+    for tasks and dependencies, then one tuple per task kept by the export).
+    """
+
+    task = models.Task
+    tasks = [
+        _CpmTask(tid, "", status, duration)
+        for tid, status, duration in db.execute(
+            select(task.id, task.status, task.duration_plan)
+            .where(task.project_id == project_id)
+            .execution_options(yield_per=BATCH_ROWS)
+        )
+    ]
+    deps = db.execute(
+        select(models.TaskDependency.task_id, models.TaskDependency.depends_on_task_id, models.TaskDependency.dependency_type)
+        .join(task, task.id == models.TaskDependency.task_id)
+        .where(task.project_id == project_id)
+    ).all()
+    try:
+        analysis = build_graph_and_cpm(project_id=project_id, tasks=tasks, dependencies=deps)
+    except ValueError:
+        return None
+    return {node.id: (node.es, node.ef, node.ls, node.lf, node.slack) for node in analysis.nodes}
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(getattr(value, "value", value))
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def _render(fmt: str, columns: Sequence[str], rows: List[tuple], with_header: bool) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, ensure_ascii=False) + "\n" for row in rows
+        )
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if with_header:
+        buf.write(CSV_BOM)
+        writer.writerow(columns)
+    writer.writerows([[_text(v) for v in row] for row in rows])
+    return buf.getvalue()
+
+
+def _stream(
+    fmt: str,
+    columns: Sequence[str],
+    statement,
+    transform: Callable[[tuple], tuple] = tuple,
+) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=BATCH_ROWS))
+        first = True
+        for batch in result.partitions():
+            yield _render(fmt, columns, [transform(row) for row in batch], first)
+            first = False
+        if first and fmt == "csv":
+            yield _render(fmt, columns, [], True)
+    finally:
+        db.close()
+
+
+TASK_COLUMNS = (
+    "id", "name", "description", "status", "priority", "assignee_id", "assignee_email",
+    "duration_plan", "deadline", "created_at", "updated_at",
+    "es", "ef", "ls", "lf", "slack", "is_critical", "start", "finish",
+)
+
+
+def tasks_rows(fmt: str, project: models.Project, schedule: Optional[ScheduleFields]) -> Iterator[str]:
+    """Tasks with their CPM fields; ``start``/``finish`` are calendar dates (finish exclusive)."""
+
+    task, user = models.Task, models.User
+    anchor = project_start(project)
+    statement = (
+        select(
+            task.id, task.name, task.description, task.status, task.priority, task.assignee_id, user.email,
+            task.duration_plan, task.deadline, task.created_at, task.updated_at,
+        )
+        .outerjoin(user, user.id == task.assignee_id)
+        .where(task.project_id == project.id)
+        .order_by(task.id)
+    )
+
+    def with_schedule(row) -> tuple:
+        fields = schedule.get(row[0]) if schedule else None
+        if fields is None:
+            return (*row, None, None, None, None, None, None, None, None)
+        es, ef, ls, lf, slack = fields
+        return (*row, es, ef, ls, lf, slack, slack == 0, to_date(anchor, es), to_date(anchor, ef))
+
+    return _stream(fmt, TASK_COLUMNS, statement, with_schedule)
+
+
+DEPENDENCY_COLUMNS = ("id", "task_id", "depends_on_task_id", "dependency_type")
+
+
+def dependencies_rows(fmt: str, project_id: int) -> Iterator[str]:
+    dep = models.TaskDependency
+    statement = (
+        select(dep.id, dep.task_id, dep.depends_on_task_id, dep.dependency_type)
+        .join(models.Task, models.Task.id == dep.task_id)
+        .where(models.Task.project_id == project_id)
+        .order_by(dep.id)
+    )
+    return _stream(fmt, DEPENDENCY_COLUMNS, statement)
+
+
+MESSAGE_COLUMNS = ("id", "task_id", "task_name", "author_id", "author_email", "content", "created_at")
+
+
+def messages_rows(fmt: str, project_id: int) -> Iterator[str]:
+    msg, task, user = models.TaskMessage, models.Task, models.User
+    statement = (
+        select(msg.id, msg.task_id, task.name, msg.author_id, user.email, msg.content, msg.created_at)
+        .join(task, task.id == msg.task_id)
+        .join(user, user.id == msg.author_id)
+        .where(task.project_id == project_id)
+        .order_by(msg.task_id, msg.created_at, msg.id)
+    )
+    return _stream(fmt, MESSAGE_COLUMNS, statement)
+
+
+_MSP_PRIORITY = {
+    models.TaskPriority.low: 300,
+    models.TaskPriority.medium: 500,
+    models.TaskPriority.high: 700,
+}
+
+
+def _msp_time(day: date, hour: int) -> str:
+    return f"{day.isoformat()}T{hour:02d}:00:00"
+
+
+def _msp_task(
+    number: int,
+    row,
+    fields: Optional[Tuple[int, int, int, int, int]],
+    anchor: date,
+    predecessors: List[int],
+) -> str:
+    tid, name, status, priority, duration_plan = row
+    # The CPM counts finished tasks as zero remaining work; the plan keeps their real length
+    duration = max(0, duration_plan)
+    es = fields[0] if fields else 0
+    start = to_date(anchor, es, working_days=True)
+    finish = to_date(anchor, es + duration - 1, working_days=True) if duration > 0 else start
+    parts = [
+        "<Task>",
+        f"<UID>{tid}</UID>",
+        f"<ID>{number}</ID>",
+        f"<Name>{escape(name)}</Name>",
+        "<OutlineLevel>1</OutlineLevel>",
+        f"<Priority>{_MSP_PRIORITY.get(priority, 500)}</Priority>",
+        f"<Start>{_msp_time(start, 8)}</Start>",
+        f"<Finish>{_msp_time(finish, 17 if duration > 0 else 8)}</Finish>",
+        f"<Duration>PT{duration * 8}H0M0S</Duration>",
+        "<DurationFormat>7</DurationFormat>",
+        f"<Milestone>{1 if duration == 0 else 0}</Milestone>",
+        f"<Critical>{1 if fields and fields[4] == 0 else 0}</Critical>",
+        f"<PercentComplete>{100 if status == models.TaskStatus.done else 0}</PercentComplete>",
+    ]
+    # Type 1 is finish-to-start, the only dependency kind tasks have
+    parts.extend(
+        f"<PredecessorLink><PredecessorUID>{pid}</PredecessorUID><Type>1</Type></PredecessorLink>" for pid in predecessors
+    )
+    parts.append("</Task>\n")
+    return "".join(parts)
+
+
+def msproject_xml(project: models.Project, schedule: Optional[ScheduleFields]) -> Iterator[str]:
+    """MS Project XML with tasks, FS links and dates on a Mon–Fri calendar.
+
+    Tasks and their predecessor links are read by two cursors ordered by
+    task id and merged, so links never have to be collected up front.
+    """
+
+    anchor = project_start(project)
+    task, dep = models.Task, models.TaskDependency
+    db = SessionLocal()
+    try:
+        yield '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        yield (
+            '<Project xmlns="http://schemas.microsoft.com/project">'
+            f"<Name>{escape(project.name)}</Name>"
+            f"<StartDate>{_msp_time(to_date(anchor, 0, working_days=True), 8)}</StartDate>"
+            "<MinutesPerDay>480</MinutesPerDay><MinutesPerWeek>2400</MinutesPerWeek><DaysPerMonth>20</DaysPerMonth>"
+            "<Tasks>\n"
+        )
+        tasks = db.execute(
+            select(task.id, task.name, task.status, task.priority, task.duration_plan)
+            .where(task.project_id == project.id)
+            .order_by(task.id)
+            .execution_options(yield_per=BATCH_ROWS)
+        )
+        links = iter(
+            db.execute(
+                select(dep.task_id, dep.depends_on_task_id)
+                .join(task, task.id == dep.task_id)
+                .where(task.project_id == project.id)
+                .order_by(dep.task_id, dep.depends_on_task_id)
+                .execution_options(yield_per=BATCH_ROWS)
+            )
+        )
+        pending = next(links, None)
+        number = 0
+        for batch in tasks.partitions():
+            chunk = []
+            for row in batch:
+                number += 1
+                predecessors = []
+                while pending is not None and pending[0] <= row[0]:
+                    if pending[0] == row[0]:
+                        predecessors.append(pending[1])
+                    pending = next(links, None)
+                fields = schedule.get(row[0]) if schedule else None
+                chunk.append(_msp_task(number, row, fields, anchor, predecessors))
+            yield "".join(chunk)
+        yield "</Tasks></Project>\n"
+    finally:
+        db.close()
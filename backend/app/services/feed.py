@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def task_recipients(
+    db: Session,
+    task: models.Task,
+    extra: Iterable[Optional[int]] = (),
+    manager_id: Optional[int] = None,
+) -> Set[int]:
+    """Task events concern the assignee and the project manager."""
+    if manager_id is None:
+        manager_id = db.execute(
+            select(models.Project.manager_id).where(models.Project.id == task.project_id)
+        ).scalar_one_or_none()
+    ids = {task.assignee_id, manager_id, *extra}
+    return {uid for uid in ids if uid is not None}
+
+
+def project_recipients(db: Session, project_id: int) -> Set[int]:
+    """Project-wide events concern every member and the manager."""
+    rows = db.execute(
+        select(models.ProjectMember.user_id).where(models.ProjectMember.project_id == project_id)
+    ).scalars()
+    manager_id = db.execute(
+        select(models.Project.manager_id).where(models.Project.id == project_id)
+    ).scalar_one_or_none()
+    ids = set(rows)
+    if manager_id is not None:
+        ids.add(manager_id)
+    return ids
+
+
+def record_feed_event(
+    db: Session,
+    *,
+    kind: str,
+    project_id: int,
+    recipients: Iterable[int],
+    task_id: Optional[int] = None,
+    actor_id: Optional[int] = None,
+) -> Dict[int, str]:
+    """Persist one unread notification per recipient in the caller's transaction.
+
+    The actor never notifies themselves. Returns the rendered stream message per
+    recipient so the route can publish them after commit via ``notify_users``.
+    """
+
+    targets: List[int] = sorted({uid for uid in recipients if uid != actor_id})
+    if not targets:
+        return {}
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": uid,
+            "project_id": project_id,
+            "task_id": task_id,
+            "actor_id": actor_id,
+            "kind": kind,
+            "created_at": now,
+        }
+        for uid in targets
+    ]
+    db.execute(insert(models.UserNotification), rows)
+    payload = json.dumps(
+        {"kind": kind, "project_id": project_id, "task_id": task_id, "actor_id": actor_id, "created_at": now.isoformat()}
+    )
+    return {uid: payload for uid in targets}
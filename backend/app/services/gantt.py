@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .. import models, schemas
+from .scheduling import build_graph_and_cpm
+
+
+UNASSIGNED_LANE = "Без исполнителя"
+
+
+def _next_workday(day: date) -> date:
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def to_date(anchor: date, offset: int, working_days: bool = False) -> date:
+    """Calendar date of a CPM time offset (one unit is one day) counted from ``anchor``."""
+
+    if not working_days:
+        return anchor + timedelta(days=offset)
+    day = _next_workday(anchor)
+    weeks, rest = divmod(offset, 5)
+    day += timedelta(weeks=weeks)
+    for _ in range(rest):
+        day = _next_workday(day + timedelta(days=1))
+    return day
+
+
+def project_start(project: models.Project) -> date:
+    return project.start_date or project.created_at.date()
+
+
+def build_chart(
+    project: models.Project,
+    tasks: List[models.Task],
+    dependencies: List[models.TaskDependency],
+    assignee_names: Dict[int, str],
+    *,
+    group_by_assignee: bool = False,
+    offset: int = 0,
+    limit: int = 200,
+    window_start: Optional[date] = None,
+    window_end: Optional[date] = None,
+    working_days: bool = False,
+) -> schemas.GanttChart:
+    """Gantt rows for one page of the chart.
+
+    Bars are filtered to those overlapping ``[window_start, window_end]``
+    (inclusive days), ordered by lane and early start, and then cut to
+    ``offset``/``limit`` rows. Lanes and ``total_rows`` describe the whole
+    filtered chart so the client can size a virtualized view.
+    """
+
+    analysis = build_graph_and_cpm(project_id=project.id, tasks=tasks, dependencies=dependencies)
+    anchor = project_start(project)
+    by_id = {t.id: t for t in tasks}
+
+    def day(units: int) -> date:
+        return to_date(anchor, units, working_days)
+
+    bars: List[Tuple[tuple, schemas.GanttBar]] = []
+    for node in analysis.nodes:
+        task = by_id[node.id]
+        start, end = day(node.es), day(node.ef)
+        # Zero-length (done) tasks still occupy their start day on the chart
+        visible_end = max(end, start + timedelta(days=1))
+        if window_start is not None and visible_end <= window_start:
+            continue
+        if window_end is not None and start > window_end:
+            continue
+        bar = schemas.GanttBar(
+            row=0,
+            id=node.id,
+            name=node.name,
+            assignee_id=task.assignee_id,
+            status=node.status,
+            duration=node.duration,
+            slack=node.slack,
+            is_critical=node.is_critical,
+            start=start,
+            end=end,
+            late_start=day(node.ls),
+            late_end=day(node.lf),
+            deadline=task.deadline,
+        )
+        lane_key: tuple = ()
+        if group_by_assignee:
+            name = assignee_names.get(task.assignee_id) if task.assignee_id is not None else None
+            # Unassigned work goes last
+            lane_key = (name is None, name or "", task.assignee_id or 0)
+        bars.append(((*lane_key, node.es, node.id), bar))
+    bars.sort(key=lambda item: item[0])
+
+    lanes: List[schemas.GanttLane] = []
+    for index, (_, bar) in enumerate(bars):
+        bar.row = index
+        if not group_by_assignee:
+            continue
+        if lanes and lanes[-1].assignee_id == bar.assignee_id:
+            lanes[-1].row_count += 1
+        else:
+            name = assignee_names.get(bar.assignee_id, UNASSIGNED_LANE) if bar.assignee_id is not None else UNASSIGNED_LANE
+            lanes.append(schemas.GanttLane(assignee_id=bar.assignee_id, name=name, first_row=index, row_count=1))
+
+    page = [bar for _, bar in bars[offset : offset + limit]]
+    on_page = {bar.id for bar in page}
+    edges = [(edge.source, edge.target) for edge in analysis.edges if edge.source in on_page and edge.target in on_page]
+    return schemas.GanttChart(
+        project_id=project.id,
+        start_date=to_date(anchor, 0, working_days),
+        finish_date=day(analysis.duration),
+        duration=analysis.duration,
+        working_days=working_days,
+        total_rows=len(bars),
+        offset=offset,
+        lanes=lanes,
+        rows=page,
+        edges=edges,
+    )
@@ -0,0 +1,182 @@
+"""Layered (Sugiyama-style) layout of the dependency graph for GraphView.
+
+Layers come from longest paths along the CPM topological order, edges that
+skip layers get virtual nodes, and barycenter sweeps reduce crossings. The
+result is stored per project with a version hash of the graph's structure,
+so it is recomputed only when tasks or dependencies change, and then seeded
+from the previous positions to keep small edits from reshuffling the view.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+from bisect import bisect_right
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+
+
+# Centre-to-centre distances; match the node size and gaps GraphView used with dagre
+LAYER_GAP = 234.0
+ROW_GAP = 204.0
+SWEEPS = 8
+# Fewer sweeps when starting from a previous layout, so existing rows barely move
+INCREMENTAL_SWEEPS = 2
+
+Edge = Tuple[int, int]
+# task id -> (layer, x, y)
+Positions = Dict[int, Tuple[int, float, float]]
+
+
+def graph_version(node_ids: Sequence[int], edges: Sequence[Edge]) -> str:
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, sorted(node_ids))).encode())
+    digest.update(b"|")
+    digest.update(",".join(f"{u}-{v}" for u, v in sorted(edges)).encode())
+    return digest.hexdigest()
+
+
+def _crossings(upper: List[Hashable], lower: List[Hashable], down: Dict[Hashable, List[Hashable]]) -> int:
+    """Edge crossings between two adjacent layers (inversions of target positions)."""
+
+    lower_pos = {n: i for i, n in enumerate(lower)}
+    targets = [lower_pos[v] for u in upper for v in sorted(down.get(u, ()), key=lower_pos.__getitem__)]
+    seen: List[int] = []
+    count = 0
+    for t in targets:
+        # Earlier edges that end strictly below this one cross it
+        count += len(seen) - bisect_right(seen, t)
+        seen.insert(bisect_right(seen, t), t)
+    return count
+
+
+def _total_crossings(layers: List[List[Hashable]], down: Dict[Hashable, List[Hashable]]) -> int:
+    return sum(_crossings(layers[i], layers[i + 1], down) for i in range(len(layers) - 1))
+
+
+def _reorder(layers: List[List[Hashable]], neighbours: Dict[Hashable, List[Hashable]], fixed: int, free: int) -> None:
+    """Sort layer ``free`` by the mean position of each node's neighbours in layer ``fixed``."""
+
+    fixed_pos = {n: k for k, n in enumerate(layers[fixed])}
+
+    def key(item: Tuple[int, Hashable]) -> float:
+        k, n = item
+        linked = [fixed_pos[m] for m in neighbours.get(n, ()) if m in fixed_pos]
+        # Nodes without neighbours there keep their place; ties keep the current order
+        return sum(linked) / len(linked) if linked else float(k)
+
+    layers[free] = [n for _, n in sorted(enumerate(layers[free]), key=key)]
+
+
+def compute_layout(
+    topo_order: Sequence[int],
+    edges: Sequence[Edge],
+    previous: Optional[Positions] = None,
+) -> Positions:
+    preds: Dict[int, List[int]] = {n: [] for n in topo_order}
+    for u, v in edges:
+        preds[v].append(u)
+    layer_of: Dict[int, int] = {}
+    for n in topo_order:
+        layer_of[n] = max((layer_of[p] + 1 for p in preds[n]), default=0)
+
+    # Split long edges into unit-length segments through virtual nodes
+    down: Dict[Hashable, List[Hashable]] = {}
+    up: Dict[Hashable, List[Hashable]] = {}
+    node_layer: Dict[Hashable, int] = dict(layer_of)
+    for u, v in edges:
+        chain: List[Hashable] = [u]
+        for step in range(layer_of[u] + 1, layer_of[v]):
+            dummy = ("v", u, v, step)
+            node_layer[dummy] = step
+            chain.append(dummy)
+        chain.append(v)
+        for a, b in zip(chain, chain[1:]):
+            down.setdefault(a, []).append(b)
+            up.setdefault(b, []).append(a)
+
+    depth = max(node_layer.values(), default=-1) + 1
+    members: List[List[Hashable]] = [[] for _ in range(depth)]
+    for n, layer in node_layer.items():
+        members[layer].append(n)
+
+    # Initial order: previous rows where known, otherwise barycenter of the layer above
+    topo_index = {n: i for i, n in enumerate(topo_order)}
+    layers: List[List[Hashable]] = []
+    for layer, nodes in enumerate(members):
+        above = {n: k for k, n in enumerate(layers[-1])} if layers else {}
+
+        def initial(n: Hashable) -> Tuple[float, int]:
+            if previous and n in previous and previous[n][0] == layer:
+                return previous[n][2] / ROW_GAP, topo_index[n]
+            linked = [above[m] for m in up.get(n, ()) if m in above]
+            rank = sum(linked) / len(linked) if linked else float(topo_index.get(n, 0))
+            return rank, topo_index.get(n, len(topo_index))
+
+        layers.append(sorted(nodes, key=initial))
+
+    best = [list(layer) for layer in layers]
+    best_crossings = _total_crossings(layers, down)
+    sweeps = INCREMENTAL_SWEEPS if previous else SWEEPS
+    for _ in range(sweeps):
+        if best_crossings == 0:
+            break
+        for i in range(1, depth):
+            _reorder(layers, up, i - 1, i)
+        for i in range(depth - 2, -1, -1):
+            _reorder(layers, down, i + 1, i)
+        crossings = _total_crossings(layers, down)
+        if crossings < best_crossings:
+            best, best_crossings = [list(layer) for layer in layers], crossings
+
+    positions: Positions = {}
+    for layer, nodes in enumerate(best):
+        for row, n in enumerate(nodes):
+            if isinstance(n, int):
+                positions[n] = (layer, layer * LAYER_GAP, row * ROW_GAP)
+    return positions
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(models.ProjectGraphLayout)
+    return sqlite.insert(models.ProjectGraphLayout)
+
+
+def layout_for(db: Session, analysis: schemas.GraphAnalysis) -> schemas.GraphLayout:
+    """Cached layout for the analysed graph; recomputed and stored when its structure changed."""
+
+    node_ids = [node.id for node in analysis.nodes]
+    edges = [(edge.source, edge.target) for edge in analysis.edges]
+    version = graph_version(node_ids, edges)
+    stored = db.query(models.ProjectGraphLayout).filter(models.ProjectGraphLayout.project_id == analysis.project_id).first()
+    if stored is not None and stored.version == version:
+        positions: Positions = {int(k): tuple(v) for k, v in json.loads(stored.positions).items()}
+    else:
+        previous = {int(k): tuple(v) for k, v in json.loads(stored.positions).items()} if stored else None
+        positions = compute_layout(node_ids, edges, previous)
+        _store(db, analysis.project_id, version, positions)
+    return schemas.GraphLayout(
+        version=version,
+        nodes=[schemas.GraphNodePosition(id=tid, layer=layer, x=x, y=y) for tid, (layer, x, y) in sorted(positions.items())],
+    )
+
+
+def _store(db: Session, project_id: int, version: str, positions: Positions) -> None:
+    stmt = _insert(db).values(
+        project_id=project_id,
+        version=version,
+        positions=json.dumps({str(k): list(v) for k, v in positions.items()}),
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["project_id"],
+            set_={"version": stmt.excluded.version, "positions": stmt.excluded.positions, "updated_at": datetime.utcnow()},
+        )
+    )
+    db.commit()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Sequence
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the sort-key values of the last row on a page."""
+
+    plain = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(plain, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> List[Any]:
+    """Inverse of ``encode_cursor``; ``types`` convert each value back. Raises ValueError."""
+
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(raw, list) or len(raw) != len(types):
+        raise ValueError("Invalid cursor")
+    return [None if v is None else conv(v) for conv, v in zip(types, raw)]
+
+
+def parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> tuple:
+    """Rows are fetched with ``limit + 1``; returns (page, has_more)."""
+
+    return list(rows[:limit]), len(rows) > limit
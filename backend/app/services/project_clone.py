@@ -0,0 +1,194 @@
+"""Creating a project as a copy of another one, usually a template.
+
+Everything is copied with set-based ``INSERT … SELECT`` statements, so the
+cost is a handful of round trips whatever the size of the source. Each new
+task stores the id it was copied from in ``tasks.source_task_id``; those
+pairs go into a small temporary old -> new id table, and the dependencies
+are copied by joining both ends through it, so ids are remapped inside the
+database. The map is analyzed before use: the rows just inserted into
+``tasks`` have no statistics yet, and joining through them directly makes
+both PostgreSQL and SQLite pick nested loops over the whole new project for
+every edge. Deadlines are shifted by a whole number of days and assignees
+are rewritten through a CASE over the requested mapping.
+``open_predecessors`` is computed in the same SELECT and the dashboard
+counters are recomputed with one grouped query. Runs in the caller's
+transaction.
+
+The reachability index is not copied: it grows quadratically with chain
+length (a 5k-task template carries about a quarter million pairs), so the
+new project is flagged ``reachability_pending`` and the caller schedules
+``reachability.rebuild_pending`` once the transaction has committed.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Integer,
+    MetaData,
+    Table,
+    case,
+    func,
+    insert,
+    literal,
+    null,
+    select,
+    union,
+)
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import change_log, dashboard
+
+
+def _shift(db: Session, column, days: int) -> ColumnElement:
+    if not days:
+        return column
+    if db.get_bind().dialect.name == "postgresql":
+        # date + integer is a date on PostgreSQL
+        return column + literal(days)
+    return func.date(column, f"{days:+d} days")
+
+
+def _mapped_user(column, mapping: Dict[int, Optional[int]], keep_unmapped: bool) -> ColumnElement:
+    fallback = column if keep_unmapped else null()
+    if not mapping:
+        return fallback
+    return case(mapping, value=column, else_=fallback)
+
+
+def _id_map(db: Session, project_id: int) -> Table:
+    """Temporary old -> new task id table for a freshly cloned project."""
+
+    table = Table(
+        "clone_task_map",
+        MetaData(),
+        Column("old_id", Integer, primary_key=True),
+        Column("new_id", Integer, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+    conn = db.connection()
+    table.create(conn)
+    task = models.Task
+    conn.execute(
+        insert(table).from_select(
+            ["old_id", "new_id"], select(task.source_task_id, task.id).where(task.project_id == project_id)
+        )
+    )
+    conn.exec_driver_sql("ANALYZE clone_task_map")
+    return table
+
+
+def anchor_date(project: models.Project) -> date:
+    """Day zero of the project's schedule, the point date shifts are measured from."""
+
+    return project.start_date or project.created_at.date()
+
+
+def clone_project(
+    db: Session,
+    source: models.Project,
+    name: str,
+    *,
+    description: Optional[str] = None,
+    customer: Optional[str] = None,
+    manager_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    assignee_map: Optional[Dict[int, Optional[int]]] = None,
+    keep_unmapped_assignees: bool = True,
+    copy_members: bool = True,
+    reset_status: bool = True,
+    is_template: bool = False,
+) -> models.Project:
+    """Copy ``source`` with its tasks, dependencies and members into a new project.
+
+    With ``start_date`` every date moves by the distance between it and the
+    source's start; ``assignee_map`` rewrites assignees and members (a None
+    value unassigns). ``reset_status`` puts every task back into backlog.
+    """
+
+    mapping = dict(assignee_map or {})
+    shift_days = (start_date - anchor_date(source)).days if start_date else 0
+    project = models.Project(
+        name=name,
+        description=source.description if description is None else description,
+        start_date=start_date or source.start_date,
+        deadline=source.deadline + timedelta(days=shift_days) if source.deadline else None,
+        customer=source.customer if customer is None else customer,
+        manager_id=source.manager_id if manager_id is None else manager_id,
+        budget_plan=source.budget_plan,
+        is_template=is_template,
+        reachability_pending=True,
+    )
+    db.add(project)
+    db.flush()
+
+    task, dep = models.Task, models.TaskDependency
+    now = datetime.utcnow()
+    if reset_status:
+        # Every predecessor is back in backlog, so each task waits on all of them
+        status = literal(models.TaskStatus.backlog, task.status.type)
+        open_predecessors = select(func.count()).where(dep.task_id == task.id).scalar_subquery()
+    else:
+        status, open_predecessors = task.status, task.open_predecessors
+    db.execute(
+        insert(task).from_select(
+            [
+                "name", "description", "project_id", "assignee_id", "status", "priority", "duration_plan",
+                "deadline", "open_predecessors", "source_task_id", "created_at", "updated_at",
+            ],
+            select(
+                task.name,
+                task.description,
+                literal(project.id),
+                _mapped_user(task.assignee_id, mapping, keep_unmapped_assignees),
+                status,
+                task.priority,
+                task.duration_plan,
+                _shift(db, task.deadline, shift_days),
+                open_predecessors,
+                task.id,
+                literal(now),
+                literal(now),
+            )
+            .where(task.project_id == source.id)
+            .order_by(task.id),
+        )
+    )
+
+    # Remap both ends of every edge through the old -> new id table
+    id_map = _id_map(db, project.id)
+    first, second = id_map.alias("first"), id_map.alias("second")
+    db.execute(
+        insert(dep).from_select(
+            ["task_id", "depends_on_task_id", "dependency_type"],
+            select(first.c.new_id, second.c.new_id, dep.dependency_type)
+            .select_from(first)
+            .join(dep, dep.task_id == first.c.old_id)
+            .join(second, second.c.old_id == dep.depends_on_task_id),
+        )
+    )
+    id_map.drop(db.connection())
+
+    # Members of the source (mapped like assignees) plus whoever was assigned a copied task
+    member = models.ProjectMember
+    member_ids = [
+        select(task.assignee_id.label("user_id")).where(task.project_id == project.id, task.assignee_id.is_not(None))
+    ]
+    if copy_members:
+        mapped = _mapped_user(member.user_id, mapping, True)
+        member_ids.append(
+            select(mapped.label("user_id")).where(member.project_id == source.id, mapped.is_not(None))
+        )
+    users = union(*member_ids).subquery()
+    db.execute(
+        insert(member).from_select(["project_id", "user_id"], select(literal(project.id), users.c.user_id))
+    )
+
+    dashboard.recompute(db, project.id)
+    change_log.record(db, project.id, [(change_log.PROJECT, project.id, change_log.UPSERT)])
+    return project
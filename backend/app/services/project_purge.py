@@ -0,0 +1,196 @@
+"""Project deletion: an immediate soft delete, then a batched background purge.
+
+``request_deletion`` only stamps ``projects.deleted_at`` and records a
+``project_purges`` row, so the API call is instant and the project vanishes
+from every access check at once. ``purge`` then removes the data with
+set-based DELETEs, tasks first in batches of ``BATCH_SIZE`` (each batch
+takes its messages, dependencies, history and index rows with it and
+commits, so locks stay short and progress is visible), then the
+project-level rows and the project itself. Rows are deleted explicitly
+child-first rather than through ON DELETE CASCADE alone so the same code
+works on SQLite, where foreign keys are not enforced. Unfinished purges
+are resumed on startup; run one by hand with::
+
+    python -m app.services.project_purge --project-id 42
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Per-task rows, removed for each batch of task ids before the tasks themselves
+_TASK_CHILDREN = [
+    (models.TaskMessage, models.TaskMessage.task_id),
+    (models.TaskChatRead, models.TaskChatRead.task_id),
+    (models.UserNotification, models.UserNotification.task_id),
+    (models.TaskReachability, models.TaskReachability.ancestor_id),
+    (models.TaskReachability, models.TaskReachability.descendant_id),
+    (models.TaskDependency, models.TaskDependency.task_id),
+    (models.TaskDependency, models.TaskDependency.depends_on_task_id),
+]
+
+# Project-level rows with a surrogate id, removed in batches
+_PROJECT_ROWS = [
+    (models.ActivityLog, models.ActivityLog.id),
+    (models.UserNotification, models.UserNotification.id),
+    (models.ActivityDailySummary, models.ActivityDailySummary.id),
+    (models.ProjectChange, models.ProjectChange.id),
+    (models.ProjectMember, models.ProjectMember.id),
+    (models.ProjectTaskCounter, models.ProjectTaskCounter.id),
+    (models.ScheduleSnapshot, models.ScheduleSnapshot.id),
+]
+
+# One row per project at most
+_PROJECT_SINGLETONS = [models.ProjectGraphLayout, models.ProjectChangeHead]
+
+
+def request_deletion(db: Session, project: models.Project, user_id: Optional[int]) -> models.ProjectPurge:
+    """Hide the project and register its purge; runs in the caller's transaction."""
+
+    project.deleted_at = datetime.utcnow()
+    total = db.execute(select(func.count()).where(models.Task.project_id == project.id)).scalar_one()
+    purge_row = db.get(models.ProjectPurge, project.id)
+    if purge_row is None:
+        purge_row = models.ProjectPurge(project_id=project.id, project_name=project.name)
+        db.add(purge_row)
+    purge_row.requested_by = user_id
+    purge_row.status = "pending"
+    purge_row.total_tasks = total
+    purge_row.deleted_tasks = 0
+    purge_row.error = None
+    purge_row.finished_at = None
+    return purge_row
+
+
+def _progress(db: Session, project_id: int, **values) -> None:
+    db.execute(
+        update(models.ProjectPurge)
+        .where(models.ProjectPurge.project_id == project_id)
+        .values(updated_at=datetime.utcnow(), **values)
+    )
+
+
+def _delete_task_batch(db: Session, task_ids: List[int]) -> None:
+    for model, column in _TASK_CHILDREN:
+        db.execute(delete(model).where(column.in_(task_ids)))
+    db.execute(delete(models.Task).where(models.Task.id.in_(task_ids)))
+
+
+def _delete_in_batches(db: Session, model, pk, project_id: int, batch_size: int) -> None:
+    while True:
+        ids = db.execute(select(pk).where(model.project_id == project_id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(model).where(pk.in_(ids)))
+        db.commit()
+
+
+def _delete_project_rows(db: Session, project_id: int, batch_size: int) -> None:
+    for model, pk in _PROJECT_ROWS:
+        _delete_in_batches(db, model, pk, project_id, batch_size)
+    for model in _PROJECT_SINGLETONS:
+        db.execute(delete(model).where(model.project_id == project_id))
+    db.execute(delete(models.TaskReachability).where(models.TaskReachability.project_id == project_id))
+    db.execute(delete(models.Project).where(models.Project.id == project_id))
+
+
+def purge(project_id: int, batch_size: int = BATCH_SIZE) -> None:
+    """Delete a soft-deleted project's data in batches; safe to re-run after a crash."""
+
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        deleted_at = db.execute(select(models.Project.deleted_at).where(models.Project.id == project_id)).first()
+        if deleted_at is not None and deleted_at[0] is None:
+            logger.warning("Refusing to purge project %s: it is not marked deleted", project_id)
+            return
+        _progress(db, project_id, status="running")
+        db.commit()
+        done = db.execute(
+            select(models.ProjectPurge.deleted_tasks).where(models.ProjectPurge.project_id == project_id)
+        ).scalar() or 0
+        # The history goes with the project; clearing it first spares deleting tasks
+        # from detaching it (task_id -> NULL) row by row
+        _delete_in_batches(db, models.ActivityLog, models.ActivityLog.id, project_id, batch_size)
+        while True:
+            task_ids = (
+                db.execute(select(models.Task.id).where(models.Task.project_id == project_id).limit(batch_size))
+                .scalars()
+                .all()
+            )
+            if not task_ids:
+                break
+            _delete_task_batch(db, task_ids)
+            done += len(task_ids)
+            _progress(db, project_id, deleted_tasks=done)
+            db.commit()
+        _delete_project_rows(db, project_id, batch_size)
+        _progress(db, project_id, status="done", finished_at=datetime.utcnow())
+        db.commit()
+        logger.info("Purged project %s (%d tasks)", project_id, done)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Purge of project %s failed", project_id)
+        _progress(db, project_id, status="failed", error=str(exc)[:1000])
+        db.commit()
+    finally:
+        db.close()
+
+
+def resume_pending(db: Session) -> None:
+    """Restart purges interrupted by a shutdown, in a background thread."""
+
+    pending = (
+        db.execute(select(models.ProjectPurge.project_id).where(models.ProjectPurge.status.in_(("pending", "running"))))
+        .scalars()
+        .all()
+    )
+    if not pending:
+        return
+
+    def run() -> None:
+        for project_id in pending:
+            purge(project_id)
+
+    threading.Thread(target=run, name="project-purge", daemon=True).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Purge soft-deleted projects")
+    parser.add_argument("--project-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        q = select(models.Project.id).where(models.Project.deleted_at.is_not(None))
+        if args.project_id is not None:
+            q = q.where(models.Project.id == args.project_id)
+        project_ids = db.execute(q).scalars().all()
+    finally:
+        db.close()
+    for project_id in project_ids:
+        purge(project_id, args.batch_size)
+    print({"purged": len(project_ids)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..auth import password_hasher
+from .demo import DEMO_PROJECT_NAME
+from .user_index import user_index
+
+
+BATCH_SIZE = 500
+# A quoted field that is never closed must not pull the rest of the upload into one record
+MAX_RECORD_LINES = 50
+
+# (row number, parsed row or None, parse error or None)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed request body into text lines without buffering all of it."""
+
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+def _split_projects(value) -> List[int]:
+    if value in (None, ""):
+        return []
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    return [int(v) for v in str(value).replace(",", ";").split(";") if v.strip()]
+
+
+def _normalize(raw: dict) -> dict:
+    email = (raw.get("email") or "").strip()
+    full_name = (raw.get("full_name") or "").strip()
+    password = raw.get("password") or ""
+    if not email or not full_name or not password:
+        raise ValueError("email, full_name и password обязательны")
+    return {
+        "email": email,
+        "full_name": full_name,
+        "password": password,
+        "role": models.UserRole(raw.get("role") or models.UserRole.executor.value),
+        "nickname": raw.get("nickname") or None,
+        "phone": raw.get("phone") or None,
+        "telegram": raw.get("telegram") or None,
+        "project_ids": _split_projects(raw.get("project_ids")),
+    }
+
+
+def _in_quoted_field(line: str, in_quoted: bool) -> bool:
+    """Whether a CSV record is inside a quoted field after ``line``.
+
+    Follows the csv module's default dialect: a quote opens a quoted field only
+    at the start of a field (a stray one, as in ``O"Brien``, is literal), and
+    inside a quoted field a doubled quote is an escaped quote. ``in_quoted`` is
+    the state at the end of the record's previous line.
+    """
+
+    i = line.find('"')
+    while i != -1:
+        if in_quoted:
+            if line.startswith('"', i + 1):
+                i += 1
+            else:
+                in_quoted = False
+        elif i == 0 or line[i - 1] == ",":
+            in_quoted = True
+        i = line.find('"', i + 1)
+    return in_quoted
+
+
+async def _records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[str]:
+    """Join physical lines into records: a quoted CSV field may span lines."""
+
+    pending: List[str] = []
+    in_quoted = False
+    async for line in lines:
+        if not pending and not line.strip():
+            continue
+        if fmt != "csv":
+            yield line
+            continue
+        pending.append(line)
+        in_quoted = _in_quoted_field(line, in_quoted)
+        if not in_quoted or len(pending) >= MAX_RECORD_LINES:
+            yield "\n".join(pending)
+            pending, in_quoted = [], False
+    if pending:
+        yield "\n".join(pending)
+
+
+async def parse_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[ParsedRow]:
+    """Yield normalized rows from CSV (header line first) or NDJSON input.
+
+    CSV columns: email, full_name, password, role, nickname, phone, telegram,
+    project_ids (ids separated by ``;``). Quoted fields may contain commas and
+    line breaks. NDJSON objects use the same keys, with ``project_ids`` as a
+    list.
+    """
+
+    header: Optional[List[str]] = None
+    row_no = 0
+    async for record in _records(lines, fmt):
+        if fmt == "csv" and header is None:
+            header = [h.strip() for h in next(csv.reader([record]))]
+            continue
+        row_no += 1
+        try:
+            if fmt == "csv":
+                raw = dict(zip(header or [], next(csv.reader([record], strict=True))))
+            else:
+                raw = json.loads(record)
+                if not isinstance(raw, dict):
+                    raise ValueError("ожидается JSON-объект")
+            yield row_no, _normalize(raw), None
+        except (ValueError, TypeError, csv.Error) as exc:
+            yield row_no, None, str(exc)
+
+
+def _demo_project_id(db: Session) -> Optional[int]:
+    return db.execute(
+        select(models.Project.id).where(models.Project.name == DEMO_PROJECT_NAME)
+    ).scalar_one_or_none()
+
+
+def provision_batch(db: Session, batch: List[Tuple[int, dict]]) -> Tuple[List[dict], List[dict]]:
+    """Insert one batch of users and their memberships with set-based statements.
+
+    Returns ``(created, errors)``; duplicate emails (in the batch or already in
+    the database) and unknown projects are reported per row and skipped.
+    """
+
+    created: List[dict] = []
+    errors: List[dict] = []
+    if not batch:
+        return created, errors
+
+    emails = {row["email"] for _, row in batch}
+    existing = set(db.execute(select(models.User.email).where(models.User.email.in_(emails))).scalars())
+    wanted_projects = {pid for _, row in batch for pid in row["project_ids"]}
+    known_projects = (
+        set(db.execute(select(models.Project.id).where(models.Project.id.in_(wanted_projects))).scalars())
+        if wanted_projects
+        else set()
+    )
+
+    accepted: List[Tuple[int, dict]] = []
+    seen: set = set()
+    for row_no, row in batch:
+        if row["email"] in existing or row["email"] in seen:
+            errors.append({"row": row_no, "email": row["email"], "error": "Пользователь с таким email уже существует"})
+            continue
+        unknown = [pid for pid in row["project_ids"] if pid not in known_projects]
+        if unknown:
+            errors.append({"row": row_no, "email": row["email"], "error": f"Проекты не найдены: {unknown}"})
+            continue
+        seen.add(row["email"])
+        accepted.append((row_no, row))
+    if not accepted:
+        return created, errors
+
+    hashes = password_hasher.hash_many([row["password"] for _, row in accepted])
+    user_rows = [
+        {
+            "email": row["email"],
+            "full_name": row["full_name"],
+            "role": row["role"],
+            "nickname": row["nickname"],
+            "phone": row["phone"],
+            "telegram": row["telegram"],
+            "password_hash": password_hash,
+        }
+        for (_, row), password_hash in zip(accepted, hashes)
+    ]
+    id_by_email: Dict[str, int] = {
+        email: uid
+        for uid, email in db.execute(
+            insert(models.User).returning(models.User.id, models.User.email), user_rows
+        )
+    }
+
+    # New users join the demo project, matching POST /users/ and /auth/register
+    demo_id = _demo_project_id(db)
+    member_rows = []
+    for row_no, row in accepted:
+        uid = id_by_email[row["email"]]
+        project_ids = dict.fromkeys(row["project_ids"] + ([demo_id] if demo_id else []))
+        member_rows.extend({"project_id": pid, "user_id": uid} for pid in project_ids)
+        created.append({"row": row_no, "id": uid, "email": row["email"], "project_ids": list(project_ids)})
+    if member_rows:
+        db.execute(insert(models.ProjectMember), member_rows)
+    db.commit()
+    for row in user_rows:
+        user_index.upsert_row(id_by_email[row["email"]], row["email"], row["full_name"], row["nickname"], row["role"])
+    return created, errors
+
@@ -0,0 +1,473 @@
+"""Transitive closure of task dependencies (the reachability index).
+
+``task_reachability`` holds one row per (ancestor, descendant) pair with the
+length of the shortest dependency chain between them, so cone queries with a
+depth limit are a single index range scan. Adding an edge inserts the
+ancestors × descendants product for that edge. Removing edges only
+invalidates pairs that end in the edited task or below it; those rows are
+recomputed from the closure of the predecessors just above.
+
+A freshly cloned project starts with ``projects.reachability_pending`` set
+and no rows here; ``rebuild_pending`` fills them in the background without
+holding locks, then briefly locks the project row to catch up with edits
+made meanwhile and clear the flag. Until then the read helpers walk
+task_dependencies level by level instead, and edge maintenance is skipped.
+Rebuild everything with::
+
+    python -m app.services.reachability [--project-id 42]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import change_log
+
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists and multi-row inserts within driver limits
+CHUNK = 500
+# Rows per committed transaction while a pending project's index is built
+BUILD_BATCH = 10000
+BUILD_ATTEMPTS = 3
+
+
+def _chunks(items: List, size: int = CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(models.TaskReachability)
+    return sqlite.insert(models.TaskReachability)
+
+
+def _least(db: Session, a, b):
+    # min() with two arguments is scalar in SQLite but an aggregate on PostgreSQL
+    if db.get_bind().dialect.name == "postgresql":
+        return func.least(a, b)
+    return func.min(a, b)
+
+
+def _pending(db: Session, task_id: int) -> bool:
+    project, task = models.Project, models.Task
+    return bool(
+        db.execute(
+            select(project.reachability_pending).join(task, task.project_id == project.id).where(task.id == task_id)
+        ).scalar()
+    )
+
+
+def _project_pending(db: Session, project_id: int) -> bool:
+    project = models.Project
+    return bool(db.execute(select(project.reachability_pending).where(project.id == project_id)).scalar())
+
+
+def _walk(
+    db: Session,
+    task_id: int,
+    upstream: bool,
+    max_depth: Optional[int] = None,
+    targets: Iterable[int] = (),
+) -> Dict[int, int]:
+    """Shortest depth of every task above or below ``task_id`` from task_dependencies.
+
+    Stops early once any of ``targets`` is found.
+    """
+
+    dep = models.TaskDependency
+    src, dst = (dep.task_id, dep.depends_on_task_id) if upstream else (dep.depends_on_task_id, dep.task_id)
+    wanted = set(targets)
+    found: Dict[int, int] = {}
+    frontier, depth = [task_id], 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        level: List[int] = []
+        for chunk in _chunks(frontier):
+            for other in db.execute(select(dst).where(src.in_(chunk))).scalars():
+                if other not in found:
+                    found[other] = depth
+                    level.append(other)
+        if wanted.intersection(level):
+            break
+        frontier = level
+    return found
+
+
+def ancestors(db: Session, task_id: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+    if _pending(db, task_id):
+        return list(_walk(db, task_id, True, max_depth).items())
+    return _ancestors(db, task_id, max_depth)
+
+
+def descendants(db: Session, task_id: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+    if _pending(db, task_id):
+        return list(_walk(db, task_id, False, max_depth).items())
+    return _descendants(db, task_id, max_depth)
+
+
+def _ancestors(db: Session, task_id: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+    reach = models.TaskReachability
+    q = select(reach.ancestor_id, reach.depth).where(reach.descendant_id == task_id)
+    if max_depth is not None:
+        q = q.where(reach.depth <= max_depth)
+    return [tuple(row) for row in db.execute(q)]
+
+
+def _descendants(db: Session, task_id: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+    reach = models.TaskReachability
+    q = select(reach.descendant_id, reach.depth).where(reach.ancestor_id == task_id)
+    if max_depth is not None:
+        q = q.where(reach.depth <= max_depth)
+    return [tuple(row) for row in db.execute(q)]
+
+
+def cone(db: Session, task_id: int, upstream: bool, max_depth: Optional[int] = None) -> List[tuple]:
+    """(task_id, depth, name, status) of every ancestor (``upstream``) or descendant, nearest first."""
+
+    reach, task = models.TaskReachability, models.Task
+    if _pending(db, task_id):
+        depths = _walk(db, task_id, upstream, max_depth)
+        rows = []
+        for chunk in _chunks(sorted(depths)):
+            rows.extend(
+                (tid, depths[tid], name, status)
+                for tid, name, status in db.execute(select(task.id, task.name, task.status).where(task.id.in_(chunk)))
+            )
+        return sorted(rows, key=lambda row: (row[1], row[0]))
+    if upstream:
+        other, anchor = reach.ancestor_id, reach.descendant_id
+    else:
+        other, anchor = reach.descendant_id, reach.ancestor_id
+    q = (
+        select(other, reach.depth, task.name, task.status)
+        .join(task, task.id == other)
+        .where(anchor == task_id)
+        .order_by(reach.depth, other)
+    )
+    if max_depth is not None:
+        q = q.where(reach.depth <= max_depth)
+    return [tuple(row) for row in db.execute(q)]
+
+
+def reaches(db: Session, ancestor_id: int, descendant_id: int) -> bool:
+    return reaches_any(db, ancestor_id, [descendant_id])
+
+
+def reaches_any(db: Session, ancestor_id: int, descendant_ids: Iterable[int]) -> bool:
+    """Whether any of ``descendant_ids`` depends, directly or not, on ``ancestor_id``."""
+
+    wanted = set(descendant_ids)
+    if not wanted:
+        return False
+    if _pending(db, ancestor_id):
+        return bool(wanted.intersection(_walk(db, ancestor_id, False, targets=wanted)))
+    reach = models.TaskReachability
+    return (
+        db.execute(
+            select(reach.depth).where(reach.ancestor_id == ancestor_id, reach.descendant_id.in_(wanted)).limit(1)
+        ).first()
+        is not None
+    )
+
+
+def _upsert(db: Session, rows: List[dict]) -> None:
+    reach = models.TaskReachability
+    for chunk in _chunks(rows):
+        stmt = _insert(db).values(chunk)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["ancestor_id", "descendant_id"],
+                set_={"depth": _least(db, reach.depth, stmt.excluded.depth)},
+            )
+        )
+
+
+def on_edge_added(db: Session, project_id: int, predecessor_id: int, task_id: int) -> None:
+    """Add the pairs created by the edge predecessor -> task; runs in the caller's transaction."""
+
+    if _project_pending(db, project_id):
+        return
+    above = [(predecessor_id, 0)] + _ancestors(db, predecessor_id)
+    below = [(task_id, 0)] + _descendants(db, task_id)
+    rows = [
+        {"project_id": project_id, "ancestor_id": a, "descendant_id": d, "depth": da + 1 + dd}
+        for a, da in above
+        for d, dd in below
+    ]
+    _upsert(db, rows)
+
+
+def rebuild_below(db: Session, project_id: int, task_ids: Iterable[int]) -> None:
+    """Recompute pairs ending in ``task_ids`` or any of their descendants.
+
+    Call before the edge change has been reflected here but after it is
+    flushed to task_dependencies: the old descendants bound what can change.
+    """
+
+    if not _project_pending(db, project_id):
+        _rebuild_below(db, project_id, task_ids)
+
+
+def _rebuild_below(db: Session, project_id: int, task_ids: Iterable[int]) -> None:
+    affected, rows = _closure_rows(db, project_id, task_ids)
+    reach = models.TaskReachability
+    for chunk in _chunks(affected):
+        db.execute(delete(reach).where(reach.descendant_id.in_(chunk)))
+    if rows:
+        # executemany with one compiled statement; a literal multi-row VALUES per chunk spends
+        # most of a large rebuild compiling bind parameters
+        db.execute(insert(reach), rows)
+
+
+def _closure_rows(db: Session, project_id: int, task_ids: Iterable[int]) -> Tuple[List[int], List[dict]]:
+    """Tasks at or below ``task_ids`` and their recomputed pairs; reads only."""
+
+    reach, dep = models.TaskReachability, models.TaskDependency
+    roots = set(task_ids)
+    affected = set(roots)
+    for chunk in _chunks(sorted(roots)):
+        affected.update(db.execute(select(reach.descendant_id).where(reach.ancestor_id.in_(chunk))).scalars())
+    affected_list = sorted(affected)
+
+    preds: Dict[int, List[int]] = defaultdict(list)
+    for chunk in _chunks(affected_list):
+        for task_id, pred_id in db.execute(
+            select(dep.task_id, dep.depends_on_task_id).where(dep.task_id.in_(chunk))
+        ):
+            preds[task_id].append(pred_id)
+
+    # Predecessors outside the affected set keep their closure; read it as the boundary
+    boundary = sorted({p for ps in preds.values() for p in ps if p not in affected})
+    closure: Dict[int, Dict[int, int]] = {p: {} for p in boundary}
+    for chunk in _chunks(boundary):
+        for a, d, depth in db.execute(
+            select(reach.ancestor_id, reach.descendant_id, reach.depth).where(reach.descendant_id.in_(chunk))
+        ):
+            closure[d][a] = depth
+
+    # Topological order within the affected set
+    indegree = {n: 0 for n in affected}
+    children: Dict[int, List[int]] = defaultdict(list)
+    for n, ps in preds.items():
+        for p in ps:
+            if p in affected:
+                indegree[n] += 1
+                children[p].append(n)
+    queue = deque(sorted(n for n, k in indegree.items() if k == 0))
+    rows: List[dict] = []
+    while queue:
+        n = queue.popleft()
+        anc: Dict[int, int] = {}
+        for p in preds.get(n, ()):
+            if anc.get(p, 2) > 1:
+                anc[p] = 1
+            for a, depth in closure[p].items():
+                if depth + 1 < anc.get(a, depth + 2):
+                    anc[a] = depth + 1
+        closure[n] = anc
+        rows.extend({"project_id": project_id, "ancestor_id": a, "descendant_id": n, "depth": d} for a, d in anc.items())
+        for c in children.get(n, ()):
+            indegree[c] -= 1
+            if indegree[c] == 0:
+                queue.append(c)
+    return affected_list, rows
+
+
+def rebuild_project(db: Session, project_id: int) -> None:
+    reach = models.TaskReachability
+    db.execute(delete(reach).where(reach.project_id == project_id))
+    task_ids = db.execute(select(models.Task.id).where(models.Task.project_id == project_id)).scalars().all()
+    _rebuild_below(db, project_id, task_ids)
+    db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id, models.Project.reachability_pending.is_(True))
+        .values(reachability_pending=False)
+    )
+
+
+def _catch_up(db: Session, project_id: int, since: int, edges: Dict[int, int], rows: List[dict]) -> bool:
+    """Redo the part of a fresh build that edits after sequence ``since`` made stale.
+
+    Call with the project row locked. ``edges`` maps dependency ids to their
+    dependent task as the build saw them, which is all a logged deletion of a
+    dependency leaves to go by. The dependent task of every dependency added
+    or removed since then is rebuilt with everything below it, as are the
+    direct successors of deleted tasks, taken from the build's own rows since
+    the edges are gone. Other task changes do not move the closure. False if
+    the log was compacted past ``since`` and the build has to start over.
+    """
+
+    head = db.execute(
+        select(models.ProjectChangeHead.last_seq, models.ProjectChangeHead.floor_seq).where(
+            models.ProjectChangeHead.project_id == project_id
+        )
+    ).first()
+    if head is None or head.last_seq == since:
+        return True
+    if head.floor_seq > since:
+        return False
+    change, dep, task = models.ProjectChange, models.TaskDependency, models.Task
+    touched, deleted, dependency_ids = set(), set(), set()
+    for entity, entity_id, op in db.execute(
+        select(change.entity, change.entity_id, change.op).where(change.project_id == project_id, change.seq > since)
+    ):
+        if entity == change_log.TASK and op == change_log.DELETE:
+            deleted.add(entity_id)
+        elif entity == change_log.DEPENDENCY and op == change_log.DELETE:
+            if entity_id in edges:
+                touched.add(edges[entity_id])
+        elif entity == change_log.DEPENDENCY:
+            dependency_ids.add(entity_id)
+    for chunk in _chunks(sorted(dependency_ids)):
+        touched.update(db.execute(select(dep.task_id).where(dep.id.in_(chunk))).scalars())
+    if deleted:
+        touched.update(row["descendant_id"] for row in rows if row["depth"] == 1 and row["ancestor_id"] in deleted)
+    roots: List[int] = []
+    for chunk in _chunks(sorted(touched - deleted)):
+        roots.extend(db.execute(select(task.id).where(task.id.in_(chunk), task.project_id == project_id)).scalars())
+    if roots:
+        _rebuild_below(db, project_id, roots)
+    return True
+
+
+def _lock_project(db: Session, project_id: int) -> bool:
+    """Lock the project row against task writers (they share-lock it); True if still pending.
+
+    A no-op UPDATE rather than SELECT … FOR UPDATE so SQLite takes its write
+    lock here too, before the change log is read.
+    """
+
+    project = models.Project
+    result = db.execute(
+        update(project)
+        .where(project.id == project_id, project.reachability_pending.is_(True))
+        .values(reachability_pending=True)
+    )
+    return result.rowcount == 1
+
+
+def rebuild_pending(project_id: int) -> None:
+    """Build the index of a project flagged as pending, in a session of its own.
+
+    The closure is computed and written in committed batches without any
+    lock; readers keep walking the graph while the flag is set. Only the
+    final catch-up with edits made during the build runs with the project
+    row locked, and clears the flag. A task deleted under a batch fails it
+    on the foreign key; the build then starts over, and after
+    ``BUILD_ATTEMPTS`` it is done in one locked transaction instead.
+    """
+
+    from ..db import SessionLocal
+
+    reach, head, dep = models.TaskReachability, models.ProjectChangeHead, models.TaskDependency
+    db = SessionLocal()
+    try:
+        for attempt in range(BUILD_ATTEMPTS):
+            if not _project_pending(db, project_id):
+                db.rollback()
+                return
+            db.execute(delete(reach).where(reach.project_id == project_id))
+            db.commit()
+            # Read before the graph: anything committed later has a higher sequence
+            since = db.execute(select(head.last_seq).where(head.project_id == project_id)).scalar() or 0
+            task_ids = db.execute(select(models.Task.id).where(models.Task.project_id == project_id)).scalars().all()
+            edges = dict(
+                db.execute(
+                    select(dep.id, dep.task_id)
+                    .join(models.Task, models.Task.id == dep.task_id)
+                    .where(models.Task.project_id == project_id)
+                ).all()
+            )
+            _, rows = _closure_rows(db, project_id, task_ids)
+            db.rollback()
+            try:
+                for chunk in _chunks(rows, BUILD_BATCH):
+                    db.execute(insert(reach), chunk)
+                    db.commit()
+            except IntegrityError:
+                db.rollback()
+                logger.info("reachability build for project %s raced a task deletion, restarting", project_id)
+                continue
+            if not _lock_project(db, project_id):
+                db.rollback()
+                return
+            if _catch_up(db, project_id, since, edges, rows):
+                db.execute(update(models.Project).where(models.Project.id == project_id).values(reachability_pending=False))
+                db.commit()
+                logger.info("reachability index built for project %s (%s pairs)", project_id, len(rows))
+                return
+            db.rollback()
+        if _lock_project(db, project_id):
+            rebuild_project(db, project_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("reachability rebuild failed for project %s", project_id)
+    finally:
+        db.close()
+
+
+def resume_pending(db: Session) -> None:
+    """Finish rebuilds interrupted by a shutdown, in a background thread."""
+
+    pending = (
+        db.execute(select(models.Project.id).where(models.Project.reachability_pending.is_(True))).scalars().all()
+    )
+    if not pending:
+        return
+
+    def run() -> None:
+        for project_id in pending:
+            rebuild_pending(project_id)
+
+    threading.Thread(target=run, name="reachability-rebuild", daemon=True).start()
+
+
+def ensure_index(db: Session) -> None:
+    """Backfill the index once for databases created before it existed."""
+
+    has_rows = db.execute(select(models.TaskReachability.ancestor_id).limit(1)).first()
+    if has_rows or not db.execute(select(models.TaskDependency.id).limit(1)).first():
+        return
+    for (project_id,) in db.execute(select(models.Project.id)).all():
+        rebuild_project(db, project_id)
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the task reachability index")
+    parser.add_argument("--project-id", type=int, default=None)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        q = select(models.Project.id)
+        if args.project_id is not None:
+            q = q.where(models.Project.id == args.project_id)
+        project_ids = db.execute(q).scalars().all()
+        for project_id in project_ids:
+            rebuild_project(db, project_id)
+            db.commit()
+        print({"projects": len(project_ids)})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Maintained count of unfinished predecessors per task.
+
+``tasks.open_predecessors`` is the number of direct predecessors whose status
+is not ``done``. It changes only when a task moves into or out of ``done``
+(successors are adjusted by one) and when dependencies are added, replaced
+or deleted, so the "predecessors must be done" rule is a column check and
+"what can be started now" is an index scan on (…, open_predecessors, status).
+All updates are set-based and run in the caller's transaction.
+
+A status change and an edge insert touching the same predecessor must not
+interleave, or the successor keeps a count for a predecessor that is already
+done. Routes lock the task row (``access.live_task(for_write=True)``) before
+reading the status a change starts from, so two transitions of one task run
+one after the other and the second sees the first's result; new edges
+share-lock their predecessors before reading their status. Either side then
+waits for the other to commit (PostgreSQL; SQLite serializes writers anyway).
+
+Check or repair drift with::
+
+    python -m app.services.readiness [--fix]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from .. import models
+
+
+logger = logging.getLogger(__name__)
+
+# Statuses a task can be started from once nothing blocks it
+STARTABLE = (models.TaskStatus.backlog,)
+
+
+def _is_done(status) -> bool:
+    return status == models.TaskStatus.done
+
+
+def _lock(db: Session, task_ids: Iterable[int], *, shared: bool) -> None:
+    task = models.Task
+    db.execute(select(task.id).where(task.id.in_(list(task_ids))).with_for_update(read=shared))
+
+
+def _shift_successors(db: Session, task_id: int, delta: int) -> List[int]:
+    dep, task = models.TaskDependency, models.Task
+    # Waits for edges being added under this task; they are then visible below
+    _lock(db, [task_id], shared=False)
+    successor_ids = db.execute(select(dep.task_id).where(dep.depends_on_task_id == task_id)).scalars().all()
+    if successor_ids:
+        db.execute(
+            update(task)
+            .where(task.id.in_(successor_ids))
+            .values(open_predecessors=task.open_predecessors + delta)
+            .execution_options(synchronize_session=False)
+        )
+    return list(successor_ids)
+
+
+def on_status_changed(db: Session, task_id: int, before, after) -> List[int]:
+    """Adjust successors when a task moves into or out of done; returns their ids."""
+
+    if _is_done(before) == _is_done(after):
+        return []
+    return _shift_successors(db, task_id, -1 if _is_done(after) else 1)
+
+
+def on_edge_added(db: Session, predecessor_id: int, task_id: int) -> None:
+    """Count a new edge; the predecessor's status is read under a share lock."""
+
+    task, pred = models.Task, aliased(models.Task)
+    _lock(db, [predecessor_id], shared=True)
+    still_open = (
+        select(pred.id).where(pred.id == predecessor_id, pred.status != models.TaskStatus.done).exists()
+    )
+    db.execute(
+        update(task)
+        .where(task.id == task_id, still_open)
+        .values(open_predecessors=task.open_predecessors + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def on_edges_replaced(db: Session, task_id: int, predecessor_ids: Iterable[int]) -> None:
+    """Recount a task whose predecessors were replaced, with the new ones share-locked."""
+
+    predecessor_ids = list(predecessor_ids)
+    if predecessor_ids:
+        _lock(db, predecessor_ids, shared=True)
+    recount(db, task_ids=[task_id])
+
+
+def on_task_deleted(db: Session, task: models.Task) -> List[int]:
+    """Release the task's successors; call before the task and its dependencies are deleted."""
+
+    if _is_done(task.status):
+        return []
+    return _shift_successors(db, task.id, -1)
+
+
+def recount(db: Session, task_ids: Optional[Iterable[int]] = None, project_id: Optional[int] = None) -> None:
+    """Recompute the counter from task_dependencies for the given tasks (or all of them)."""
+
+    dep, task = models.TaskDependency, models.Task
+    pred = aliased(models.Task)
+    open_count = (
+        select(func.count())
+        .select_from(dep)
+        .join(pred, pred.id == dep.depends_on_task_id)
+        .where(dep.task_id == task.id, pred.status != models.TaskStatus.done)
+        .scalar_subquery()
+    )
+    stmt = update(task).values(open_predecessors=open_count).execution_options(synchronize_session=False)
+    if task_ids is not None:
+        stmt = stmt.where(task.id.in_(list(task_ids)))
+    if project_id is not None:
+        stmt = stmt.where(task.project_id == project_id)
+    db.execute(stmt)
+
+
+def drifted(db: Session, project_id: Optional[int] = None) -> List[int]:
+    """Ids of tasks whose stored counter differs from the true count, in either direction."""
+
+    dep, task = models.TaskDependency, models.Task
+    pred = aliased(models.Task)
+    open_count = (
+        select(dep.task_id, func.count().label("n"))
+        .join(pred, pred.id == dep.depends_on_task_id)
+        .where(pred.status != models.TaskStatus.done)
+        .group_by(dep.task_id)
+        .subquery()
+    )
+    q = (
+        select(task.id)
+        .outerjoin(open_count, open_count.c.task_id == task.id)
+        .where(task.open_predecessors != func.coalesce(open_count.c.n, 0))
+    )
+    if project_id is not None:
+        q = q.where(task.project_id == project_id)
+    return list(db.execute(q.order_by(task.id)).scalars())
+
+
+def ensure_counts(db: Session) -> int:
+    """Recount the tasks whose counter has drifted; returns how many were fixed.
+
+    Covers databases where the column was just added (every row defaults to 0)
+    as well as counters left too high or too low by an interrupted writer.
+    """
+
+    task_ids = drifted(db)
+    if task_ids:
+        recount(db, task_ids=task_ids)
+        db.commit()
+        logger.warning("Recounted open predecessors of %d tasks", len(task_ids))
+    return len(task_ids)
+
+
+def ready_tasks(
+    db: Session,
+    project_ids: Iterable[int],
+    assignee_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[models.Task]:
+    task = models.Task
+    q = (
+        db.query(task)
+        .filter(task.project_id.in_(list(project_ids)))
+        .filter(task.open_predecessors == 0, task.status.in_(STARTABLE))
+    )
+    if assignee_id is not None:
+        q = q.filter(task.assignee_id == assignee_id)
+    return q.order_by(task.id).limit(limit).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare open-predecessor counters with task_dependencies")
+    parser.add_argument("--project-id", type=int, default=None)
+    parser.add_argument("--fix", action="store_true", help="recount the tasks that differ")
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        task_ids = drifted(db, project_id=args.project_id)
+        if args.fix and task_ids:
+            recount(db, task_ids=task_ids)
+            db.commit()
+        print({"drifted": len(task_ids), "task_ids": task_ids[:50], "fixed": bool(args.fix and task_ids)})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -96,24 +96,32 @@ def build_graph_and_cpm(project_id: int, tasks: List[models.Task], dependencies:
         for tid in topo_order
     ]
 
-    # Mark transitive edges for visualization (keep them but style as dashed/transparent)
-    # Edge u->v is redundant if there exists an alternative path from u to v
-    def has_alternative_path(u: int, v: int) -> bool:
-        stack = list(adjacency.get(u, []))
-        # skip the direct edge u->v
-        stack = [x for x in stack if x != v]
-        seen = set([u])
-        while stack:
-            w = stack.pop()
-            if w == v:
-                return True
-            if w in seen:
-                continue
-            seen.add(w)
-            for nxt in adjacency.get(w, []):
-                if nxt not in seen:
-                    stack.append(nxt)
-        return False
+    # Mark transitive edges for visualization (keep them but style as dashed/transparent).
+    # Edge u->v is redundant if v is also reachable through another child of u. Nodes are
+    # visited in reverse topological order with one reachability bitset each (bit = visit
+    # index, so descendants occupy the low bits); u's out-edges are tested as soon as its
+    # children are known, and a child's bitset is dropped once its last parent is done.
+    order = {tid: i for i, tid in enumerate(reversed(topo_order))}
+    parents_left: Dict[int, int] = {tid: len(reverse_adj.get(tid, ())) for tid in id_to_task}
+    reach: Dict[int, int] = {}
+    redundant_edges = set()
+    for u in reversed(topo_order):
+        children = adjacency.get(u, [])
+        # A node never reaches itself, so the direct child v is not in its own reach
+        below = 0
+        for c in children:
+            below |= reach[c]
+        for c in children:
+            if below >> order[c] & 1:
+                redundant_edges.add((u, c))
+        if parents_left[u]:
+            for c in children:
+                below |= 1 << order[c]
+            reach[u] = below
+        for c in children:
+            parents_left[c] -= 1
+            if not parents_left[c]:
+                del reach[c]
 
     dep_type_map: Dict[Tuple[int, int], models.DependencyType] = {}
     for dep in dependencies:
@@ -126,7 +134,7 @@ def build_graph_and_cpm(project_id: int, tasks: List[models.Task], dependencies:
                 source=u,
                 target=v,
                 dependency_type=dep_type_map[(u, v)],
-                redundant=has_alternative_path(u, v),
+                redundant=(u, v) in redundant_edges,
             )
         )
 
@@ -0,0 +1,202 @@
+"""Stored CPM results for baseline comparison.
+
+Take scheduled snapshots of every project from cron, e.g. weekly::
+
+    python -m app.services.snapshots
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from .scheduling import build_graph_and_cpm
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# version, task count, critical path length
+_HEADER = struct.Struct("<BII")
+
+
+@dataclass
+class Schedule:
+    duration: int
+    # task id -> (es, ef, slack)
+    tasks: Dict[int, Tuple[int, int, int]]
+    critical_path: List[int]
+
+
+def _deltas(values: List[int]) -> array:
+    return array("i", (value - prev for prev, value in zip([0, *values], values)))
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array("i", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read(buf: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    values = array("i")
+    end = offset + count * values.itemsize
+    values.frombytes(buf[offset:end])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values, end
+
+
+def encode(schedule: Schedule) -> bytes:
+    """Pack a schedule into one blob.
+
+    Tasks are ordered by id and each column (id, es, ef, slack) is stored as
+    int32 deltas from the previous task, so ids become small gaps and the
+    zlib pass removes most of the remaining bytes.
+    """
+
+    ids = sorted(schedule.tasks)
+    columns = [ids] + [[schedule.tasks[tid][i] for tid in ids] for i in range(3)]
+    body = b"".join(_le_bytes(_deltas(column)) for column in columns)
+    body += _le_bytes(array("i", schedule.critical_path))
+    header = _HEADER.pack(FORMAT_VERSION, len(ids), len(schedule.critical_path))
+    return header + zlib.compress(body)
+
+
+def decode(blob: bytes, duration: int) -> Schedule:
+    version, count, path_len = _HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {version}")
+    buf = memoryview(zlib.decompress(blob[_HEADER.size :]))
+    offset = 0
+    columns = []
+    for _ in range(4):
+        values, offset = _read(buf, offset, count)
+        columns.append(accumulate(values))
+    path, _ = _read(buf, offset, path_len)
+    ids, es, ef, slack = columns
+    tasks = {tid: (start, finish, slack_) for tid, start, finish, slack_ in zip(ids, es, ef, slack)}
+    return Schedule(duration=duration, tasks=tasks, critical_path=list(path))
+
+
+def from_analysis(analysis: schemas.GraphAnalysis) -> Schedule:
+    return Schedule(
+        duration=analysis.duration,
+        tasks={node.id: (node.es, node.ef, node.slack) for node in analysis.nodes},
+        critical_path=list(analysis.critical_path),
+    )
+
+
+def live_schedule(db: Session, project_id: int) -> Schedule:
+    tasks = db.query(models.Task).filter(models.Task.project_id == project_id).all()
+    deps = (
+        db.query(models.TaskDependency)
+        .join(models.Task, models.Task.id == models.TaskDependency.task_id)
+        .filter(models.Task.project_id == project_id)
+        .all()
+    )
+    return from_analysis(build_graph_and_cpm(project_id=project_id, tasks=tasks, dependencies=deps))
+
+
+def take_snapshot(
+    db: Session,
+    project_id: int,
+    kind: str = "manual",
+    label: Optional[str] = None,
+    created_by: Optional[int] = None,
+) -> models.ScheduleSnapshot:
+    """Store the live schedule of a project; the caller commits."""
+
+    schedule = live_schedule(db, project_id)
+    snapshot = models.ScheduleSnapshot(
+        project_id=project_id,
+        kind=kind,
+        label=label,
+        created_by=created_by,
+        task_count=len(schedule.tasks),
+        duration=schedule.duration,
+        data=encode(schedule),
+    )
+    db.add(snapshot)
+    return snapshot
+
+
+def load(snapshot: models.ScheduleSnapshot) -> Schedule:
+    return decode(snapshot.data, snapshot.duration)
+
+
+def diff(base: Schedule, target: Schedule, limit: Optional[int] = None) -> dict:
+    """Per-task changes from ``base`` to ``target``, largest finish slip first."""
+
+    changed = []
+    base_tasks, target_tasks = base.tasks, target.tasks
+    for tid, new in target_tasks.items():
+        old = base_tasks.get(tid)
+        if old is None or old == new:
+            continue
+        changed.append(
+            {
+                "task_id": tid,
+                "es_delta": new[0] - old[0],
+                "ef_delta": new[1] - old[1],
+                "slack_delta": new[2] - old[2],
+                "was_critical": old[2] == 0,
+                "is_critical": new[2] == 0,
+            }
+        )
+    changed.sort(key=lambda row: (-abs(row["ef_delta"]), -abs(row["es_delta"]), row["task_id"]))
+    return {
+        "duration_delta": target.duration - base.duration,
+        "base_duration": base.duration,
+        "target_duration": target.duration,
+        "base_critical_path": base.critical_path,
+        "target_critical_path": target.critical_path,
+        "added": sorted(target_tasks.keys() - base_tasks.keys()),
+        "removed": sorted(base_tasks.keys() - target_tasks.keys()),
+        "changed_count": len(changed),
+        "changed": changed if limit is None else changed[:limit],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Store a scheduled CPM snapshot of every project")
+    parser.add_argument("--project-id", type=int, default=None)
+    args = parser.parse_args()
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        q = db.query(models.Project.id)
+        if args.project_id is not None:
+            q = q.filter(models.Project.id == args.project_id)
+        taken, failed = 0, 0
+        for (project_id,) in q.order_by(models.Project.id).all():
+            try:
+                take_snapshot(db, project_id, kind="scheduled")
+                db.commit()
+                taken += 1
+            except ValueError:
+                # Cyclic graphs have no schedule to store
+                db.rollback()
+                failed += 1
+                logger.warning("Skipped snapshot of project %s: dependency cycle", project_id)
+        print({"snapshots": taken, "skipped": failed})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""Synthetic data at production scale for load tests, benchmarks and profiling.
+
+Generates users, projects with members, tasks on layered dependency DAGs,
+and task chats, deterministically from a seed: the same arguments against
+an empty database always produce the same rows and ids. Each task depends
+on up to ``fan_in`` tasks from the previous ``span`` layers, and no task
+gets more than ``fan_out`` successors. Statuses follow the graph: done
+tasks are a prefix of a random topological order, and tasks in progress
+or in review are the unblocked ones first, then those with the fewest
+unfinished predecessors.
+
+Rows are built in memory with explicit ids above the current maximum,
+then bulk-loaded: ``COPY … FROM STDIN`` on PostgreSQL (sequences are moved
+past the new ids afterwards) and ``executemany`` elsewhere. The derived
+state the API relies on (open predecessor counts, the reachability index,
+chat read markers with unread counts, dashboard counters) is written at the
+same time. Run it against a database
+nothing else is writing to::
+
+    python -m app.services.synthetic --projects 20 --users 200 --tasks 2000 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import dashboard
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_MIX = {"backlog": 0.5, "in_progress": 0.2, "review": 0.1, "done": 0.2}
+PASSWORD = "password"
+EMAIL_DOMAIN = "synthetic.example"
+# Rows per executemany batch on SQLite
+BATCH = 5000
+
+_FIRST_NAMES = ["Анна", "Борис", "Вера", "Глеб", "Дарья", "Егор", "Инна", "Кирилл", "Лада", "Марк", "Нина", "Олег"]
+_LAST_NAMES = ["Иванов", "Петров", "Соколов", "Орлов", "Волков", "Зайцев", "Павлов", "Морозов", "Лебедев", "Козлов"]
+_VERBS = ["Проектирование", "Разработка", "Тестирование", "Интеграция", "Настройка", "Согласование", "Миграция"]
+_NOUNS = ["модуля отчётов", "API", "платёжного шлюза", "личного кабинета", "хранилища", "уведомлений", "каталога"]
+_PHRASES = [
+    "Взял в работу.",
+    "Есть вопрос по требованиям, созвонимся?",
+    "Выложил черновик, посмотрите.",
+    "Блокирует смежная задача, жду.",
+    "Готово, можно проверять.",
+    "Нашёл проблему, исправляю.",
+]
+
+
+@dataclass
+class Spec:
+    projects: int = 10
+    users: int = 50
+    # Tasks per project
+    tasks: int = 200
+    # Layers per project; 0 picks about sqrt(tasks)
+    layers: int = 0
+    fan_in: int = 3
+    fan_out: int = 4
+    # How many layers back a predecessor may be
+    span: int = 2
+    status_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_STATUS_MIX))
+    # Mean chat messages per task
+    messages: float = 2.0
+    # Executors per project besides its manager
+    members: int = 8
+    seed: int = 1
+    start: date = date(2026, 1, 5)
+
+
+def parse_status_mix(value: str) -> Dict[str, float]:
+    """``"backlog=0.5,done=0.5"`` -> weights normalised to 1. Raises ValueError."""
+
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        models.TaskStatus(name.strip())
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(value)
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def layered_dag(
+    rng: random.Random,
+    tasks: int,
+    layers: int = 0,
+    fan_in: int = 3,
+    fan_out: int = 4,
+    span: int = 2,
+) -> Tuple[List[int], List[Tuple[int, int]]]:
+    """Layer of each task index and (predecessor, successor) index pairs.
+
+    Indexes are in layer order, so they are also a topological order.
+    """
+
+    if tasks <= 0:
+        return [], []
+    layers = max(1, min(tasks, layers or round(tasks ** 0.5)))
+    bounds = [round(tasks * i / layers) for i in range(layers + 1)]
+    layer_of = [layer for layer in range(layers) for _ in range(bounds[layer], bounds[layer + 1])]
+    out_degree = [0] * tasks
+    edges = []
+    for task in range(bounds[1], tasks):
+        layer = layer_of[task]
+        candidates = range(bounds[max(0, layer - span)], bounds[layer])
+        wanted = rng.randint(1, max(1, fan_in))
+        for pred in rng.sample(candidates, min(wanted, len(candidates))):
+            if out_degree[pred] < fan_out:
+                out_degree[pred] += 1
+                edges.append((pred, task))
+    return layer_of, edges
+
+
+def _closure(tasks: Sequence[int], edges: Sequence[Tuple[int, int]]) -> Dict[int, Dict[int, int]]:
+    """Ancestor -> shortest chain length for every task; ``tasks`` in topological order."""
+
+    preds: Dict[int, List[int]] = {task: [] for task in tasks}
+    for pred, task in edges:
+        preds[task].append(pred)
+    above: Dict[int, Dict[int, int]] = {}
+    for task in tasks:
+        depths: Dict[int, int] = {}
+        for pred in preds[task]:
+            depths[pred] = 1
+            for ancestor, depth in above[pred].items():
+                if depths.get(ancestor, depth + 2) > depth + 1:
+                    depths[ancestor] = depth + 1
+        above[task] = depths
+    return above
+
+
+def _statuses(rng: random.Random, count: int, edges: Sequence[Tuple[int, int]], mix: Dict[str, float]) -> List[str]:
+    preds: List[List[int]] = [[] for _ in range(count)]
+    succs: List[List[int]] = [[] for _ in range(count)]
+    for pred, task in edges:
+        preds[task].append(pred)
+        succs[pred].append(task)
+    # Finish tasks in a random topological order, so the done part of the
+    # graph has a ragged edge like a real project instead of whole layers
+    waiting = [len(p) for p in preds]
+    ready = [task for task in range(count) if not waiting[task]]
+    statuses = ["backlog"] * count
+    for _ in range(min(count, round(count * mix.get("done", 0.0)))):
+        task = ready.pop(rng.randrange(len(ready)))
+        statuses[task] = "done"
+        for succ in succs[task]:
+            waiting[succ] -= 1
+            if not waiting[succ]:
+                ready.append(succ)
+    # Started work goes to unblocked tasks first, then to the least blocked ones
+    # (an admin can start those), so the requested mix is honoured
+    ready.sort()
+    rng.shuffle(ready)
+    blocked = [task for task in range(count) if statuses[task] == "backlog" and waiting[task]]
+    rng.shuffle(blocked)
+    blocked.sort(key=lambda task: waiting[task])
+    started = iter(ready + blocked)
+    for status in ("in_progress", "review"):
+        for _ in range(round(count * mix.get(status, 0.0))):
+            task = next(started, None)
+            if task is None:
+                break
+            statuses[task] = status
+    return statuses
+
+
+def _next_ids(db: Session) -> Dict[str, int]:
+    tables = [
+        models.User, models.Project, models.ProjectMember, models.Task, models.TaskDependency, models.TaskMessage,
+        models.TaskChatRead,
+    ]
+    return {
+        model.__tablename__: (db.execute(select(func.max(model.id))).scalar() or 0) + 1 for model in tables
+    }
+
+
+def generate(spec: Spec, next_ids: Dict[str, int], password_hash: str) -> Dict[str, List[dict]]:
+    """All rows to insert, per table, in foreign-key order."""
+
+    rng = random.Random(spec.seed)
+    rows: Dict[str, List[dict]] = {
+        name: []
+        for name in (
+            "users", "projects", "project_members", "tasks", "task_dependencies", "task_reachability", "task_messages",
+            "task_chat_reads",
+        )
+    }
+    ids = dict(next_ids)
+
+    def take(table: str) -> int:
+        ids[table] += 1
+        return ids[table] - 1
+
+    created = datetime.combine(spec.start, datetime.min.time())
+    managers, executors = [], []
+    for n in range(spec.users):
+        user_id = take("users")
+        is_manager = n < max(1, spec.users // 10)
+        (managers if is_manager else executors).append(user_id)
+        rows["users"].append(
+            {
+                "id": user_id,
+                "email": f"user{user_id}@{EMAIL_DOMAIN}",
+                "password_hash": password_hash,
+                "full_name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                "role": (models.UserRole.manager if is_manager else models.UserRole.executor).name,
+            }
+        )
+    executors = executors or managers
+
+    for n in range(spec.projects):
+        project_id = take("projects")
+        manager_id = rng.choice(managers) if managers else None
+        layer_of, edges = layered_dag(rng, spec.tasks, spec.layers, spec.fan_in, spec.fan_out, spec.span)
+        last_layer = layer_of[-1] if layer_of else 0
+        rows["projects"].append(
+            {
+                "id": project_id,
+                "name": f"Синтетический проект {project_id}",
+                "description": f"Сгенерировано: seed={spec.seed}, задач={spec.tasks}",
+                "start_date": spec.start,
+                "deadline": spec.start + timedelta(days=7 * (last_layer + 2)),
+                "customer": f"Заказчик {n % 7 + 1}",
+                "manager_id": manager_id,
+                "budget_plan": float(rng.randrange(100, 5000) * 1000),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+        team = sorted(rng.sample(executors, min(spec.members, len(executors))))
+        people = sorted(set(team) | ({manager_id} if manager_id else set()))
+        for user_id in people:
+            rows["project_members"].append({"id": take("project_members"), "project_id": project_id, "user_id": user_id})
+
+        statuses = _statuses(rng, len(layer_of), edges, spec.status_mix)
+        task_ids = [take("tasks") for _ in layer_of]
+        open_predecessors = [0] * len(layer_of)
+        assignees = []
+        for pred, task in edges:
+            if statuses[pred] != "done":
+                open_predecessors[task] += 1
+        for index, task_id in enumerate(task_ids):
+            rows["tasks"].append(
+                {
+                    "id": task_id,
+                    "name": f"{rng.choice(_VERBS)} {rng.choice(_NOUNS)} #{index + 1}",
+                    "description": None,
+                    "project_id": project_id,
+                    "assignee_id": rng.choice(people) if people and rng.random() < 0.85 else None,
+                    "status": statuses[index],
+                    "priority": rng.choices(["low", "medium", "high"], weights=[3, 5, 2])[0],
+                    "duration_plan": rng.randint(1, 10),
+                    "deadline": spec.start + timedelta(days=7 * (layer_of[index] + 1) + rng.randint(0, 6)),
+                    "open_predecessors": open_predecessors[index],
+                    "created_at": created,
+                    "updated_at": created,
+                }
+            )
+            assignees.append(rows["tasks"][-1]["assignee_id"])
+        for pred, task in edges:
+            rows["task_dependencies"].append(
+                {
+                    "id": take("task_dependencies"),
+                    "task_id": task_ids[task],
+                    "depends_on_task_id": task_ids[pred],
+                    "dependency_type": models.DependencyType.blocks.name,
+                }
+            )
+        for task, ancestors in _closure(range(len(task_ids)), edges).items():
+            for ancestor, depth in ancestors.items():
+                rows["task_reachability"].append(
+                    {
+                        "ancestor_id": task_ids[ancestor],
+                        "descendant_id": task_ids[task],
+                        "project_id": project_id,
+                        "depth": depth,
+                    }
+                )
+        if people and spec.messages > 0:
+            for task_id, assignee_id in zip(task_ids, assignees):
+                at = created
+                # Read markers as chat_unread maintains them: the assignee and the manager get one with
+                # the first message, authors are moved to their own message, and every marker counts
+                # the later messages by others until its user reads the chat
+                participants = {uid for uid in (assignee_id, manager_id) if uid is not None}
+                markers: Dict[int, dict] = {}
+                for _ in range(int(rng.expovariate(1 / spec.messages))):
+                    at += timedelta(minutes=rng.randint(1, 3 * 24 * 60))
+                    message_id, author_id = take("task_messages"), rng.choice(people)
+                    rows["task_messages"].append(
+                        {
+                            "id": message_id,
+                            "task_id": task_id,
+                            "author_id": author_id,
+                            "content": rng.choice(_PHRASES),
+                            "created_at": at,
+                        }
+                    )
+                    for user_id in participants:
+                        markers.setdefault(
+                            user_id, {"last_read_message_id": None, "last_read_at": None, "unread_count": 0}
+                        )
+                    for user_id, marker in markers.items():
+                        if user_id == author_id or rng.random() < 0.3:
+                            marker.update(last_read_message_id=message_id, last_read_at=at, unread_count=0)
+                        else:
+                            marker["unread_count"] += 1
+                    if author_id not in markers:
+                        markers[author_id] = {"last_read_message_id": message_id, "last_read_at": at, "unread_count": 0}
+                for user_id in sorted(markers):
+                    rows["task_chat_reads"].append(
+                        {"id": take("task_chat_reads"), "user_id": user_id, "task_id": task_id, **markers[user_id]}
+                    )
+    return rows
+
+
+def _copy(db: Session, table: Table, rows: List[dict]) -> None:
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def load(db: Session, spec: Spec) -> Dict[str, int]:
+    """Generate and insert the data set in one transaction; returns row counts per table."""
+
+    from ..auth import get_password_hash
+
+    rows = generate(spec, _next_ids(db), get_password_hash(PASSWORD))
+    postgres = db.get_bind().dialect.name == "postgresql"
+    for name, table_rows in rows.items():
+        if not table_rows:
+            continue
+        table = models.Base.metadata.tables[name]
+        if postgres:
+            _copy(db, table, table_rows)
+        else:
+            for i in range(0, len(table_rows), BATCH):
+                db.execute(table.insert(), table_rows[i : i + BATCH])
+    if postgres:
+        for name in rows:
+            if "id" in models.Base.metadata.tables[name].c:
+                db.execute(
+                    text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT max(id) FROM {name}))")
+                )
+    for project in rows["projects"]:
+        dashboard.recompute(db, project["id"])
+    db.commit()
+    return {name: len(table_rows) for name, table_rows in rows.items()}
+
+
+def main() -> None:
+    defaults = Spec()
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic projects, tasks and chats")
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--tasks", type=int, default=defaults.tasks, help="tasks per project")
+    parser.add_argument("--layers", type=int, default=defaults.layers, help="layers per project (0: about sqrt(tasks))")
+    parser.add_argument("--fan-in", type=int, default=defaults.fan_in)
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out)
+    parser.add_argument("--span", type=int, default=defaults.span, help="how many layers back a predecessor may be")
+    parser.add_argument(
+        "--status-mix",
+        type=parse_status_mix,
+        default=defaults.status_mix,
+        help="e.g. backlog=0.5,in_progress=0.2,review=0.1,done=0.2",
+    )
+    parser.add_argument("--messages", type=float, default=defaults.messages, help="mean chat messages per task")
+    parser.add_argument("--members", type=int, default=defaults.members, help="executors per project")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--start", type=date.fromisoformat, default=defaults.start, help="project start date")
+    args = parser.parse_args()
+    spec = Spec(**{name: getattr(args, name) for name in Spec.__dataclass_fields__})
+
+    from ..db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = load(db, spec)
+        counts["seconds"] = round(time.perf_counter() - started, 2)
+        print(json.dumps(counts))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
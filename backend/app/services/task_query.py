@@ -0,0 +1,139 @@
+"""Filtering, sorting and keyset pagination for task lists.
+
+Filters are validated query parameters turned into plain column predicates,
+always scoped to one project so they land on the (project_id, …, id)
+composite indexes declared on ``models.Task``. Each sort key is paired with
+``id`` as a tie-breaker and pages continue with a keyset condition on
+(key, id) instead of OFFSET, so pages stay stable while rows change. The
+condition is a row-value comparison, which both PostgreSQL and SQLite turn
+into an index seek to the cursor. ``deadline`` can be NULL; those rows sort
+last in both directions, and the extra ``OR deadline IS NULL`` leaves that
+key a filtered index scan rather than a seek.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Query, Session
+
+from .. import models
+from .pagination import decode_cursor, encode_cursor, parse_datetime, split_page
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+# Sort key -> (column, cursor value parser); each has a (project_id, key, id) index
+SORT_KEYS: dict = {
+    "id": (models.Task.id, int),
+    "deadline": (models.Task.deadline, _parse_date),
+    "updated_at": (models.Task.updated_at, parse_datetime),
+    "name": (models.Task.name, str),
+}
+NULLABLE_KEYS = {"deadline"}
+
+
+@dataclass
+class TaskFilter:
+    project_id: int
+    status: List[models.TaskStatus] = field(default_factory=list)
+    priority: List[models.TaskPriority] = field(default_factory=list)
+    assignee_ids: List[int] = field(default_factory=list)
+    unassigned: bool = False
+    deadline_from: Optional[date] = None
+    deadline_to: Optional[date] = None
+    text: Optional[str] = None
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """``"deadline"`` / ``"-deadline"`` -> (key, descending). Raises ValueError."""
+
+    descending = sort.startswith("-")
+    key = sort[1:] if descending else sort
+    if key not in SORT_KEYS:
+        raise ValueError(key)
+    return key, descending
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_filter(q: Query, f: TaskFilter) -> Query:
+    task = models.Task
+    q = q.filter(task.project_id == f.project_id)
+    if f.status:
+        q = q.filter(task.status.in_(f.status))
+    if f.priority:
+        q = q.filter(task.priority.in_(f.priority))
+    if f.assignee_ids and f.unassigned:
+        q = q.filter(or_(task.assignee_id.in_(f.assignee_ids), task.assignee_id.is_(None)))
+    elif f.assignee_ids:
+        q = q.filter(task.assignee_id.in_(f.assignee_ids))
+    elif f.unassigned:
+        q = q.filter(task.assignee_id.is_(None))
+    if f.deadline_from is not None:
+        q = q.filter(task.deadline >= f.deadline_from)
+    if f.deadline_to is not None:
+        q = q.filter(task.deadline <= f.deadline_to)
+    if f.text:
+        q = q.filter(task.name.ilike(f"%{_escape_like(f.text)}%", escape="\\"))
+    return q
+
+
+def _after(key: str, descending: bool, value: Any, last_id: int):
+    """Rows strictly after (value, last_id) in the page order."""
+
+    column = SORT_KEYS[key][0]
+    task_id = models.Task.id
+    if key == "id":
+        return task_id < last_id if descending else task_id > last_id
+    if value is None:
+        # Already in the NULL tail, which is ordered by id alone
+        return and_(column.is_(None), task_id < last_id if descending else task_id > last_id)
+    if descending:
+        after = tuple_(column, task_id) < tuple_(value, last_id)
+    else:
+        after = tuple_(column, task_id) > tuple_(value, last_id)
+    if key in NULLABLE_KEYS:
+        after = or_(after, column.is_(None))
+    return after
+
+
+def _order(key: str, descending: bool) -> list:
+    column = SORT_KEYS[key][0]
+    task_id = models.Task.id
+    if key == "id":
+        return [task_id.desc() if descending else task_id.asc()]
+    ordered = column.desc() if descending else column.asc()
+    if key in NULLABLE_KEYS:
+        ordered = ordered.nulls_last()
+    return [ordered, task_id.desc() if descending else task_id.asc()]
+
+
+def search(
+    db: Session,
+    f: TaskFilter,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[models.Task], Optional[str]]:
+    """One page of matching tasks and the cursor for the next one. Raises ValueError on a bad sort or cursor."""
+
+    key, descending = parse_sort(sort)
+    q = apply_filter(db.query(models.Task), f)
+    if cursor:
+        parse: Callable[[str], Any] = SORT_KEYS[key][1]
+        value, last_id = decode_cursor(cursor, parse, int)
+        q = q.filter(_after(key, descending, value, last_id))
+    rows, has_more = split_page(q.order_by(*_order(key, descending)).limit(limit + 1).all(), limit)
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, key), last.id)
+    return rows, next_cursor
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+# Other workers write users too; reload the whole index lazily after this many seconds
+RELOAD_SECONDS = float(os.getenv("USER_INDEX_RELOAD_SECONDS", "300"))
+FIELDS = ("email", "full_name", "nickname")
+GRAM = 3
+# Word prefixes up to this length get their own postings; they cover the best-ranked matches
+PREFIX_MAX = 12
+
+
+def _grams(text: str) -> Set[str]:
+    """All substrings of length 1..GRAM, so short queries are a single lookup."""
+    out: Set[str] = set()
+    for n in range(1, GRAM + 1):
+        for i in range(len(text) - n + 1):
+            out.add(text[i : i + n])
+    return out
+
+
+def _words(text: str) -> List[str]:
+    return [text, *text.replace("@", " ").replace(".", " ").split()]
+
+
+def _prefixes(text: str) -> Set[str]:
+    out: Set[str] = set()
+    for word in _words(text):
+        for n in range(1, min(len(word), PREFIX_MAX) + 1):
+            out.add(word[:n])
+    return out
+
+
+class _Entry:
+    __slots__ = ("id", "email", "full_name", "nickname", "role", "keys")
+
+    def __init__(self, id: int, email: str, full_name: str, nickname: Optional[str], role: models.UserRole) -> None:
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.nickname = nickname
+        self.role = role
+        self.keys = tuple((getattr(self, f) or "").lower() for f in FIELDS)
+
+    def public(self) -> dict:
+        return {"id": self.id, "email": self.email, "full_name": self.full_name, "nickname": self.nickname, "role": self.role}
+
+
+NO_MATCH = 99
+
+
+def _rank(entry: _Entry, q: str) -> int:
+    """Lower is better: exact field, field prefix, word prefix, plain substring."""
+    best = NO_MATCH
+    for pos, key in enumerate(entry.keys):
+        if not key or q not in key:
+            continue
+        if key == q:
+            score = 0
+        elif key.startswith(q):
+            score = 1
+        elif any(word.startswith(q) for word in _words(key)):
+            score = 2
+        else:
+            score = 3
+        best = min(best, score * len(FIELDS) + pos)
+    return best
+
+
+class UserSearchIndex:
+    """Per-process n-gram index over users' email, full name and nickname.
+
+    Matches the semantics of the former ``ilike '%q%'`` scan (case-insensitive
+    substring on any field) but answers from memory. Word-prefix postings give
+    the best-ranked matches directly; only when they are not enough does the
+    search fall back to n-gram postings (one lookup for queries up to three
+    characters, a trigram intersection for longer ones).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[int, _Entry] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._prefix_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._loaded_at = 0.0
+
+    def load(self, db: Session) -> None:
+        rows = db.execute(
+            select(models.User.id, models.User.email, models.User.full_name, models.User.nickname, models.User.role)
+        ).all()
+        entries = {row.id: _Entry(row.id, row.email, row.full_name, row.nickname, row.role) for row in rows}
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        prefix_postings: Dict[str, Set[int]] = defaultdict(set)
+        for entry in entries.values():
+            for gram in self._entry_grams(entry):
+                postings[gram].add(entry.id)
+            for prefix in self._entry_prefixes(entry):
+                prefix_postings[prefix].add(entry.id)
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self._prefix_postings = prefix_postings
+            self._loaded_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at > RELOAD_SECONDS
+
+    @staticmethod
+    def _entry_grams(entry: _Entry) -> Set[str]:
+        grams: Set[str] = set()
+        for key in entry.keys:
+            grams |= _grams(key)
+        return grams
+
+    @staticmethod
+    def _entry_prefixes(entry: _Entry) -> Set[str]:
+        prefixes: Set[str] = set()
+        for key in entry.keys:
+            prefixes |= _prefixes(key)
+        return prefixes
+
+    def upsert(self, user: models.User) -> None:
+        self.upsert_row(user.id, user.email, user.full_name, user.nickname, user.role)
+
+    def upsert_row(self, id: int, email: str, full_name: str, nickname: Optional[str], role: models.UserRole) -> None:
+        entry = _Entry(id, email, full_name, nickname, role)
+        with self._lock:
+            self._discard(id)
+            self._entries[id] = entry
+            for gram in self._entry_grams(entry):
+                self._postings[gram].add(id)
+            for prefix in self._entry_prefixes(entry):
+                self._prefix_postings[prefix].add(id)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            self._discard(user_id)
+
+    def _discard(self, user_id: int) -> None:
+        old = self._entries.pop(user_id, None)
+        if old is None:
+            return
+        for postings, keys in ((self._postings, self._entry_grams(old)), (self._prefix_postings, self._entry_prefixes(old))):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(user_id)
+                    if not ids:
+                        del postings[key]
+
+    def search(self, q: str, limit: int = 20, preferred: Optional[Set[int]] = None) -> List[dict]:
+        """Top ``limit`` matches; ids in ``preferred`` (e.g. project members) rank first."""
+
+        q = q.strip().lower()
+        if not q:
+            return []
+        preferred = preferred or set()
+        with self._lock:
+            # Preferred users (ranked by _rank below), then the best-ranked prefix matches
+            pool = {uid for uid in preferred if uid in self._entries}
+            if len(q) <= PREFIX_MAX:
+                pool |= self._prefix_postings.get(q, set())
+            if len(pool - preferred) < limit:
+                pool |= self._substring_ids(q)
+            entries = [self._entries[uid] for uid in pool]
+        scored = []
+        for entry in entries:
+            rank = _rank(entry, q)
+            if rank != NO_MATCH:
+                scored.append((entry.id not in preferred, rank, entry.id, entry))
+        ranked = heapq.nsmallest(limit, scored, key=lambda item: item[:3])
+        return [item[3].public() for item in ranked]
+
+    def _substring_ids(self, q: str) -> Set[int]:
+        """Candidate ids containing every trigram of ``q`` (exact for short queries)."""
+        if len(q) <= GRAM:
+            return self._postings.get(q, set())
+        postings = sorted((self._postings.get(q[i : i + GRAM], set()) for i in range(len(q) - GRAM + 1)), key=len)
+        if not postings[0]:
+            return set()
+        return postings[0].intersection(*postings[1:])
+
+
+user_index = UserSearchIndex()
@@ -0,0 +1,5 @@
+"""Performance benchmarks; run modules with ``python -m benchmarks.<name>`` from ``backend/``.
+
+``suite`` runs the scheduling and route benchmarks together and ``compare`` checks
+two saved runs against a slowdown threshold.
+"""
@@ -0,0 +1,72 @@
+"""Shared helpers: latency summaries and the JSON result files ``compare`` reads."""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import List, Optional
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summary(latencies: List[float], elapsed: float) -> dict:
+    """Latencies in seconds -> count, throughput and p50/p95/mean in milliseconds."""
+
+    return {
+        "count": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def use_scratch_database() -> None:
+    """Point the app at a throwaway SQLite file unless DATABASE_URL is set; call before importing ``app``."""
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    """Where the numbers came from, stored next to them so runs can be told apart."""
+
+    url = os.environ.get("DATABASE_URL", "")
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": url.split(":", 1)[0] if url else None,
+    }
+
+
+def emit(result: dict, out: Optional[str]) -> None:
+    """Print the result and, with ``out``, also save it for ``python -m benchmarks.compare``."""
+
+    result = {"meta": environment(), **result}
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if out:
+        with open(out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
@@ -0,0 +1,85 @@
+"""Compare two benchmark result files and flag slowdowns.
+
+Any JSON written with ``--out`` works; values are matched by their path.
+Only the steady metrics are checked: median timings may grow and
+throughput may drop by at most ``--threshold``, and statement counts may
+not grow at all (tails and minimums are too noisy on shared machines).
+Exits with status 1 when something regressed::
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SKIPPED = {"meta", "dataset"}
+CHECKED = {"median_ms", "p50_ms", "throughput_rps", "queries"}
+
+
+def flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for key, value in data.items():
+        if not prefix and key in SKIPPED:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = float(value)
+    return values
+
+
+def _verdict(path: str, old: float, new: float, threshold: float, min_ms: float) -> Optional[str]:
+    """Why ``new`` is a regression against ``old``, or None."""
+
+    metric = path.rsplit(".", 1)[-1]
+    if metric == "queries":
+        return f"{old:g} -> {new:g} statements" if new > old else None
+    if metric.endswith("_ms"):
+        if new - old >= min_ms and new > old * (1 + threshold):
+            return f"{old:g} -> {new:g} ms (+{(new / old - 1) * 100 if old else 100:.0f}%)"
+        return None
+    if metric.endswith("_rps"):
+        if new < old * (1 - threshold):
+            return f"{old:g} -> {new:g} rps (-{(1 - new / old) * 100:.0f}%)"
+    return None
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float = 1.0) -> Tuple[List[str], int]:
+    """Regression messages and the number of checked metrics present in both runs."""
+
+    old, new = flatten(baseline), flatten(current)
+    shared = sorted(path for path in set(old) & set(new) if path.rsplit(".", 1)[-1] in CHECKED)
+    regressions = []
+    for path in shared:
+        reason = _verdict(path, old[path], new[path], threshold, min_ms)
+        if reason:
+            regressions.append(f"{path}: {reason}")
+    return regressions, len(shared)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore timing changes smaller than this")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.current, encoding="utf-8") as fh:
+        current = json.load(fh)
+    regressions, compared = compare(baseline, current, args.threshold, args.min_ms)
+    for line in regressions:
+        print(f"SLOWER {line}")
+    print(f"{compared} metrics compared, {len(regressions)} regressed")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
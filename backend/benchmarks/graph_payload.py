@@ -0,0 +1,119 @@
+"""GraphAnalysis payload: size and encode time of JSON vs columnar encodings.
+
+Builds a synthetic layered graph in memory (no database) and encodes it the
+way the API would::
+
+    python -m benchmarks.graph_payload --nodes 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict
+
+import brotli
+import msgpack
+from fastapi.encoders import jsonable_encoder
+
+from app import schemas
+from app.responses import graph_columns
+from app.services.layout import compute_layout
+
+from .common import emit
+
+
+def build_analysis(nodes: int, seed: int = 7) -> schemas.GraphAnalysis:
+    rng = random.Random(seed)
+    statuses = list(schemas.TaskStatus)
+    graph_nodes = []
+    edges = []
+    for tid in range(1, nodes + 1):
+        es = rng.randint(0, nodes // 10)
+        duration = rng.randint(1, 15)
+        slack = rng.choice([0, 0, 3, 8, 20])
+        graph_nodes.append(
+            schemas.GraphNode(
+                id=tid,
+                name=f"Задача {tid}",
+                duration=duration,
+                es=es,
+                ef=es + duration,
+                ls=es + slack,
+                lf=es + duration + slack,
+                slack=slack,
+                is_critical=slack == 0,
+                status=rng.choice(statuses),
+            )
+        )
+        for _ in range(rng.randint(0, 3) if tid > 1 else 0):
+            src = rng.randint(max(1, tid - 50), tid - 1)
+            edges.append(schemas.GraphEdge(source=src, target=tid, dependency_type=schemas.DependencyType.blocks))
+    unique = {(e.source, e.target): e for e in edges}
+    analysis = schemas.GraphAnalysis(
+        project_id=1,
+        duration=max(n.ef for n in graph_nodes),
+        critical_path=[n.id for n in graph_nodes if n.is_critical][:200],
+        nodes=graph_nodes,
+        edges=list(unique.values()),
+    )
+    positions = compute_layout([n.id for n in graph_nodes], list(unique))
+    analysis.layout = schemas.GraphLayout(
+        version="bench",
+        nodes=[schemas.GraphNodePosition(id=tid, layer=l, x=x, y=y) for tid, (l, x, y) in sorted(positions.items())],
+    )
+    return analysis
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> tuple:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return body, statistics.median(timings)
+
+
+def run(nodes: int, repeat: int) -> dict:
+    analysis = build_analysis(nodes)
+    encoders: Dict[str, Callable[[], bytes]] = {
+        # What FastAPI does for a response_model route (validate + jsonable + json.dumps)
+        "fastapi_json": lambda: json.dumps(
+            jsonable_encoder(schemas.GraphAnalysis.model_validate(analysis.model_dump())), ensure_ascii=False
+        ).encode(),
+        "pydantic_json": lambda: analysis.model_dump_json().encode(),
+        "columnar_json": lambda: json.dumps(graph_columns(analysis), ensure_ascii=False, separators=(",", ":")).encode(),
+        "columnar_msgpack": lambda: msgpack.packb(graph_columns(analysis), use_bin_type=True),
+    }
+    results = {}
+    for name, fn in encoders.items():
+        body, encode_s = _time(fn, repeat)
+        gz, gzip_s = _time(lambda: gzip.compress(body, 6), repeat)
+        br, br_s = _time(lambda: brotli.compress(body, quality=5), repeat)
+        results[name] = {
+            "bytes": len(body),
+            "encode_ms": round(encode_s * 1000, 2),
+            "gzip_bytes": len(gz),
+            "gzip_ms": round(gzip_s * 1000, 2),
+            "brotli_bytes": len(br),
+            "brotli_ms": round(br_s * 1000, 2),
+        }
+    return {"nodes": len(analysis.nodes), "edges": len(analysis.edges), "encodings": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+    emit(run(args.nodes, args.repeat), args.out)
+
+
+if __name__ == "__main__":
+    main()
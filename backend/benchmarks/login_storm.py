@@ -0,0 +1,83 @@
+"""Login storm: login throughput and latency of other routes while logins pile up.
+
+Runs the app in-process over ASGI (requires ``httpx``) against a throwaway SQLite
+database. Compare inline hashing with the process pool::
+
+    HASH_POOL_WORKERS=0 python -m benchmarks.login_storm
+    HASH_POOL_WORKERS=4 python -m benchmarks.login_storm
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from .common import emit, summary, use_scratch_database
+
+
+async def _run(logins: int, concurrency: int, probes: int) -> dict:
+    import httpx
+
+    from app.main import app, on_shutdown, on_startup
+    from app.auth import password_hasher
+
+    on_startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/auth/login", json={"email": "admin@example.com", "password": "admin"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        async def probe_once() -> float:
+            started = time.perf_counter()
+            await client.get("/projects/", headers=headers)
+            return time.perf_counter() - started
+
+        baseline = [await probe_once() for _ in range(probes)]
+
+        sem = asyncio.Semaphore(concurrency)
+        login_latencies: List[float] = []
+        statuses: dict = {}
+
+        async def login_once() -> None:
+            async with sem:
+                started = time.perf_counter()
+                resp = await client.post("/auth/login", json={"email": "executor@example.com", "password": "executor"})
+                login_latencies.append(time.perf_counter() - started)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+        storm_started = time.perf_counter()
+        storm = asyncio.gather(*(login_once() for _ in range(logins)))
+        during: List[float] = []
+        while not storm.done() and len(during) < probes:
+            during.append(await probe_once())
+        await storm
+        storm_elapsed = time.perf_counter() - storm_started
+
+    result = {
+        "hash_pool_workers": password_hasher.workers,
+        "logins": summary(login_latencies, storm_elapsed),
+        "login_statuses": statuses,
+        "other_route_idle": summary(baseline, sum(baseline)),
+        "other_route_during_storm": summary(during, sum(during)),
+        "hash_pool": password_hasher.stats(),
+    }
+    on_shutdown()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--out", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+
+    use_scratch_database()
+    emit(asyncio.run(_run(args.logins, args.concurrency, args.probes)), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Hot HTTP routes: latency, throughput and SQL statements per request.
+
+Loads one synthetic project (``app.services.synthetic``) into a throwaway
+SQLite database, or into ``DATABASE_URL`` if set, and drives the app
+in-process over ASGI (requires ``httpx``). Each route is first called once
+on its own to count the statements it executes, then ``--requests`` times
+with ``--concurrency`` in flight::
+
+    python -m benchmarks.routes --tasks 2000 --out routes.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from .common import emit, summary, use_scratch_database
+
+
+async def _measure(send: Callable[[], Awaitable], requests: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def once() -> None:
+        async with sem:
+            started = time.perf_counter()
+            resp = await send()
+            latencies.append(time.perf_counter() - started)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(once() for _ in range(requests)))
+    return {**summary(latencies, time.perf_counter() - started), "statuses": statuses}
+
+
+async def run(tasks: int, requests: int, concurrency: int, seed: int) -> dict:
+    import httpx
+    from sqlalchemy import event, select
+
+    from app import models
+    from app.db import SessionLocal, engine
+    from app.main import app, on_shutdown, on_startup
+    from app.services import synthetic
+
+    on_startup()
+    db = SessionLocal()
+    try:
+        dataset = synthetic.load(db, synthetic.Spec(projects=1, users=20, tasks=tasks, messages=0.5, seed=seed))
+        project_id = db.execute(select(models.Project.id).order_by(models.Project.id.desc())).scalar()
+        email = db.execute(
+            select(models.User.email)
+            .join(models.Project, models.Project.manager_id == models.User.id)
+            .where(models.Project.id == project_id)
+        ).scalar()
+        task_ids = db.execute(select(models.Task.id).where(models.Task.project_id == project_id)).scalars().all()
+    finally:
+        db.close()
+
+    statements = [0]
+
+    def count(*_args) -> None:
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        credentials = {"email": email, "password": synthetic.PASSWORD}
+        r = await client.post("/auth/login", json=credentials)
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        next_task = itertools.cycle(task_ids).__next__
+        priorities = itertools.cycle(["low", "medium", "high"]).__next__
+
+        routes: Dict[str, Callable[[], Awaitable]] = {
+            "graph": lambda: client.get(f"/analysis/projects/{project_id}/graph", headers=headers),
+            "list_tasks": lambda: client.get("/tasks/", params={"project_id": project_id}, headers=headers),
+            "update_task": lambda: client.patch(
+                f"/tasks/{next_task()}", json={"priority": priorities()}, headers=headers
+            ),
+            "login": lambda: client.post("/auth/login", json=credentials),
+        }
+        results = {}
+        for name, send in routes.items():
+            before = statements[0]
+            resp = await send()
+            queries = statements[0] - before
+            results[name] = {
+                "queries": queries,
+                "response_bytes": len(resp.content),
+                **await _measure(send, requests, concurrency),
+            }
+    event.remove(engine, "before_cursor_execute", count)
+    on_shutdown()
+    return {"dataset": dataset, "routes": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks in the benchmark project")
+    parser.add_argument("--requests", type=int, default=100, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+
+    use_scratch_database()
+    emit(asyncio.run(run(args.tasks, args.requests, args.concurrency, args.seed)), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Scheduling engine: ``build_graph_and_cpm`` on generated DAGs of growing size and shape.
+
+Graphs come from ``app.services.synthetic.layered_dag`` with a fixed seed and
+are passed in as transient ORM objects, so only the CPM pass is timed::
+
+    python -m benchmarks.scheduling --sizes 500,2000,10000 --out scheduling.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from .common import emit, use_scratch_database
+
+
+# name -> (layers as a function of size, fan_in, fan_out, span)
+SHAPES: Dict[str, tuple] = {
+    "balanced": (lambda n: round(n ** 0.5), 3, 4, 2),
+    "wide": (lambda n: max(2, round(n ** 0.5 / 4)), 3, 8, 1),
+    "deep": (lambda n: max(2, n // 4), 2, 3, 3),
+    "dense": (lambda n: round(n ** 0.5), 8, 12, 3),
+}
+
+
+def build_case(shape: str, size: int, seed: int = 7) -> Tuple[List, List]:
+    from app import models
+    from app.services.synthetic import layered_dag
+
+    layers, fan_in, fan_out, span = SHAPES[shape]
+    rng = random.Random(seed)
+    _, edges = layered_dag(rng, size, layers(size), fan_in, fan_out, span)
+    tasks = [
+        models.Task(
+            id=index + 1,
+            project_id=1,
+            name=f"t{index + 1}",
+            status=models.TaskStatus.done if rng.random() < 0.2 else models.TaskStatus.backlog,
+            duration_plan=rng.randint(1, 10),
+        )
+        for index in range(size)
+    ]
+    dependencies = [
+        models.TaskDependency(
+            id=i + 1, task_id=succ + 1, depends_on_task_id=pred + 1, dependency_type=models.DependencyType.blocks
+        )
+        for i, (pred, succ) in enumerate(edges)
+    ]
+    return tasks, dependencies
+
+
+def run(sizes: List[int], shapes: List[str], repeat: int) -> dict:
+    from app.services.scheduling import build_graph_and_cpm
+
+    cases = {}
+    for shape in shapes:
+        for size in sizes:
+            tasks, dependencies = build_case(shape, size)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                analysis = build_graph_and_cpm(project_id=1, tasks=tasks, dependencies=dependencies)
+                timings.append(time.perf_counter() - started)
+            cases[f"{shape}-{size}"] = {
+                "nodes": len(tasks),
+                "edges": len(dependencies),
+                "critical_path": len(analysis.critical_path),
+                "median_ms": round(statistics.median(timings) * 1000, 2),
+                "min_ms": round(min(timings) * 1000, 2),
+            }
+    return {"scheduling": cases}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="500,2000,10000")
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None, help="also write the JSON result here")
+    args = parser.parse_args()
+
+    use_scratch_database()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    emit(run(sizes, args.shapes.split(","), args.repeat), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Scheduling and route benchmarks in one run, saved to one result file.
+
+Record a baseline, change something, then compare::
+
+    python -m benchmarks.suite --out baseline.json
+    # ... change something ...
+    python -m benchmarks.suite --out current.json
+    python -m benchmarks.compare baseline.json current.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from . import routes, scheduling
+from .common import emit, use_scratch_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="500,2000,10000", help="scheduling graph sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=2000, help="tasks in the route benchmark project")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    use_scratch_database()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    result = scheduling.run(sizes, list(scheduling.SHAPES), args.repeat)
+    result.update(asyncio.run(routes.run(args.tasks, args.requests, args.concurrency, seed=7)))
+    emit(result, args.out)
+
+
+if __name__ == "__main__":
+    main()
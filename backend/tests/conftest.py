@@ -0,0 +1,51 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models  # noqa: F401  (registers the tables on Base)
+from app.db import Base
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    """PostgreSQL engine on a throwaway schema of ``TEST_DATABASE_URL``.
+
+    Row locks are no-ops on SQLite, so tests of concurrent writes need a real
+    server; they are skipped when the variable is not set.
+    """
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+    admin.dispose()
+
+
+@pytest.fixture
+def pg_sessions(pg_engine):
+    """Factory for independent sessions (one per simulated request); all closed afterwards."""
+
+    factory = sessionmaker(bind=pg_engine, autoflush=False)
+    opened = []
+
+    def make():
+        session = factory()
+        opened.append(session)
+        return session
+
+    yield make
+    for session in opened:
+        session.rollback()
+        session.close()
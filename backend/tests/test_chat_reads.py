@@ -0,0 +1,75 @@
+"""Chat read markers (services.chat_unread) against an in-memory SQLite database.
+
+Marking a chat read takes the newest message the client has shown; messages
+after it stay unread, and the marker never moves back.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, schemas
+from app.db import Base
+from app.routers.tasks import mark_task_messages_read
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    session.add_all(
+        models.User(id=uid, email=f"user{uid}@example.com", password_hash="x", full_name=f"User {uid}",
+                    role=models.UserRole.admin)
+        for uid in (1, 2)
+    )
+    session.add(models.Project(id=1, name="Chat"))
+    session.add_all(models.Task(id=tid, project_id=1, name=f"Task {tid}", duration_plan=1) for tid in (1, 2))
+    session.flush()
+    start = datetime(2026, 1, 1)
+    # Messages 1..6 in task 1 alternate between the two users; message 7 is in task 2
+    session.add_all(
+        models.TaskMessage(id=i, task_id=1, author_id=2 - i % 2, content=str(i), created_at=start + timedelta(minutes=i))
+        for i in range(1, 7)
+    )
+    session.add(models.TaskMessage(id=7, task_id=2, author_id=2, content="7", created_at=start))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _read(db, task_id, message_id):
+    return mark_task_messages_read(
+        task_id, schemas.TaskChatReadCreate(last_message_id=message_id), db=db, current_user=db.get(models.User, 1)
+    )
+
+
+def _marker(db):
+    return db.query(models.TaskChatRead).filter_by(user_id=1, task_id=1).one()
+
+
+def test_later_messages_from_others_stay_unread(db):
+    # Messages 4 and 6 are by user 2; 5 is the reader's own
+    result = _read(db, 1, 3)
+    assert result["last_read_message_id"] == 3 and result["unread_count"] == 2
+    assert _marker(db).unread_count == 2
+    assert _read(db, 1, 6)["unread_count"] == 0
+
+
+def test_marker_does_not_move_back(db):
+    _read(db, 1, 5)
+    result = _read(db, 1, 2)
+    assert result["last_read_message_id"] == 5 and result["unread_count"] == 1
+
+
+def test_message_of_another_chat(db):
+    with pytest.raises(HTTPException) as exc:
+        _read(db, 1, 7)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        _read(db, 1, 99)
@@ -0,0 +1,102 @@
+"""Concurrent dependency edits in one project on PostgreSQL (see tests/conftest.py).
+
+The cycle check reads the project's graph before the insert, so two edits
+that would only form a cycle together must run one after the other.
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import models, schemas
+from app.routers.tasks import TaskDependenciesPayload, add_dependency, replace_task_dependencies
+from app.services import reachability
+
+
+@pytest.fixture
+def project(pg_sessions):
+    """A project with two independent tasks A and B; returns (admin id, A id, B id)."""
+
+    db = pg_sessions()
+    admin = models.User(email=f"admin{time.monotonic_ns()}@example.com", password_hash="x", full_name="Admin",
+                        role=models.UserRole.admin)
+    project = models.Project(name="Graph")
+    db.add_all([admin, project])
+    db.flush()
+    a = models.Task(project_id=project.id, name="A", duration_plan=1)
+    b = models.Task(project_id=project.id, name="B", duration_plan=1)
+    db.add_all([a, b])
+    db.commit()
+    return admin.id, a.id, b.id
+
+
+def _race(pg_sessions, monkeypatch, admin_id, first, second):
+    """Start ``second`` once ``first`` has passed its cycle check; returns what each raised."""
+
+    db_a, db_b = pg_sessions(), pg_sessions()
+    errors, started = {}, []
+
+    def run(name, edit, db):
+        try:
+            edit(db, db.get(models.User, admin_id))
+        except HTTPException as exc:
+            errors[name] = exc
+
+    thread = threading.Thread(target=run, args=("second", second, db_b))
+
+    def after_check(check):
+        def checked(*args):
+            result = check(*args)
+            if not started:
+                started.append(True)
+                thread.start()
+                time.sleep(0.5)
+                assert thread.is_alive(), "the second edit did not wait for the first"
+            return result
+        return checked
+
+    monkeypatch.setattr(reachability, "reaches", after_check(reachability.reaches))
+    monkeypatch.setattr(reachability, "reaches_any", after_check(reachability.reaches_any))
+    run("first", first, db_a)
+    thread.join(10)
+    assert started and not thread.is_alive()
+    return errors
+
+
+def _edge(task_id, depends_on_task_id):
+    def edit(db, user):
+        add_dependency(schemas.DependencyCreate(task_id=task_id, depends_on_task_id=depends_on_task_id),
+                       db=db, current_user=user)
+    return edit
+
+
+def _replace(task_id, depends_on_task_ids):
+    def edit(db, user):
+        replace_task_dependencies(task_id, TaskDependenciesPayload(depends_on_task_ids=depends_on_task_ids),
+                                  db=db, current_user=user)
+    return edit
+
+
+def _assert_acyclic(pg_sessions, a, b):
+    db = pg_sessions()
+    assert not (reachability.reaches(db, a, b) and reachability.reaches(db, b, a))
+    edges = db.query(models.TaskDependency).filter(models.TaskDependency.task_id.in_([a, b]))
+    assert edges.count() == 1
+
+
+def test_opposite_edges_at_once(pg_sessions, project, monkeypatch):
+    admin_id, a, b = project
+    errors = _race(pg_sessions, monkeypatch, admin_id, _edge(b, a), _edge(a, b))
+    assert "first" not in errors
+    assert errors["second"].status_code == 400
+    _assert_acyclic(pg_sessions, a, b)
+
+
+def test_opposite_replacements_at_once(pg_sessions, project, monkeypatch):
+    admin_id, a, b = project
+    errors = _race(pg_sessions, monkeypatch, admin_id, _replace(a, [b]), _replace(b, [a]))
+    assert "first" not in errors
+    assert errors["second"].status_code == 400
+    _assert_acyclic(pg_sessions, a, b)
@@ -0,0 +1,116 @@
+"""Background build of a pending project's reachability index on PostgreSQL.
+
+Edits arrive through the task routes while the closure is being computed.
+They must not wait for the build, and the finished index must equal a
+from-scratch rebuild of the final graph.
+"""
+
+import time
+
+import pytest
+
+import app.db
+from app import models, schemas
+from app.routers.tasks import TaskDependenciesPayload, add_dependency, delete_task, replace_task_dependencies
+from app.services import reachability
+
+
+CHAINS, LENGTH = 6, 15
+
+
+@pytest.fixture
+def pending(pg_sessions, monkeypatch):
+    """A pending project of CHAINS chains of LENGTH tasks; returns (project id, admin id, chains)."""
+
+    monkeypatch.setattr(app.db, "SessionLocal", pg_sessions)
+    monkeypatch.setattr(reachability, "BUILD_BATCH", 50)
+    db = pg_sessions()
+    admin = models.User(email=f"admin{time.monotonic_ns()}@example.com", password_hash="x", full_name="Admin",
+                        role=models.UserRole.admin)
+    project = models.Project(name="Clone", reachability_pending=True)
+    db.add_all([admin, project])
+    db.flush()
+    chains = []
+    for c in range(CHAINS):
+        tasks = [models.Task(project_id=project.id, name=f"{c}.{i}", duration_plan=1) for i in range(LENGTH)]
+        db.add_all(tasks)
+        db.flush()
+        db.add_all(
+            models.TaskDependency(task_id=b.id, depends_on_task_id=a.id) for a, b in zip(tasks, tasks[1:])
+        )
+        chains.append([t.id for t in tasks])
+    db.commit()
+    return project.id, admin.id, chains
+
+
+def _during_build(monkeypatch, edit):
+    """Run ``edit`` once, right after the build has read the graph."""
+
+    original = reachability._closure_rows
+    calls = []
+
+    def closure_rows(db, project_id, task_ids):
+        result = original(db, project_id, task_ids)
+        if not calls:
+            calls.append(True)
+            edit()
+        return result
+
+    monkeypatch.setattr(reachability, "_closure_rows", closure_rows)
+    return calls
+
+
+def _session(pg_sessions):
+    db = pg_sessions()
+    # A lock held by the build would fail the edit instead of hanging the test
+    db.execute(models.Project.__table__.select().limit(0))
+    db.connection().exec_driver_sql("SET lock_timeout = '2s'")
+    return db
+
+
+def _assert_index_matches(pg_sessions, project_id):
+    db = pg_sessions()
+    assert db.get(models.Project, project_id).reachability_pending is False
+    reach = models.TaskReachability
+    query = db.query(reach.ancestor_id, reach.descendant_id, reach.depth).filter(reach.project_id == project_id)
+    built = set(query)
+    reachability.rebuild_project(db, project_id)
+    db.flush()
+    assert built == set(query)
+    db.rollback()
+
+
+def test_edits_during_build_are_caught_up(pg_sessions, pending, monkeypatch):
+    project_id, admin_id, chains = pending
+
+    def edit():
+        db = _session(pg_sessions)
+        user = db.get(models.User, admin_id)
+        add_dependency(schemas.DependencyCreate(task_id=chains[1][0], depends_on_task_id=chains[0][-1]),
+                       db=db, current_user=user)
+        db = _session(pg_sessions)
+        replace_task_dependencies(chains[2][7], TaskDependenciesPayload(depends_on_task_ids=[]),
+                                  db=db, current_user=db.get(models.User, admin_id))
+
+    calls = _during_build(monkeypatch, edit)
+    reachability.rebuild_pending(project_id)
+    assert calls
+    _assert_index_matches(pg_sessions, project_id)
+    db = pg_sessions()
+    assert reachability.reaches(db, chains[0][0], chains[1][-1])
+    assert not reachability.reaches(db, chains[2][0], chains[2][-1])
+
+
+def test_task_deleted_during_build(pg_sessions, pending, monkeypatch):
+    project_id, admin_id, chains = pending
+
+    def edit():
+        db = _session(pg_sessions)
+        delete_task(chains[3][5], db=db, current_user=db.get(models.User, admin_id))
+
+    calls = _during_build(monkeypatch, edit)
+    reachability.rebuild_pending(project_id)
+    assert calls
+    _assert_index_matches(pg_sessions, project_id)
+    db = pg_sessions()
+    assert not reachability.reaches(db, chains[3][0], chains[3][-1])
@@ -0,0 +1,193 @@
+"""services.task_query against an in-memory SQLite database.
+
+Every page must be one statement, follow the (key, id) order with NULL
+deadlines last in both directions, and be planned on the matching
+``ix_tasks_project_*`` index without a temporary sort.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.db import Base
+from app.services import task_query
+from app.services.pagination import decode_cursor
+
+
+PROJECT_ID = 1
+SORTS = ["id", "-id", "deadline", "-deadline", "updated_at", "-updated_at", "name", "-name"]
+INDEXES = {
+    "id": "ix_tasks_project_id",
+    "deadline": "ix_tasks_project_deadline",
+    "updated_at": "ix_tasks_project_updated",
+    "name": "ix_tasks_project_name",
+}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        models.User(id=uid, email=f"user{uid}@example.com", password_hash="x", full_name=f"User {uid}",
+                    role=models.UserRole.executor)
+        for uid in (1, 2)
+    )
+    db.add_all(models.Project(id=pid, name=f"Project {pid}") for pid in (1, 2, 3))
+    db.flush()
+    statuses, priorities = list(models.TaskStatus), list(models.TaskPriority)
+    start = datetime(2026, 1, 1)
+    # Few distinct names, deadlines and timestamps so every sort has ties broken by id;
+    # every seventh task has no deadline
+    db.add_all(
+        models.Task(
+            project_id=1 + i % 3,
+            name=f"Task {i % 17:02d}",
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            assignee_id=(1, 2, None)[i % 5 % 3],
+            duration_plan=1,
+            deadline=None if i % 7 == 1 else date(2026, 2, 1) + timedelta(days=i % 11),
+            updated_at=start + timedelta(minutes=i % 13),
+        )
+        for i in range(600)
+    )
+    db.commit()
+    db.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _expected(db, sort, **filters):
+    key, descending = task_query.parse_sort(sort)
+    tasks = db.query(models.Task).filter_by(project_id=PROJECT_ID, **filters).all()
+    present = [t for t in tasks if getattr(t, key) is not None]
+    missing = [t for t in tasks if getattr(t, key) is None]
+    present.sort(key=lambda t: (getattr(t, key), t.id), reverse=descending)
+    missing.sort(key=lambda t: t.id, reverse=descending)
+    return [t.id for t in present + missing]
+
+
+def _plan(engine, statement, parameters):
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+
+
+def _page(db, statements, f, sort, cursor=None, limit=7):
+    statements.clear()
+    rows, next_cursor = task_query.search(db, f, sort=sort, cursor=cursor, limit=limit)
+    assert len(statements) == 1
+    return rows, next_cursor, statements[0]
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_pages_follow_sort_order(db, statements, sort):
+    f = task_query.TaskFilter(project_id=PROJECT_ID)
+    seen, cursor = [], None
+    while True:
+        rows, cursor, _ = _page(db, statements, f, sort, cursor)
+        seen.extend(t.id for t in rows)
+        if cursor is None:
+            break
+    assert seen == _expected(db, sort)
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_cursor_round_trip(db, statements, sort):
+    key, _ = task_query.parse_sort(sort)
+    f = task_query.TaskFilter(project_id=PROJECT_ID)
+    rows, cursor, _ = _page(db, statements, f, sort)
+    parse = task_query.SORT_KEYS[key][1]
+    assert decode_cursor(cursor, parse, int) == [getattr(rows[-1], key), rows[-1].id]
+    following, _, _ = _page(db, statements, f, sort, cursor)
+    assert [t.id for t in rows + following] == _expected(db, sort)[: len(rows) + len(following)]
+
+
+@pytest.mark.parametrize("sort", ["deadline", "-deadline"])
+def test_null_deadline_tail(db, statements, sort):
+    f = task_query.TaskFilter(project_id=PROJECT_ID)
+    dated = db.query(models.Task).filter_by(project_id=PROJECT_ID).filter(models.Task.deadline.is_not(None)).count()
+    # A page ending on the last dated task, then pages inside the NULL tail
+    rows, cursor, _ = _page(db, statements, f, sort, limit=dated)
+    assert all(t.deadline is not None for t in rows)
+    tail = []
+    while cursor is not None:
+        rows, cursor, _ = _page(db, statements, f, sort, cursor, limit=5)
+        tail.extend(rows)
+    assert tail and all(t.deadline is None for t in tail)
+    ids = [t.id for t in tail]
+    assert ids == sorted(ids, reverse=sort.startswith("-"))
+    _, cursor = task_query.search(db, f, sort=sort, limit=dated + 1)
+    assert decode_cursor(cursor, task_query.SORT_KEYS["deadline"][1], int)[0] is None
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_sorts_use_project_indexes(engine, db, statements, sort):
+    key, _ = task_query.parse_sort(sort)
+    f = task_query.TaskFilter(project_id=PROJECT_ID)
+    _, cursor, first = _page(db, statements, f, sort)
+    _, _, second = _page(db, statements, f, sort, cursor)
+    for statement in (first, second):
+        plan = _plan(engine, *statement)
+        assert f"USING INDEX {INDEXES[key]} (project_id=?" in plan or f"COVERING INDEX {INDEXES[key]}" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+    if key in ("updated_at", "name"):
+        # Later pages seek to the cursor instead of scanning from the start of the project
+        op = "<" if sort.startswith("-") else ">"
+        assert f"{key}{op}?" in _plan(engine, *second)
+
+
+@pytest.mark.parametrize(
+    "f, index",
+    [
+        (task_query.TaskFilter(project_id=PROJECT_ID, status=[models.TaskStatus.done]), "ix_tasks_project_status"),
+        (task_query.TaskFilter(project_id=PROJECT_ID, assignee_ids=[1]), "ix_tasks_project_assignee"),
+    ],
+)
+def test_filters_use_project_indexes(engine, db, statements, f, index):
+    rows, _, statement = _page(db, statements, f, "id", limit=500)
+    assert rows and all(t.project_id == PROJECT_ID for t in rows)
+    assert f"INDEX {index} (project_id=? AND" in _plan(engine, *statement)
+
+
+def test_filtered_pages(db, statements):
+    f = task_query.TaskFilter(project_id=PROJECT_ID, status=[models.TaskStatus.backlog], unassigned=True)
+    seen, cursor = [], None
+    while True:
+        rows, cursor, _ = _page(db, statements, f, "-updated_at", cursor, limit=4)
+        seen.extend(t.id for t in rows)
+        if cursor is None:
+            break
+    assert seen == _expected(db, "-updated_at", status=models.TaskStatus.backlog, assignee_id=None)
+
+
+def test_bad_sort_and_cursor(db):
+    f = task_query.TaskFilter(project_id=PROJECT_ID)
+    with pytest.raises(ValueError):
+        task_query.search(db, f, sort="priority")
+    with pytest.raises(ValueError):
+        task_query.search(db, f, sort="name", cursor="not-a-cursor")
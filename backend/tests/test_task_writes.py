@@ -0,0 +1,126 @@
+"""Concurrent writes to one task on PostgreSQL (see tests/conftest.py).
+
+The first request holds the task row lock while a second one for the same
+task is started in a thread; the second must wait and then act on the
+first's result instead of the status it would have read without the lock.
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.routers.tasks import TaskUpdatePayload, update_task
+from app.services import dashboard, readiness
+from app.services.access import live_task
+
+
+@pytest.fixture
+def project(pg_sessions):
+    """A project with P (in progress) and R (backlog), both predecessors of Q."""
+
+    db = pg_sessions()
+    suffix = str(time.monotonic_ns())
+    admin = models.User(email=f"admin{suffix}@example.com", password_hash="x", full_name="Admin",
+                        role=models.UserRole.admin)
+    executor = models.User(email=f"exec{suffix}@example.com", password_hash="x", full_name="Executor",
+                           role=models.UserRole.executor)
+    project = models.Project(name="Concurrency")
+    db.add_all([admin, executor, project])
+    db.flush()
+    db.add(models.ProjectMember(project_id=project.id, user_id=executor.id))
+    p = models.Task(project_id=project.id, name="P", duration_plan=1, status=models.TaskStatus.in_progress,
+                    priority=models.TaskPriority.low, assignee_id=executor.id)
+    r = models.Task(project_id=project.id, name="R", duration_plan=1, priority=models.TaskPriority.low)
+    q = models.Task(project_id=project.id, name="Q", duration_plan=1, priority=models.TaskPriority.low)
+    db.add_all([p, q, r])
+    db.flush()
+    db.add_all(
+        [
+            models.TaskDependency(task_id=q.id, depends_on_task_id=p.id),
+            models.TaskDependency(task_id=q.id, depends_on_task_id=r.id),
+        ]
+    )
+    db.flush()
+    readiness.recount(db, project_id=project.id)
+    dashboard.recompute(db, project.id)
+    db.commit()
+    return {"project": project.id, "admin": admin.id, "executor": executor.id, "p": p.id, "q": q.id}
+
+
+def _race(pg_sessions, task_id, user_id, first, second):
+    """Run ``second`` while ``first``'s session holds the task lock; returns what each raised."""
+
+    db_a, db_b = pg_sessions(), pg_sessions()
+    assert live_task(db_a, task_id, for_write=True) is not None
+    errors = {}
+
+    def run_second():
+        try:
+            update_task(task_id, second, db=db_b, current_user=db_b.get(models.User, user_id))
+        except HTTPException as exc:
+            errors["second"] = exc
+
+    thread = threading.Thread(target=run_second)
+    thread.start()
+    time.sleep(0.5)
+    assert thread.is_alive(), "the second update did not wait for the task lock"
+    try:
+        update_task(task_id, first, db=db_a, current_user=db_a.get(models.User, user_id))
+    except HTTPException as exc:
+        errors["first"] = exc
+    thread.join(10)
+    assert not thread.is_alive()
+    return errors
+
+
+def _counters(db, project_id):
+    counter = models.ProjectTaskCounter
+    rows = db.query(counter.dimension, counter.key, counter.count).filter(counter.project_id == project_id)
+    return {(dim, key): n for dim, key, n in rows if n}
+
+
+def _check(pg_sessions, project, open_predecessors=1):
+    db = pg_sessions()
+    q = db.get(models.Task, project["q"])
+    # R is still open, so Q keeps at least one open predecessor and stays out of the ready list
+    assert q.open_predecessors == open_predecessors
+    assert readiness.drifted(db, project["project"]) == []
+    maintained = _counters(db, project["project"])
+    dashboard.recompute(db, project["project"])
+    db.flush()
+    assert maintained == _counters(db, project["project"])
+
+
+def test_double_done_by_executor(pg_sessions, project):
+    done = TaskUpdatePayload(status=models.TaskStatus.done)
+    errors = _race(pg_sessions, project["p"], project["executor"], done, done)
+    assert "first" not in errors
+    # The second request sees the task already done and is refused by the in_progress rule
+    assert errors["second"].status_code == 400
+    _check(pg_sessions, project)
+
+
+def test_double_done_by_admin(pg_sessions, project):
+    done = TaskUpdatePayload(status=models.TaskStatus.done)
+    assert _race(pg_sessions, project["p"], project["admin"], done, done) == {}
+    _check(pg_sessions, project)
+
+
+def test_same_field_change_twice(pg_sessions, project):
+    # Without the lock both requests move P from low to high and the low counter goes negative
+    high = TaskUpdatePayload(priority=models.TaskPriority.high)
+    assert _race(pg_sessions, project["p"], project["admin"], high, high) == {}
+    _check(pg_sessions, project, open_predecessors=2)
+    db = pg_sessions()
+    counters = _counters(db, project["project"])
+    assert counters[("priority", "high")] == 1 and counters[("priority", "low")] == 2
+
+
+def test_different_fields_at_once(pg_sessions, project):
+    first = TaskUpdatePayload(priority=models.TaskPriority.medium)
+    second = TaskUpdatePayload(assignee_id=None, deadline="2026-12-31")
+    assert _race(pg_sessions, project["p"], project["admin"], first, second) == {}
+    _check(pg_sessions, project, open_predecessors=2)
@@ -14,9 +14,11 @@ export type Project = {
 
 export type ProjectDetail = Project & {
   manager_id?: number
+  start_date?: string
   deadline?: string
   customer?: string
   budget_plan?: number
+  is_template?: boolean
   created_at?: string
   updated_at?: string
 }
@@ -30,6 +32,7 @@ export type Task = {
   status: 'backlog' | 'in_progress' | 'review' | 'done'
   priority: 'low' | 'medium' | 'high'
   duration_plan: number
+  open_predecessors?: number
 }
 
 export async function listProjects(): Promise<Project[]> {
@@ -55,6 +58,73 @@ export async function deleteProject(projectId: number): Promise<void> {
   if (!r.ok) throw new Error('Failed to delete project')
 }
 
+export type ProjectSummary = {
+  project_id: number
+  total: number
+  overdue: number
+  by_status: Record<string, number>
+  by_priority: Record<string, number>
+  by_assignee: Record<string, number>
+}
+
+export async function getProjectSummary(projectId: number): Promise<ProjectSummary> {
+  const r = await fetch(`${API_BASE}/projects/${projectId}/summary`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load project summary')
+  return r.json()
+}
+
+export async function listProjectSummaries(ids?: number[]): Promise<ProjectSummary[]> {
+  const qs = ids && ids.length ? `?ids=${ids.join(',')}` : ''
+  const r = await fetch(`${API_BASE}/projects/summary${qs}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load project summaries')
+  return r.json()
+}
+
+export type GanttBar = {
+  row: number
+  id: number
+  name: string
+  assignee_id?: number | null
+  status: string
+  duration: number
+  slack: number
+  is_critical: boolean
+  start: string
+  end: string
+  late_start: string
+  late_end: string
+  deadline?: string | null
+}
+
+export type GanttChart = {
+  project_id: number
+  start_date: string
+  finish_date: string
+  duration: number
+  working_days: boolean
+  total_rows: number
+  offset: number
+  lanes: Array<{ assignee_id?: number | null; name: string; first_row: number; row_count: number }>
+  rows: GanttBar[]
+  edges: Array<[number, number]>
+}
+
+export async function getProjectGantt(
+  projectId: number,
+  opts: { offset?: number; limit?: number; from?: string; to?: string; groupBy?: 'none' | 'assignee'; workingDays?: boolean } = {},
+): Promise<GanttChart> {
+  const params = new URLSearchParams()
+  if (opts.offset) params.set('offset', String(opts.offset))
+  if (opts.limit) params.set('limit', String(opts.limit))
+  if (opts.from) params.set('from', opts.from)
+  if (opts.to) params.set('to', opts.to)
+  if (opts.groupBy) params.set('group_by', opts.groupBy)
+  if (opts.workingDays) params.set('working_days', 'true')
+  const r = await fetch(`${API_BASE}/analysis/projects/${projectId}/gantt?${params.toString()}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load gantt')
+  return r.json()
+}
+
 export async function deleteProjectMember(projectId: number, userId: number): Promise<any> {
   const r = await fetch(`${API_BASE}/projects/${projectId}/members/${userId}`, { method: 'DELETE', headers: { ...authHeaders() } })
   if (!r.ok) throw new Error('Failed to remove member')
@@ -67,12 +137,67 @@ export async function createProject(payload: { name: string; description?: strin
   return r.json()
 }
 
+export async function listProjectTemplates(): Promise<ProjectDetail[]> {
+  const r = await fetch(`${API_BASE}/projects/templates`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load templates')
+  return r.json()
+}
+
+export type ProjectClonePayload = {
+  name: string
+  description?: string
+  customer?: string
+  manager_id?: number
+  start_date?: string
+  assignee_map?: Record<number, number | null>
+  keep_unmapped_assignees?: boolean
+  copy_members?: boolean
+  reset_status?: boolean
+  is_template?: boolean
+}
+
+export async function cloneProject(projectId: number, payload: ProjectClonePayload): Promise<ProjectDetail> {
+  const r = await fetch(`${API_BASE}/projects/${projectId}/clone`, { method: 'POST', headers: { 'Content-Type': 'application/json', ...authHeaders() }, body: JSON.stringify(payload) })
+  if (!r.ok) throw new Error('Failed to clone project')
+  return r.json()
+}
+
 export async function listTasks(projectId: number): Promise<Task[]> {
   const r = await fetch(`${API_BASE}/tasks/?project_id=${projectId}`, { headers: { ...authHeaders() } })
   if (!r.ok) throw new Error('Failed to load tasks')
   return r.json()
 }
 
+export async function listReadyTasks(params: { projectId?: number; assigneeId?: number; limit?: number } = {}): Promise<Task[]> {
+  const q = new URLSearchParams()
+  if (params.projectId != null) q.set('project_id', String(params.projectId))
+  if (params.assigneeId != null) q.set('assignee_id', String(params.assigneeId))
+  if (params.limit != null) q.set('limit', String(params.limit))
+  const r = await fetch(`${API_BASE}/tasks/ready?${q.toString()}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load ready tasks')
+  return r.json()
+}
+
+export type TaskPage = { items: Task[]; next_cursor?: string | null }
+export type TaskSearch = { status?: Task['status'][]; priority?: Task['priority'][]; assigneeIds?: number[]; unassigned?: boolean; deadlineFrom?: string; deadlineTo?: string; q?: string; sort?: string; cursor?: string; limit?: number }
+
+export async function searchTasks(projectId: number, params: TaskSearch = {}): Promise<TaskPage> {
+  const q = new URLSearchParams({ project_id: String(projectId) })
+  params.status?.forEach((s) => q.append('status', s))
+  params.priority?.forEach((p) => q.append('priority', p))
+  params.assigneeIds?.forEach((id) => q.append('assignee_id', String(id)))
+  if (params.unassigned) q.set('unassigned', 'true')
+  if (params.deadlineFrom) q.set('deadline_from', params.deadlineFrom)
+  if (params.deadlineTo) q.set('deadline_to', params.deadlineTo)
+  if (params.q) q.set('q', params.q)
+  if (params.sort) q.set('sort', params.sort)
+  if (params.cursor) q.set('cursor', params.cursor)
+  if (params.limit != null) q.set('limit', String(params.limit))
+  const r = await fetch(`${API_BASE}/tasks/search?${q.toString()}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to search tasks')
+  return r.json()
+}
+
 export async function createTask(payload: { name: string; description?: string; project_id: number; assignee_id?: number; status?: string; priority?: string; duration_plan: number; deadline?: string }): Promise<Task> {
   const r = await fetch(`${API_BASE}/tasks/`, { method: 'POST', headers: { 'Content-Type': 'application/json', ...authHeaders() }, body: JSON.stringify(payload) })
   if (!r.ok) throw new Error('Failed to create task')
@@ -127,6 +252,30 @@ export async function searchUsers(q: string): Promise<Array<{ id: number; email:
   return r.json()
 }
 
+export type ProjectChanges = {
+  project_id: number
+  seq: number
+  reset: boolean
+  has_more: boolean
+  project?: Project | null
+  tasks: Task[]
+  dependencies: Array<{ id: number; task_id: number; depends_on_task_id: number; dependency_type: string }>
+  members: Array<{ id: number; project_id: number; user: any }>
+  deleted_task_ids: number[]
+  deleted_dependency_ids: number[]
+  removed_member_user_ids: number[]
+}
+
+// Without `since` returns only the current sequence; read it before a full reload
+export async function getProjectChanges(projectId: number, since?: number, limit?: number): Promise<ProjectChanges> {
+  const q = new URLSearchParams()
+  if (since != null) q.set('since', String(since))
+  if (limit != null) q.set('limit', String(limit))
+  const r = await fetch(`${API_BASE}/projects/${projectId}/changes?${q.toString()}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load project changes')
+  return r.json()
+}
+
 export async function listProjectMembers(projectId: number): Promise<Array<{ id: number; project_id: number; user: any }>> {
   const r = await fetch(`${API_BASE}/projects/${projectId}/members`, { headers: { ...authHeaders() } })
   if (!r.ok) throw new Error('Failed to load members')
@@ -139,12 +288,38 @@ export async function addProjectMember(projectId: number, userId: number): Promi
   return r.json()
 }
 
-export async function listTaskMessages(taskId: number): Promise<Array<{ id: number; task_id: number; author: any; content: string; created_at: string }>> {
-  const r = await fetch(`${API_BASE}/tasks/${taskId}/messages`, { headers: { ...authHeaders() } })
+export type TaskMessage = { id: number; task_id: number; author: any; content: string; created_at: string }
+
+export type TaskMessagePage = { items: TaskMessage[]; next_cursor?: string | null; latest_cursor?: string | null; has_more: boolean }
+
+export async function listTaskMessagesPage(taskId: number, params: { cursor?: string; since?: string; limit?: number } = {}): Promise<TaskMessagePage> {
+  const qs = new URLSearchParams()
+  if (params.cursor) qs.set('cursor', params.cursor)
+  if (params.since) qs.set('since', params.since)
+  if (params.limit) qs.set('limit', String(params.limit))
+  const r = await fetch(`${API_BASE}/tasks/${taskId}/messages?${qs.toString()}`, { headers: { ...authHeaders() } })
   if (!r.ok) throw new Error('Failed to load messages')
   return r.json()
 }
 
+// Latest page of a chat in chronological order (the API returns newest first)
+export async function listTaskMessages(taskId: number, limit = 50): Promise<TaskMessage[]> {
+  const page = await listTaskMessagesPage(taskId, { limit })
+  return page.items.slice().reverse()
+}
+
+// lastMessageId: newest message the user has seen; anything later stays unread
+export async function markTaskMessagesRead(taskId: number, lastMessageId: number): Promise<void> {
+  const r = await fetch(`${API_BASE}/tasks/${taskId}/messages/read`, { method: 'POST', headers: { 'Content-Type': 'application/json', ...authHeaders() }, body: JSON.stringify({ last_message_id: lastMessageId }) })
+  if (!r.ok) throw new Error('Failed to mark messages read')
+}
+
+export async function listUnreadChats(): Promise<Array<{ task_id: number; project_id: number; unread_count: number; last_read_at?: string }>> {
+  const r = await fetch(`${API_BASE}/tasks/chats/unread`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to load unread counts')
+  return r.json()
+}
+
 export async function sendTaskMessage(taskId: number, content: string): Promise<any> {
   const r = await fetch(`${API_BASE}/tasks/${taskId}/messages`, { method: 'POST', headers: { 'Content-Type': 'application/json', ...authHeaders() }, body: JSON.stringify({ content }) })
   if (!r.ok) throw new Error('Failed to send message')
@@ -152,3 +327,19 @@ export async function sendTaskMessage(taskId: number, content: string): Promise<
 }
 
 
+
+export async function downloadProjectExport(
+  projectId: number,
+  kind: 'tasks' | 'dependencies' | 'messages' | 'msproject',
+  format: 'csv' | 'ndjson' = 'csv',
+): Promise<void> {
+  const qs = kind === 'msproject' ? '' : `?format=${format}`
+  const r = await fetch(`${API_BASE}/exports/projects/${projectId}/${kind}${qs}`, { headers: { ...authHeaders() } })
+  if (!r.ok) throw new Error('Failed to export')
+  const blob = await r.blob()
+  const a = document.createElement('a')
+  a.href = URL.createObjectURL(blob)
+  a.download = `project_${projectId}_${kind}.${kind === 'msproject' ? 'xml' : format}`
+  a.click()
+  setTimeout(() => URL.revokeObjectURL(a.href), 0)
+}
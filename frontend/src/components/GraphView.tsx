@@ -35,6 +35,8 @@ type GraphAnalysis = {
   critical_path: number[]
   nodes: GraphNode[]
   edges: GraphEdge[]
+  // Server-side layered layout (node centres), cached per graph version
+  layout?: { version: string; nodes: Array<{ id: number; layer: number; x: number; y: number }> } | null
 }
 
 const STATUS_STYLE: Record<GraphNode['status'], { bg: string; border: string; glow: string }> = {
@@ -58,9 +60,12 @@ function buildLayout(data: GraphAnalysis): { nodes: RFNode[]; edges: RFEdge[] }
 
   const width = 54
   const height = 54
-  data.nodes.forEach(n => g.setNode(String(n.id), { width, height }))
+  const serverPos: Record<string, { x: number; y: number }> = {}
+  data.layout?.nodes.forEach(p => { serverPos[String(p.id)] = { x: p.x, y: p.y } })
+  data.nodes.forEach(n => g.setNode(String(n.id), { width, height, ...serverPos[String(n.id)] }))
   data.edges.forEach(e => g.setEdge(String(e.source), String(e.target)))
-  dagre.layout(g)
+  // Fall back to laying out in the browser only when the server sent no layout
+  if (!data.layout) dagre.layout(g)
 
   const criticalSet = new Set<number>(data.critical_path)
   const rfNodes: RFNode[] = data.nodes.map(n => {
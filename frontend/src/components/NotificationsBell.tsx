@@ -4,7 +4,7 @@ import React from 'react'
 import { useNotificationStore } from '../store/useNotificationStore'
 import { useProjectStore } from '../store/useProjectStore'
 import { useAuthStore } from '../store/useAuthStore'
-import { listTasks, getTaskDependencies, Task, listProjects, Project } from '../api/client'
+import { listReadyTasks, listProjects, Project } from '../api/client'
 import { useNavigate } from 'react-router-dom'
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
@@ -65,16 +65,12 @@ export default function NotificationsBell() {
           add({ type: 'task', text: `Создана новая задача в проекте #${pid}`, link: '/projects' })
         } else if (kind === 'task_updated') {
           add({ type: 'task', text: `Обновлён статус задачи в проекте #${pid}`, link: '/projects' })
-          // Detect unblocked tasks for current user within this project
+          // Detect unblocked tasks for current user within this project (backlog, every predecessor done)
           try {
             if (!userId) return
-            const tasks = await listTasks(pid)
-            const byId: Record<number, Task> = Object.fromEntries(tasks.map((t) => [t.id, t]))
-            const myTodo = tasks.filter((t) => t.assignee_id === userId && t.status === 'backlog')
-            for (const t of myTodo) {
-              const deps = await getTaskDependencies(t.id)
-              const allDone = deps.every((d) => byId[d.depends_on_task_id]?.status === 'done')
-              if (allDone && !unblockedNotifiedRef.current.has(t.id)) {
+            const ready = await listReadyTasks({ projectId: pid, assigneeId: userId })
+            for (const t of ready) {
+              if (!unblockedNotifiedRef.current.has(t.id)) {
                 unblockedNotifiedRef.current.add(t.id)
                 add({ type: 'deps', text: `Можно начинать задачу #${t.id} (проект #${pid})`, link: '/tasks' })
               }
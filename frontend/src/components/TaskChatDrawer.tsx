@@ -1,44 +1,126 @@
 import { Drawer, List, Input, Button, Space, Typography, Avatar } from 'antd'
-import { useEffect, useMemo, useRef, useState } from 'react'
-import { listTaskMessages, sendTaskMessage } from '../api/client'
+import { useEffect, useLayoutEffect, useMemo, useRef, useState } from 'react'
+import { listTaskMessagesPage, markTaskMessagesRead, sendTaskMessage, TaskMessage } from '../api/client'
 import { useAuthStore } from '../store/useAuthStore'
 import { useChatStore } from '../store/useChatStore'
 
+const PAGE_SIZE = 50
+
 export default function TaskChatDrawer({ taskId, open, onClose, taskTitle }: { taskId: number | null; open: boolean; onClose: () => void; taskTitle?: string }) {
-  const [messages, setMessages] = useState<Array<any>>([])
+  // Chronological order; older pages are prepended, live updates appended
+  const [messages, setMessages] = useState<TaskMessage[]>([])
+  const [olderCursor, setOlderCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(false)
+  const [loadingOlder, setLoadingOlder] = useState(false)
   const [text, setText] = useState('')
   const listRef = useRef<HTMLDivElement>(null)
+  // Newest message seen, for ?since= polling; kept in a ref so the interval never reads a stale value
+  const latestRef = useRef<string | null>(null)
+  // Bumped on every (re)load so responses for a previous task are dropped
+  const generationRef = useRef(0)
+  // Scroll adjustment applied after the next render: stick to the bottom or keep the view in place
+  const scrollRef = useRef<{ bottom: boolean } | { height: number } | null>(null)
   const meId = useAuthStore(s => s.user?.id || null)
   const markTaskRead = useChatStore(s => s.markTaskRead)
 
-  async function load() {
+  function nearBottom() {
+    const el = listRef.current
+    return !el || el.scrollHeight - el.scrollTop - el.clientHeight < 40
+  }
+
+  async function loadLatest() {
     if (!taskId) return
+    const generation = ++generationRef.current
     setLoading(true)
     try {
-      const res = await listTaskMessages(taskId)
-      setMessages(res)
-      // scroll to bottom
-      setTimeout(() => listRef.current?.scrollTo(0, 999999), 0)
+      const page = await listTaskMessagesPage(taskId, { limit: PAGE_SIZE })
+      if (generation !== generationRef.current) return
+      latestRef.current = page.latest_cursor || null
+      setOlderCursor(page.next_cursor || null)
+      scrollRef.current = { bottom: true }
+      setMessages(page.items.slice().reverse())
+    } catch (e) {
+      // do not throw to UI
+    } finally {
+      if (generation === generationRef.current) setLoading(false)
+    }
+  }
+
+  // Only what arrived after the newest message we have; repeats while the server reports more
+  async function loadNewer() {
+    if (!taskId) return
+    if (!latestRef.current) return loadLatest()
+    const generation = generationRef.current
+    try {
+      const fresh: TaskMessage[] = []
+      let more = true
+      while (more) {
+        const page = await listTaskMessagesPage(taskId, { since: latestRef.current || undefined, limit: 200 })
+        if (generation !== generationRef.current) return
+        latestRef.current = page.latest_cursor || latestRef.current
+        fresh.push(...page.items.slice().reverse())
+        more = page.has_more && page.items.length > 0
+      }
+      if (!fresh.length) return
+      if (nearBottom()) scrollRef.current = { bottom: true }
+      setMessages(prev => {
+        const seen = new Set(prev.map(m => m.id))
+        return [...prev, ...fresh.filter(m => !seen.has(m.id))]
+      })
+    } catch (e) {
+      // do not throw to UI
+    }
+  }
+
+  async function loadOlder() {
+    if (!taskId || !olderCursor || loadingOlder) return
+    const generation = generationRef.current
+    setLoadingOlder(true)
+    try {
+      const page = await listTaskMessagesPage(taskId, { cursor: olderCursor, limit: PAGE_SIZE })
+      if (generation !== generationRef.current) return
+      scrollRef.current = { height: listRef.current?.scrollHeight || 0 }
+      setOlderCursor(page.next_cursor || null)
+      setMessages(prev => {
+        const seen = new Set(prev.map(m => m.id))
+        return [...page.items.slice().reverse().filter(m => !seen.has(m.id)), ...prev]
+      })
     } catch (e) {
       // do not throw to UI
     } finally {
-      setLoading(false)
+      setLoadingOlder(false)
     }
   }
 
+  useLayoutEffect(() => {
+    const el = listRef.current
+    const pending = scrollRef.current
+    scrollRef.current = null
+    if (!el || !pending) return
+    if ('bottom' in pending) el.scrollTop = el.scrollHeight
+    else el.scrollTop += el.scrollHeight - pending.height
+  }, [messages])
+
   useEffect(() => {
     if (open) {
-      load()
-      const t = setInterval(() => load(), 3000)
-      return () => clearInterval(t)
+      latestRef.current = null
+      setMessages([])
+      setOlderCursor(null)
+      loadLatest()
+      const t = setInterval(() => loadNewer(), 3000)
+      return () => {
+        clearInterval(t)
+        generationRef.current++
+      }
     }
   }, [open, taskId])
 
   useEffect(() => {
     if (open && taskId) {
-      // mark as read when opened or when messages update
+      // mark as read up to the newest message shown, when opened or when messages update
       markTaskRead(taskId, Date.now())
+      const newest = messages[messages.length - 1]
+      if (newest) markTaskMessagesRead(taskId, newest.id).catch(() => {})
     }
   }, [open, taskId, messages, markTaskRead])
 
@@ -46,13 +128,19 @@ export default function TaskChatDrawer({ taskId, open, onClose, taskTitle }: { t
     if (!taskId || !text.trim()) return
     await sendTaskMessage(taskId, text.trim())
     setText('')
-    await load()
+    scrollRef.current = { bottom: true }
+    await loadNewer()
   }
 
   return (
     <Drawer open={open} onClose={onClose} title={taskTitle ? `Чат: ${taskTitle}` : `Чат по задаче #${taskId}`} width={520}>
       <div ref={listRef} style={{ height: '60vh', overflowY: 'auto', padding: 8, marginBottom: 12, display: 'flex', flexDirection: 'column', gap: 8 }}>
         {loading && <Typography.Text type="secondary">Загрузка...</Typography.Text>}
+        {olderCursor && (
+          <Button size="small" type="link" loading={loadingOlder} onClick={loadOlder} style={{ alignSelf: 'center' }}>
+            Загрузить ранние сообщения
+          </Button>
+        )}
         {messages.map((m) => {
           const mine = meId && m.author?.id === meId
           return (
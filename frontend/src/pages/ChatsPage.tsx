@@ -3,7 +3,7 @@ import { ArrowLeftOutlined, ReloadOutlined, MessageOutlined } from '@ant-design/
 import { useNavigate } from 'react-router-dom'
 import { useEffect, useMemo, useState } from 'react'
 import { useQuery, useQueryClient } from '@tanstack/react-query'
-import { listProjectMembers, listTasks, listTaskMessages, Task } from '../api/client'
+import { listProjectMembers, listTasks, listTaskMessages, listUnreadChats, Task } from '../api/client'
 import { useProjectStore } from '../store/useProjectStore'
 import { useAuthStore } from '../store/useAuthStore'
 import TaskChatDrawer from '../components/TaskChatDrawer'
@@ -29,7 +29,6 @@ export default function ChatsPage() {
   const [search, setSearch] = useState<string>('')
   const [chatTaskId, setChatTaskId] = useState<number | null>(null)
   const [chatOpen, setChatOpen] = useState(false)
-  const getLastReadAt = useChatStore(s => s.getLastReadAt)
   const markTaskRead = useChatStore(s => s.markTaskRead)
   const [lastMeta, setLastMeta] = useState<Record<number, { preview: string; ts: number; unread: number }>>({})
 
@@ -55,15 +54,17 @@ export default function ChatsPage() {
   async function loadLastMessages(tasks: Task[]) {
     if (!selectedProjectId) return
     const next: Record<number, { preview: string; ts: number; unread: number }> = {}
+    const unreadByTask: Record<number, number> = {}
+    try {
+      for (const u of await listUnreadChats()) unreadByTask[u.task_id] = u.unread_count
+    } catch {}
     await Promise.all(tasks.map(async (t) => {
       try {
-        const ms = await listTaskMessages(t.id)
+        const ms = await listTaskMessages(t.id, 1)
         const last = ms[ms.length - 1]
         const preview = last ? `${last.author?.full_name ? last.author.full_name + ': ' : ''}${last.content}` : 'Нет сообщений'
         const ts = last ? new Date(last.created_at).getTime() : 0
-        const lr = getLastReadAt(t.id) || 0
-        const unread = ms.filter((m: any) => new Date(m.created_at).getTime() > lr && (!userId || m.author?.id !== userId)).length
-        next[t.id] = { preview, ts, unread }
+        next[t.id] = { preview, ts, unread: unreadByTask[t.id] || 0 }
       } catch {}
     }))
     setLastMeta(next)
@@ -1,33 +1,52 @@
 import { Button, Card, Empty, Flex, Space, Table, Tag, Typography, message, Input } from 'antd'
 import { PlusOutlined, ReloadOutlined, EditOutlined, ArrowLeftOutlined, MessageOutlined } from '@ant-design/icons'
 import { useNavigate } from 'react-router-dom'
-import { useQuery, useQueryClient } from '@tanstack/react-query'
-import { createDependency, createTask, getProject, getTaskDependencies, listProjectMembers, listTasks, setTaskDependencies, Task, updateTask } from '../api/client'
+import { keepPreviousData, useQuery, useQueryClient } from '@tanstack/react-query'
+import { createDependency, createTask, getProject, getProjectChanges, getTaskDependencies, listProjectMembers, listTasks, searchTasks, setTaskDependencies, Task, updateTask } from '../api/client'
 import { useEffect, useState } from 'react'
 import TaskForm from '../components/TaskForm'
 import { useProjectStore } from '../store/useProjectStore'
 import { useAuthStore } from '../store/useAuthStore'
 import TaskChatDrawer from '../components/TaskChatDrawer'
 
-function useTasks(projectId: number | null) {
+const PAGE_SIZE = 20
+
+// Every task of the project, only for the predecessor pickers in the task forms
+function useTasks(projectId: number | null, enabled: boolean) {
   return useQuery({
     queryKey: ['tasks', projectId],
     queryFn: () => listTasks(projectId!),
+    enabled: !!projectId && enabled,
+  })
+}
+
+// One server-side page of the table; the cursor of each visited page is kept so "Назад" works
+function useTaskPage(projectId: number | null, q: string, sort: string, cursor: string | undefined) {
+  return useQuery({
+    queryKey: ['tasks', projectId, 'search', q, sort, cursor],
+    queryFn: () => searchTasks(projectId!, { q: q || undefined, sort, cursor, limit: PAGE_SIZE }),
     enabled: !!projectId,
+    placeholderData: keepPreviousData,
     refetchInterval: 4000
   })
 }
 
 export default function TasksPage({ hideTitle = false }: { hideTitle?: boolean } = {}) {
   const { selectedProjectId } = useProjectStore()
-  const { data, isLoading } = useTasks(selectedProjectId)
   const qc = useQueryClient()
   const navigate = useNavigate()
   const [open, setOpen] = useState(false)
   const [editOpen, setEditOpen] = useState(false)
   const [editInitial, setEditInitial] = useState<any>(null)
   const [editingTaskId, setEditingTaskId] = useState<number | null>(null)
-  const [searchId, setSearchId] = useState<string>('')
+  const [searchText, setSearchText] = useState<string>('')
+  const [query, setQuery] = useState<string>('')
+  const [sort, setSort] = useState<string>('id')
+  // cursors[i] opens page i; the first page has none
+  const [cursors, setCursors] = useState<Array<string | undefined>>([undefined])
+  const page = cursors.length - 1
+  const { data } = useTasks(selectedProjectId, open || editOpen)
+  const { data: taskPage, isLoading } = useTaskPage(selectedProjectId, query, sort, cursors[page])
   const { bumpGraphRefresh } = useProjectStore()
   const role = useAuthStore(s => s.user?.role)
   const userId = useAuthStore(s => s.user?.id || null)
@@ -47,27 +66,77 @@ export default function TasksPage({ hideTitle = false }: { hideTitle?: boolean }
 
   useEffect(() => { loadMembers() }, [selectedProjectId])
 
+  // A cursor only makes sense for the query and sort it came from, so both go back to the first page
+  useEffect(() => {
+    const t = setTimeout(() => {
+      const next = searchText.trim()
+      if (next !== query) {
+        setQuery(next)
+        setCursors([undefined])
+      }
+    }, 300)
+    return () => clearTimeout(t)
+  }, [searchText])
+
+  useEffect(() => { setCursors([undefined]) }, [selectedProjectId])
+
   useEffect(() => {
     if (!selectedProjectId) { setManagerId(null); return }
     getProject(selectedProjectId).then(p => setManagerId(p.manager_id ?? null)).catch(() => setManagerId(null))
   }, [selectedProjectId])
 
-  // SSE: live refresh tasks when project updates
+  // SSE: live refresh tasks when project updates. Events sent while the stream was down are lost,
+  // so after a reconnect the change log tells whether anything happened since the last sequence seen
   useEffect(() => {
     if (!selectedProjectId) return
-    const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
-    const sse = new EventSource(`${API_BASE}/events/projects/${selectedProjectId}/stream`)
-    sse.onmessage = () => {
-      qc.invalidateQueries({ queryKey: ['tasks', selectedProjectId] })
+    const projectId = selectedProjectId
+    let seq: number | null = null
+    let dropped = false
+    let closed = false
+    const refresh = () => {
+      qc.invalidateQueries({ queryKey: ['tasks', projectId] })
       loadMembers()
       bumpGraphRefresh()
     }
-    return () => sse.close()
+    // Read the sequence before reloading, so changes made during the reload are caught next time
+    const reload = () => {
+      getProjectChanges(projectId).then(c => { if (!closed) seq = c.seq }).catch(() => { seq = null })
+      refresh()
+    }
+    const catchUp = async () => {
+      if (seq == null) return reload()
+      try {
+        const changes = await getProjectChanges(projectId, seq, 1)
+        if (!closed && (changes.reset || changes.seq !== seq)) reload()
+      } catch (e) {
+        reload()
+      }
+    }
+    getProjectChanges(projectId).then(c => { if (!closed && seq == null) seq = c.seq }).catch(() => {})
+    const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
+    const sse = new EventSource(`${API_BASE}/events/projects/${projectId}/stream`)
+    sse.onmessage = reload
+    sse.onerror = () => { dropped = true }
+    sse.onopen = () => {
+      if (!dropped) return
+      dropped = false
+      catchUp()
+    }
+    return () => {
+      closed = true
+      sse.close()
+    }
   }, [selectedProjectId, qc, bumpGraphRefresh])
 
+  function sortOrder(key: string): 'ascend' | 'descend' | null {
+    if (sort === key) return 'ascend'
+    if (sort === `-${key}`) return 'descend'
+    return null
+  }
+
   const columns = [
-    { title: 'ID', dataIndex: 'id', width: 80 },
-    { title: 'Название', dataIndex: 'name' },
+    { title: 'ID', dataIndex: 'id', key: 'id', width: 80, sorter: true, sortOrder: sortOrder('id') },
+    { title: 'Название', dataIndex: 'name', key: 'name', sorter: true, sortOrder: sortOrder('name') },
     { title: 'Описание', dataIndex: 'description' },
     { title: 'Длительность', dataIndex: 'duration_plan', width: 120 },
     { title: 'Статус', dataIndex: 'status', width: 140, render: (s: string) => <Tag>{s}</Tag> },
@@ -139,14 +208,14 @@ export default function TasksPage({ hideTitle = false }: { hideTitle?: boolean }
         ) : <span />}
         <Flex gap={8}>
           <Input
-            placeholder="Поиск по ID"
-            value={searchId}
-            onChange={(e) => setSearchId(e.target.value)}
+            placeholder="Поиск по названию"
+            value={searchText}
+            onChange={(e) => setSearchText(e.target.value)}
             allowClear
-            style={{ width: 150 }}
+            style={{ width: 200 }}
             autoComplete="off"
-            name="task-id-search"
-            id="task-id-search"
+            name="task-search"
+            id="task-search"
           />
           <Button icon={<ReloadOutlined />} onClick={() => qc.invalidateQueries({ queryKey: ['tasks', selectedProjectId] })} disabled={!selectedProjectId}>Обновить</Button>
           {(role === 'admin' || role === 'manager') && (
@@ -156,17 +225,33 @@ export default function TasksPage({ hideTitle = false }: { hideTitle?: boolean }
       </Flex>
       <Card>
         {selectedProjectId ? (
-          <Table<Task>
-            rowKey="id"
-            loading={isLoading}
-            dataSource={(data || []).filter(t => {
-              const q = searchId.trim()
-              if (!q) return true
-              return String(t.id).includes(q)
-            })}
-            columns={columns}
-            pagination={{ pageSize: 10 }}
-          />
+          <Flex vertical gap={12}>
+            <Table<Task>
+              rowKey="id"
+              loading={isLoading}
+              dataSource={taskPage?.items || []}
+              columns={columns}
+              pagination={false}
+              onChange={(_pagination, _filters, sorter) => {
+                const s = Array.isArray(sorter) ? sorter[0] : sorter
+                setSort(!s?.order || !s.columnKey ? 'id' : s.order === 'descend' ? `-${s.columnKey}` : String(s.columnKey))
+                setCursors([undefined])
+              }}
+            />
+            <Flex justify="flex-end" align="center" gap={8}>
+              <Typography.Text type="secondary">Страница {page + 1}</Typography.Text>
+              <Button onClick={() => setCursors(cursors.slice(0, -1))} disabled={page === 0}>Назад</Button>
+              <Button
+                onClick={() => {
+                  const next = taskPage?.next_cursor
+                  if (next) setCursors([...cursors, next])
+                }}
+                disabled={!taskPage?.next_cursor}
+              >
+                Далее
+              </Button>
+            </Flex>
+          </Flex>
         ) : (
           <Empty description="Выберите проект на странице Проекты" />
         )}